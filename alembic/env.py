@@ -5,6 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 
+from app.core.config import DATABASE_URL
 from app.core.database import engine
 from sqlmodel import SQLModel
 
@@ -14,6 +15,7 @@ from app.memberships.models import Membership
 from app.customermemberships.models import CustomerMembership
 from app.attendances.models import Attendance
 from app.shop.models import Product
+from app.jobs.models import JobLease, JobRun
 
 
 # this is the Alembic Config object, which provides
@@ -25,6 +27,9 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# La URL sale de la configuración de la app (DATABASE_URL), no de alembic.ini
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -0,0 +1,52 @@
+import argparse
+import logging
+import sys
+from datetime import datetime, time
+from sqlalchemy import Engine
+from sqlmodel import Session
+from app.core.config import ATTENDANCE_SWEEP_CHUNK_SIZE
+from app.core.database import engine
+from app.attendances.services import SweepResult, close_stale_attendances
+
+logger = logging.getLogger("app.attendances.jobs")
+
+
+def run_attendance_sweep(
+    db_engine: Engine = engine,
+    now: datetime | None = None,
+    closing: time | None = None,
+    chunk_size: int = ATTENDANCE_SWEEP_CHUNK_SIZE,
+) -> SweepResult:
+    """
+    Cierra en una sesión propia las asistencias olvidadas y deja el resumen en
+    el log. Pensado para correr a la hora de cierre del gimnasio.
+    """
+    with Session(db_engine) as session:
+        result = close_stale_attendances(session, now=now, closing=closing, chunk_size=chunk_size)
+
+    logger.info(
+        "Cierre de asistencias: %d cerradas (%d válidas, %d puntos) en %d chunks, %.0f ms",
+        result.closed, result.valid, result.points, result.chunks, result.seconds * 1000,
+    )
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.attendances.jobs",
+        description="Cierra las asistencias que quedaron abiertas después del cierre",
+    )
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None, help="Momento de corte, UTC (default: ahora)")
+    parser.add_argument("--closing", type=time.fromisoformat, default=None, help="Hora de cierre, UTC (default: GYM_CLOSING_TIME)")
+    parser.add_argument("--chunk-size", type=int, default=ATTENDANCE_SWEEP_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    # Registra todos los modelos (relaciones entre tablas) antes de consultar
+    import app.models  # noqa: F401
+
+    run_attendance_sweep(now=args.now, closing=args.closing, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timezone
+from sqlalchemy import Engine, func
+from sqlmodel import Session, select
+from app.core.cache import invalidation_bus
+from app.core.config import (
+    GYM_CLOSING_TIME,
+    OCCUPANCY_KEEPALIVE_SECONDS,
+    OCCUPANCY_POLL_SECONDS,
+    OCCUPANCY_RECONCILE_SECONDS,
+)
+from app.core.database import engine
+from app.core.expressions import at_time_of_day
+from app.core.shared_counters import SharedCounters, shared_counters
+from app.attendances.models import Attendance
+
+logger = logging.getLogger(__name__)
+
+COUNT_KEY = "occupancy.count"
+UPDATED_KEY = "occupancy.updated_at_us"
+
+
+def count_present(session: Session, now: datetime | None = None, closing: time | None = None) -> int:
+    """
+    Asistencias abiertas cuyo día todavía no cerró: la gente que está en el
+    gimnasio. Las olvidadas de días anteriores no cuentan.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(tzinfo=None)
+    closing = closing or time.fromisoformat(GYM_CLOSING_TIME)
+    return session.exec(
+        select(func.count(Attendance.id)).where(
+            Attendance.check_out == None,
+            at_time_of_day(Attendance.check_in, closing) > now,
+        )
+    ).one()
+
+
+class OccupancyCounter:
+    """
+    Cantidad de personas en el gimnasio, en memoria del worker.
+
+    `create_attendance` y `checkout_attendance` la mueven de a uno después del
+    commit; el cambio se publica por `invalidation_bus` para que lo apliquen
+    los demás workers. Cada `interval` segundos se corrige contra la base,
+    por si se perdió algún aviso o hubo cierres masivos.
+
+    Sin almacén compartido (`CACHE_URL`), si `counters` está en memoria
+    compartida (workers de `app.serve`) el valor vive ahí y cada worker lo
+    revisa cada `OCCUPANCY_POLL_SECONDS`, sin depender de los avisos del bus.
+
+    Los suscriptores (streams SSE) reciben un aviso por cada cambio.
+    """
+
+    def __init__(
+        self,
+        db_engine: Engine = engine,
+        interval: float = OCCUPANCY_RECONCILE_SECONDS,
+        counters: SharedCounters = shared_counters,
+    ):
+        self.engine = db_engine
+        self.interval = interval
+        self.counters = counters
+        self.count = 0
+        self.updated_at = datetime.now(timezone.utc)
+        self._lock = threading.Lock()
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def shared(self) -> bool:
+        # Con CACHE_URL los avisos del bus ya llegan a todos los workers y nodos
+        return self.counters.shared and invalidation_bus.backend.name != "redis"
+
+    def _read_shared(self) -> dict:
+        updated_us = self.counters.get(UPDATED_KEY)
+        return {
+            "count": self.counters.get(COUNT_KEY),
+            "updated_at": datetime.fromtimestamp(updated_us / 1e6, timezone.utc) if updated_us else self.updated_at,
+        }
+
+    def snapshot(self) -> dict:
+        if self.shared:
+            return self._read_shared()
+        with self._lock:
+            return {"count": self.count, "updated_at": self.updated_at}
+
+    def _notify(self) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        # Los cambios llegan desde hilos del threadpool o del bus
+        for loop, changed in subscribers:
+            loop.call_soon_threadsafe(changed.set)
+
+    def _update(self, compute) -> None:
+        if self.shared:
+            previous, count = self.counters.update(COUNT_KEY, compute)
+            if count != previous:
+                self.counters.set(UPDATED_KEY, int(datetime.now(timezone.utc).timestamp() * 1_000_000))
+                self.follow()
+            return
+        with self._lock:
+            count = compute(self.count)
+            if count == self.count:
+                return
+            self.count = count
+            self.updated_at = datetime.now(timezone.utc)
+        self._notify()
+
+    def follow(self) -> None:
+        """
+        Avisa a los suscriptores si otro worker cambió el valor compartido.
+        """
+        snapshot = self._read_shared()
+        with self._lock:
+            if (snapshot["count"], snapshot["updated_at"]) == (self.count, self.updated_at):
+                return
+            self.count = snapshot["count"]
+            self.updated_at = snapshot["updated_at"]
+        self._notify()
+
+    def apply(self, *deltas: str) -> None:
+        delta = sum(int(item) for item in deltas)
+        self._update(lambda count: max(count + delta, 0))
+
+    def checked_in(self) -> None:
+        if self.shared:
+            self.apply("1")
+        else:
+            invalidation_bus.publish("occupancy", "1")
+
+    def checked_out(self) -> None:
+        if self.shared:
+            self.apply("-1")
+        else:
+            invalidation_bus.publish("occupancy", "-1")
+
+    def reconcile(self) -> int:
+        with Session(self.engine) as session:
+            count = count_present(session)
+        drift = count - self.snapshot()["count"]
+        if drift:
+            logger.info("Ocupación corregida contra la base: %d (diferencia %+d)", count, drift)
+        self._update(lambda _: count)
+        return count
+
+    @contextmanager
+    def subscribe(self):
+        """
+        Evento que se activa en cada cambio, para usar desde el event loop.
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.reconcile)
+            except Exception:
+                logger.exception("No se pudo reconciliar la ocupación")
+            await asyncio.sleep(self.interval)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(OCCUPANCY_POLL_SECONDS)
+            # Solo lee dos enteros de la memoria compartida
+            self.follow()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        if self.interval > 0:
+            self._tasks.append(loop.create_task(self._run(), name="occupancy-reconcile"))
+        if self.shared:
+            self._tasks.append(loop.create_task(self._watch(), name="occupancy-watch"))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def format_event(snapshot: dict) -> str:
+    data = json.dumps({"count": snapshot["count"], "updated_at": snapshot["updated_at"].isoformat()})
+    return f"event: occupancy\ndata: {data}\n\n"
+
+
+async def occupancy_events(counter: OccupancyCounter, request, keepalive: float = OCCUPANCY_KEEPALIVE_SECONDS):
+    """
+    Stream SSE: el valor actual al conectarse y uno nuevo en cada cambio.
+    Varios cambios seguidos se envían como uno solo (el último).
+    """
+    with counter.subscribe() as changed:
+        yield format_event(counter.snapshot())
+        while not await request.is_disconnected():
+            try:
+                await asyncio.wait_for(changed.wait(), keepalive)
+            except asyncio.TimeoutError:
+                # Comentario SSE: mantiene viva la conexión a través de proxies
+                yield ": keepalive\n\n"
+                continue
+            changed.clear()
+            yield format_event(counter.snapshot())
+
+
+occupancy = OccupancyCounter()
+invalidation_bus.register("occupancy", occupancy.apply)
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 from sqlmodel import select, desc
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timezone
-from app.attendances.schemas import AttendanceRead
+from app.attendances.schemas import AttendanceRead, OccupancyRead
+from app.attendances.occupancy import occupancy, occupancy_events
 from app.attendances.models import Attendance
 from app.customers.models import Customer
 from app.customermemberships.models import CustomerMembership
@@ -12,8 +15,10 @@ from app.attendances.services import (finalize_attendance,
                                       get_weekly_attendance_count,
                                       normalize_datetime,
                                       apply_attendance_points,
-                                      get_open_attendance_today)
+                                      get_open_attendance_today,
+                                      load_attendance_for_points)
 from app.core.database import SessionDep
+from app.core.instrumentation import TimedRoute
 from app.core.enums import MembershipStatusEnum
 from app.core.pagination import DefaultPagination
 from app.auth.dependencies import get_current_customer, check_admin
@@ -22,7 +27,8 @@ from app.auth.models import User
 
 router = APIRouter(
     prefix="/attendances",
-    tags=["attendances"]
+    tags=["attendances"],
+    route_class=TimedRoute
 )
 
 @router.post(
@@ -54,6 +60,7 @@ def create_attendance(
 ):
     customer_membership = session.exec(
         select(CustomerMembership)
+        .options(joinedload(CustomerMembership.membership))
         .where(
             CustomerMembership.customer_id == current_customer.id,
             CustomerMembership.status == MembershipStatusEnum.ACTIVE
@@ -90,6 +97,7 @@ def create_attendance(
     session.add(attendance)
     session.commit()
     session.refresh(attendance)
+    occupancy.checked_in()
 
     return attendance
 
@@ -126,7 +134,8 @@ def checkout_attendance(
     session: SessionDep,
     current_customer: Customer = Depends(get_current_customer),
 ):
-    attendance = session.get(Attendance, attendance_id)
+    # La membresía se carga junto con la asistencia: la usa apply_attendance_points
+    attendance = load_attendance_for_points(session, attendance_id)
 
     if not attendance:
         raise HTTPException(
@@ -168,6 +177,7 @@ def checkout_attendance(
     
     session.commit()
     session.refresh(attendance)
+    occupancy.checked_out()
 
     return attendance
 
@@ -250,6 +260,52 @@ def read_me_attendances(
     return paginate(session, query, params)
 
 
+@router.get(
+    "/occupancy",
+    response_model=OccupancyRead,
+    status_code=status.HTTP_200_OK,
+    summary="Ocupación actual",
+    description="""
+    Devuelve cuántas personas hay en el gimnasio en este momento (asistencias
+    abiertas del día) y cuándo cambió por última vez.
+
+    - Se responde desde memoria, sin consultar la base.
+    - No requiere autenticación: es un dato agregado para las pantallas de recepción.
+    """,
+    responses={
+        200: {"description": "Ocupación obtenida correctamente"},
+    },
+)
+async def read_occupancy():
+    return occupancy.snapshot()
+
+
+@router.get(
+    "/occupancy/stream",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Ocupación en vivo (SSE)",
+    description="""
+    Stream de server-sent events con la ocupación: envía el valor actual al
+    conectarse y un evento `occupancy` cada vez que cambia, en lugar de que
+    cada pantalla consulte periódicamente.
+
+    - Sin cambios, envía un comentario de keepalive cada `OCCUPANCY_KEEPALIVE_SECONDS`.
+    - No requiere autenticación (`EventSource` no permite enviar headers).
+    """,
+    responses={
+        200: {"description": "Stream `text/event-stream` abierto"},
+    },
+)
+async def stream_occupancy(request: Request):
+    return StreamingResponse(
+        occupancy_events(occupancy, request),
+        media_type="text/event-stream",
+        # Sin buffering en proxies (nginx) ni cachés intermedias
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/{attendance_id}",
     response_model=AttendanceRead,
@@ -14,3 +14,8 @@ class AttendanceRead(SQLModel):
     points_awarded : Optional[int]
     is_valid : bool
 
+
+
+class OccupancyRead(SQLModel):
+    count : int
+    updated_at : datetime
@@ -1,8 +1,32 @@
+import time as timer
+from dataclasses import dataclass
+from sqlalchemy import and_, case, func, update
+from sqlalchemy.orm import joinedload
 from sqlmodel import select, Session
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from app.attendances.models import Attendance
 from app.customers.models import Customer
+from app.customermemberships.models import CustomerMembership
+from app.memberships.models import Membership
+from app.core.config import ATTENDANCE_SWEEP_CHUNK_SIZE, GYM_CLOSING_TIME
 from app.core.constants import PUNTOS_BASE, ASISTENCIA_MINIMA, ASISTENCIA_MAXIMA
+from app.core.expressions import at_time_of_day, minutes_between, truncate_to_int
+from app.core.response_cache import invalidate_after_commit
+
+def load_attendance_for_points(session: Session, attendance_id: int) -> Attendance | None:
+    """
+    Obtiene la asistencia con la membresía que usa apply_attendance_points.
+
+    `populate_existing` aplica la carga aunque la asistencia ya esté en la
+    sesión sin esas relaciones (con STRICT_LOADING, accederlas fallaría).
+    """
+    return session.get(
+        Attendance,
+        attendance_id,
+        options=[joinedload(Attendance.customer_membership).joinedload(CustomerMembership.membership)],
+        populate_existing=True,
+    )
+
 
 def finalize_attendance(attendance: Attendance) -> None:
     """
@@ -30,6 +54,10 @@ def apply_attendance_points(attendance: Attendance, customer: Customer):
     - Los puntos dependen del multiplicador de la membresía asociada
       al CustomerMembership de la asistencia.
     - Los puntos se suman directamente al balance del cliente.
+
+    Nota:
+    - Accede a `attendance.customer_membership.membership`: quien obtiene la
+      asistencia debe cargar esas relaciones (ver load_attendance_for_points).
     """
 
     if not attendance.is_valid:
@@ -98,3 +126,124 @@ def get_open_attendance_today(session: Session, customer_id: int) -> Attendance
             Attendance.check_out == None
         )
     ).first()
+
+
+@dataclass
+class SweepResult:
+    """
+    Resultado de un cierre masivo de asistencias.
+    """
+    closed: int = 0
+    valid: int = 0
+    points: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+
+def stale_attendance_conditions(now: datetime, closing: time) -> tuple:
+    """
+    Asistencias abiertas cuyo día ya cerró (a la hora `closing`) antes de `now`.
+    """
+    return (
+        Attendance.check_out == None,
+        at_time_of_day(Attendance.check_in, closing) <= now,
+    )
+
+
+def close_stale_attendances(
+    session: Session,
+    now: datetime | None = None,
+    closing: time | None = None,
+    chunk_size: int = ATTENDANCE_SWEEP_CHUNK_SIZE,
+) -> SweepResult:
+    """
+    Cierra a la hora de cierre de su día las asistencias que quedaron abiertas,
+    con las mismas reglas que el checkout (`finalize_attendance` y
+    `apply_attendance_points`) pero calculadas en SQL, de a `chunk_size` IDs
+    por transacción.
+
+    Un check-in posterior al cierre se cierra en el mismo instante (duración 0,
+    inválida). Es idempotente: una asistencia cerrada no vuelve a cumplir las
+    condiciones.
+    """
+    start = timer.perf_counter()
+    now = normalize_datetime(now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(tzinfo=None)
+    closing = closing or time.fromisoformat(GYM_CLOSING_TIME)
+    conditions = stale_attendance_conditions(now, closing)
+    result = SweepResult()
+
+    closing_at = at_time_of_day(Attendance.check_in, closing)
+    check_out = case((Attendance.check_in > closing_at, Attendance.check_in), else_=closing_at)
+    duration = minutes_between(Attendance.check_in, check_out)
+    is_valid = and_(duration >= ASISTENCIA_MINIMA, duration < ASISTENCIA_MAXIMA)
+    multiplier = (
+        select(Membership.points_multiplier)
+        .join(CustomerMembership, CustomerMembership.membership_id == Membership.id)
+        .where(CustomerMembership.id == Attendance.customer_membership_id)
+        .scalar_subquery()
+    )
+    points = case((is_valid, func.coalesce(truncate_to_int(PUNTOS_BASE * multiplier), 0)), else_=0)
+
+    first_id, last_id = session.exec(
+        select(func.min(Attendance.id), func.max(Attendance.id)).where(*conditions)
+    ).one()
+    if first_id is None:
+        result.seconds = timer.perf_counter() - start
+        return result
+
+    for window_start in range(first_id, last_id + 1, chunk_size):
+        window = (
+            Attendance.id >= window_start,
+            Attendance.id < window_start + chunk_size,
+            *conditions,
+        )
+        # En PostgreSQL las filas quedan tomadas hasta el commit: un checkout
+        # simultáneo espera, y las que ya tiene otro se saltean
+        ids = session.exec(
+            select(Attendance.id)
+            .where(*window)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            continue
+
+        # Solo cuentan las filas que cierra este UPDATE: en SQLite el SELECT no
+        # toma lock y un checkout simultáneo pudo haber cerrado (y acreditado) alguna
+        closed_rows = session.execute(
+            update(Attendance)
+            .where(Attendance.id.in_(ids), *conditions)
+            .values(
+                check_out=check_out,
+                duration_minutes=duration,
+                is_valid=is_valid,
+                points_awarded=points,
+            )
+            .returning(Attendance.id, Attendance.customer_id, Attendance.is_valid, Attendance.points_awarded)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not closed_rows:
+            session.commit()
+            continue
+
+        awarded: dict[int, int] = {}
+        for row in closed_rows:
+            awarded[row.customer_id] = awarded.get(row.customer_id, 0) + row.points_awarded
+        credited = {customer_id: amount for customer_id, amount in awarded.items() if amount}
+        if credited:
+            session.execute(
+                update(Customer)
+                .where(Customer.id.in_(credited))
+                .values(points_balance=Customer.points_balance + case(credited, value=Customer.id, else_=0))
+                .execution_options(synchronize_session=False)
+            )
+
+        # El update masivo no pasa por el flush: los tags se agregan a mano
+        invalidate_after_commit(session, *(f"customer:{customer_id}" for customer_id in awarded))
+        session.commit()
+        result.closed += len(closed_rows)
+        result.valid += sum(1 for row in closed_rows if row.is_valid)
+        result.points += sum(credited.values())
+        result.chunks += 1
+
+    result.seconds = timer.perf_counter() - start
+    return result
@@ -1,7 +1,16 @@
+import asyncio
+import json
+import uuid
+import pytest
 from fastapi import status
 from freezegun import freeze_time
-from datetime import datetime, timezone, timedelta
+from sqlalchemy import event, update
+from datetime import datetime, time, timezone, timedelta
 from app.attendances.models import Attendance
+from app.attendances.occupancy import OccupancyCounter, occupancy, occupancy_events
+from app.attendances.services import close_stale_attendances
+from app.core.shared_counters import SharedCounters
+from app.customers.models import Customer
 from app.helpers import login
 
 
@@ -224,4 +233,240 @@ def test_list_my_attendances_paginated_customer(
 
     assert body["page"] == 1
     assert body["size"] == 1
-    assert len(body["items"]) <= 1
\ No newline at end of file
+    assert len(body["items"]) <= 1
+
+def test_create_attendance_statement_budget(
+    client,
+    session,
+    customer_with_membership,
+    assert_max_statements
+):
+    c = customer_with_membership
+    token = login(client, c["email"], c["password"])
+    session.expunge_all()
+
+    with assert_max_statements(7):
+        response = client.post("/attendances/",
+                               headers={"Authorization": f"Bearer {token}"},
+                               json={})
+
+    assert response.status_code == status.HTTP_201_CREATED
+
+def test_checkout_attendance_statement_budget(
+    client,
+    session,
+    attendance,
+    customer_with_membership,
+    assert_max_statements
+):
+    c = customer_with_membership
+    token = login(client, c["email"], c["password"])
+
+    db_attendance = session.get(Attendance, attendance["id"])
+    db_attendance.check_in = datetime.now(timezone.utc) - timedelta(minutes=35)
+    session.commit()
+    session.expunge_all()
+
+    with assert_max_statements(6):
+        response = client.patch(f"/attendances/{attendance['id']}/checkout/",
+                                headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+
+def test_create_attendance_in_strict_loading_mode(client, customer_with_membership, strict_loading):
+    c = customer_with_membership
+    token = login(client, c["email"], c["password"])
+
+    response = client.post("/attendances/",
+                           headers={"Authorization": f"Bearer {token}"},
+                           json={})
+
+    assert response.status_code == status.HTTP_201_CREATED
+
+def test_checkout_attendance_in_strict_loading_mode(
+    client,
+    session,
+    attendance,
+    customer_with_membership,
+    strict_loading
+):
+    c = customer_with_membership
+    token = login(client, c["email"], c["password"])
+
+    db_attendance = session.get(Attendance, attendance["id"])
+    db_attendance.check_in = datetime.now(timezone.utc) - timedelta(minutes=35)
+    session.commit()
+    session.expunge_all()
+
+    response = client.patch(f"/attendances/{attendance['id']}/checkout/",
+                            headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["points_awarded"] == 15
+
+#------- TEST CIERRE DE ASISTENCIAS -------#
+
+CLOSING = time(23, 0)
+
+def _open_attendance_at(session, attendance_id: int, check_in: datetime) -> None:
+    db_attendance = session.get(Attendance, attendance_id)
+    db_attendance.check_in = check_in
+    session.commit()
+
+def test_sweep_closes_forgotten_attendance_with_checkout_rules(client, session, customer_with_membership, attendance):
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).replace(hour=22, minute=20, second=0, microsecond=500000)
+    _open_attendance_at(session, attendance["id"], yesterday)
+
+    result = close_stale_attendances(session, closing=CLOSING)
+
+    assert (result.closed, result.valid, result.points) == (1, 1, 15)
+    session.expire_all()
+    db_attendance = session.get(Attendance, attendance["id"])
+    assert db_attendance.check_out == yesterday.replace(hour=23, minute=0, second=0, microsecond=0, tzinfo=None)
+    # Mismo truncado que finalize_attendance: 39 min 59.5 s son 39 minutos
+    assert db_attendance.duration_minutes == 39
+    assert db_attendance.is_valid is True
+    assert db_attendance.points_awarded == 15
+    assert session.get(Customer, attendance["customer_id"]).points_balance == 15
+
+def test_sweep_marks_short_attendance_invalid_without_points(client, session, customer_with_membership, attendance):
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).replace(hour=22, minute=45, second=0, microsecond=0)
+    _open_attendance_at(session, attendance["id"], yesterday)
+
+    result = close_stale_attendances(session, closing=CLOSING)
+
+    assert (result.closed, result.valid, result.points) == (1, 0, 0)
+    session.expire_all()
+    db_attendance = session.get(Attendance, attendance["id"])
+    assert db_attendance.duration_minutes == 15
+    assert db_attendance.is_valid is False
+    assert db_attendance.points_awarded == 0
+    assert session.get(Customer, attendance["customer_id"]).points_balance == 0
+
+def test_sweep_keeps_attendances_before_closing_and_is_idempotent(client, session, customer_with_membership, attendance):
+    today = datetime.now(timezone.utc).replace(hour=10, minute=0, second=0, microsecond=0)
+    _open_attendance_at(session, attendance["id"], today)
+
+    assert close_stale_attendances(session, now=today.replace(hour=12), closing=CLOSING).closed == 0
+    assert close_stale_attendances(session, now=today.replace(hour=23, minute=5), closing=CLOSING).closed == 1
+    assert close_stale_attendances(session, now=today.replace(hour=23, minute=5), closing=CLOSING).closed == 0
+
+    session.expire_all()
+    assert session.get(Attendance, attendance["id"]).duration_minutes == 780
+    assert session.get(Attendance, attendance["id"]).is_valid is False
+
+def test_sweep_skips_attendance_checked_out_concurrently(client, session, customer_with_membership, attendance):
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).replace(hour=22, minute=20, second=0, microsecond=0)
+    _open_attendance_at(session, attendance["id"], yesterday)
+    customer_id = attendance["customer_id"]
+
+    def checkout_between_select_and_update(state):
+        # El checkout del cliente cierra y acredita la asistencia justo antes
+        # del UPDATE del cierre masivo
+        if state.is_update and state.statement.table.name == "attendance" and not raced:
+            raced.append(True)
+            connection = state.session.connection()
+            connection.execute(
+                update(Attendance.__table__)
+                .where(Attendance.__table__.c.id == attendance["id"])
+                .values(check_out=yesterday + timedelta(minutes=40), duration_minutes=40, is_valid=True, points_awarded=15)
+            )
+            connection.execute(
+                update(Customer.__table__)
+                .where(Customer.__table__.c.id == customer_id)
+                .values(points_balance=Customer.__table__.c.points_balance + 15)
+            )
+
+    raced = []
+    event.listen(session, "do_orm_execute", checkout_between_select_and_update)
+    try:
+        result = close_stale_attendances(session, closing=CLOSING)
+    finally:
+        event.remove(session, "do_orm_execute", checkout_between_select_and_update)
+
+    assert raced
+    assert (result.closed, result.valid, result.points) == (0, 0, 0)
+    session.expire_all()
+    assert session.get(Customer, customer_id).points_balance == 15
+    assert session.get(Attendance, attendance["id"]).duration_minutes == 40
+
+#------- TEST OCUPACIÓN -------#
+
+@pytest.fixture
+def reset_occupancy():
+    occupancy.count = 0
+    yield occupancy
+    occupancy.count = 0
+
+def test_occupancy_follows_checkin_and_checkout(client, customer_with_membership, reset_occupancy):
+    c = customer_with_membership
+    token = login(client, c["email"], c["password"])
+    assert client.get("/attendances/occupancy").json()["count"] == 0
+
+    attendance_id = client.post("/attendances/",
+                                headers={"Authorization": f"Bearer {token}"},
+                                json={}).json()["id"]
+    assert client.get("/attendances/occupancy").json()["count"] == 1
+
+    client.patch(f"/attendances/{attendance_id}/checkout",
+                 headers={"Authorization": f"Bearer {token}"})
+    assert client.get("/attendances/occupancy").json()["count"] == 0
+
+def test_occupancy_reconcile_ignores_forgotten_attendances(session, customer_with_membership, attendance):
+    counter = OccupancyCounter(session.get_bind())
+    assert counter.reconcile() == 1
+
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).replace(hour=10)
+    _open_attendance_at(session, attendance["id"], yesterday)
+    assert counter.reconcile() == 0
+
+class _FakeRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+def test_occupancy_stream_sends_changes_and_keepalives():
+    counter = OccupancyCounter(interval=0)
+    request = _FakeRequest()
+
+    async def consume():
+        events = occupancy_events(counter, request, keepalive=0.05)
+        first = await anext(events)
+        counter.apply("1", "1")
+        changed = await anext(events)
+        keepalive = await anext(events)
+        request.disconnected = True
+        rest = [event async for event in events]
+        return first, changed, keepalive, rest
+
+    first, changed, keepalive, rest = asyncio.run(consume())
+
+    assert first.startswith("event: occupancy\n")
+    assert json.loads(first.split("data: ")[1])["count"] == 0
+    assert json.loads(changed.split("data: ")[1])["count"] == 2
+    assert keepalive == ": keepalive\n\n"
+    assert rest == []
+    assert not counter._subscribers
+
+def test_occupancy_is_shared_between_workers_through_shared_memory(session, customer_with_membership, attendance):
+    counters = SharedCounters(slots=4)
+    counters.create(name=f"test-occupancy-{uuid.uuid4().hex[:8]}")
+    try:
+        # Dos contadores sobre la misma tabla: como dos workers de app.serve
+        worker_a = OccupancyCounter(session.get_bind(), counters=counters)
+        worker_b = OccupancyCounter(session.get_bind(), counters=counters)
+        assert worker_a.shared
+
+        worker_a.checked_in()
+        worker_a.checked_in()
+        worker_b.checked_out()
+        assert worker_b.snapshot()["count"] == 1
+        assert worker_b.snapshot()["updated_at"] == worker_a.snapshot()["updated_at"]
+
+        counters.set("occupancy.count", 7)
+        assert worker_b.reconcile() == 1
+        assert worker_a.snapshot()["count"] == 1
+    finally:
+        counters.unlink()
@@ -3,6 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlmodel import Session, select
 from app.core.database import get_session
 from app.core.security import decode_token
+from app.core.instrumentation import timed_phase
 from app.core.enums import RoleEnum, StatusEnum
 from app.auth.models import User
 from app.customers.models import Customer
@@ -15,6 +16,7 @@ oauth2_scheme_optional = OAuth2PasswordBearer(
     auto_error=False
 )
 
+@timed_phase("auth")
 async def get_current_user(token: str = Depends(oauth2_scheme),session: Session = Depends(get_session)) -> User:
     payload = decode_token(token)
     user_id = payload.get("sub")
@@ -29,6 +31,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme),session: Session
 
     return user
 
+@timed_phase("auth")
 def get_current_customer(user: User = Depends(get_current_user), session: Session = Depends(get_session)) -> Customer:
     if user.role != RoleEnum.CUSTOMER:
         raise HTTPException(status.HTTP_403_FORBIDDEN,detail="Solo customers")
@@ -47,6 +50,7 @@ def check_admin(user: User = Depends(get_current_user)):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No tienes permisos suficientes")
     return user
 
+@timed_phase("auth")
 def get_current_user_optional(
     token: str | None = Depends(oauth2_scheme_optional),
     session: Session = Depends(get_session),
@@ -1,6 +1,7 @@
 from sqlmodel import SQLModel, Field, Column
 from sqlalchemy import String
 from app.core.enums import RoleEnum, StatusEnum
+from app.core.response_cache import invalidate_on_commit
 
 class User(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
@@ -10,4 +11,10 @@ class User(SQLModel, table=True):
 
     hashed_password: str = Field(nullable=False)
     role: RoleEnum  # ADMIN | CUSTOMER
-    status: StatusEnum = Field(default=StatusEnum.ACTIVE)
\ No newline at end of file
+    status: StatusEnum = Field(default=StatusEnum.ACTIVE)
+
+# Las respuestas cacheadas por usuario se descartan si el usuario cambia
+# (ej. se desactiva), para no seguir sirviéndolas sin pasar por la
+# autenticación. Se registra con el modelo: vale para cualquier escritura,
+# no solo las que pasan por las rutas
+invalidate_on_commit(User, "user:{id}")
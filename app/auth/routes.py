@@ -6,6 +6,7 @@ from datetime import timedelta
 from app.auth.service import authenticate_user
 from app.core.security import create_access_token
 from app.core.database import get_session
+from app.core.instrumentation import TimedRoute
 from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from app.auth.schemas import Token
 from app.auth.dependencies import check_admin
@@ -15,7 +16,8 @@ from app.auth.models import User
 
 router = APIRouter(
     prefix="/auth",
-    tags=["auth"])
+    tags=["auth"],
+    route_class=TimedRoute)
 
 
 @router.post(
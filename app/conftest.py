@@ -1,3 +1,5 @@
+import os
+from contextlib import contextmanager
 from fastapi import status
 import pytest
 from fastapi.testclient import TestClient
@@ -5,25 +7,42 @@ from sqlalchemy import create_engine
 from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, Session
 from app.main import app
-from app.core.database import get_session
+from app.core.config import env_bool
+from app.core.database import get_session, create_db_engine
 from app.core.security import get_password_hash
+from app.core.instrumentation import capture_request_stats
+from app.memberships.cache import membership_catalog
+from app.shop.cache import product_catalog
+from app.core.response_cache import response_cache
 from app.core.enums import RoleEnum, StatusEnum
 from app.auth.models import User
 from app.helpers import login
 
 
-sqlite_url = "sqlite://"
+# Por defecto SQLite en memoria; TEST_DATABASE_URL permite correr la suite
+# contra otro backend (ej. postgresql+psycopg://postgres@localhost/gym_test)
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite://")
+# TEST_STRICT_LOADING=true corre toda la suite con raiseload, como STRICT_LOADING
+TEST_STRICT_LOADING = env_bool("TEST_STRICT_LOADING", False)
 
-engine = create_engine(
-    sqlite_url,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
-)
+if TEST_DATABASE_URL == "sqlite://":
+    engine = create_engine(
+        TEST_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+else:
+    engine = create_db_engine(TEST_DATABASE_URL)
 
 @pytest.fixture(name="session")
 def session_fixture():
     SQLModel.metadata.create_all(engine)
+    # Cada test parte de una base vacía: los catálogos en memoria también
+    membership_catalog.invalidate()
+    product_catalog.invalidate()
+    response_cache.clear()
     with Session(engine) as session:
+        session.info["strict_loading"] = TEST_STRICT_LOADING
         yield session
     SQLModel.metadata.drop_all(engine)
 
@@ -37,6 +56,40 @@ def client_fixture(session: Session):
     yield client
     app.dependency_overrides.clear()
 
+@pytest.fixture(name="assert_max_statements")
+def assert_max_statements_fixture():
+    """
+    Falla el test si algún request dentro del bloque ejecuta más sentencias SQL
+    que el máximo indicado. Protege los endpoints calientes de regresiones N+1.
+
+        with assert_max_statements(4):
+            client.get("/shop/")
+    """
+    @contextmanager
+    def assert_max_statements(max_statements: int):
+        with capture_request_stats() as captured:
+            yield captured
+
+        assert captured, "No se ejecutó ningún request dentro del bloque"
+        for stats in captured:
+            assert stats.statements <= max_statements, (
+                f"{stats.method} {stats.route} ejecutó {stats.statements} sentencias SQL "
+                f"(máximo {max_statements}):\n" + "\n".join(stats.statement_counts)
+            )
+
+    return assert_max_statements
+
+@pytest.fixture(name="strict_loading")
+def strict_loading_fixture(session):
+    """
+    Activa el modo estricto (raiseload) sobre la sesión compartida de tests,
+    igual que STRICT_LOADING hace con las sesiones de cada request.
+    """
+    session.expunge_all()
+    session.info["strict_loading"] = True
+    yield
+    session.info.pop("strict_loading", None)
+
 @pytest.fixture(name="admin_user")
 def admin_user(session):
     admin = User(
@@ -0,0 +1,448 @@
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from app.core.config import CACHE_URL, CACHE_INVALIDATION_CHANNEL, CACHE_PUBLISH_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class CacheError(Exception):
+    """
+    Error del almacén compartido (conexión caída, respuesta de error).
+    """
+
+
+class CacheBackend(ABC):
+    """
+    Canal pub/sub compartido por los workers: lo usa `InvalidationBus` para
+    repartir las invalidaciones de las cachés en memoria.
+
+    Los mensajes son bytes: cada caché decide cómo serializar lo que publica.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def publish(self, channel: str, message: bytes) -> None:
+        """
+        Envía `message` a los suscriptores del canal, en este y otros procesos.
+        """
+
+    @abstractmethod
+    def subscribe(self, channel: str, callback) -> None:
+        """
+        Llama a `callback(message)` por cada mensaje publicado en el canal,
+        desde un hilo del backend.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Backend en memoria del proceso. Los mensajes solo llegan a los
+    suscriptores del mismo proceso: con un único worker no hace falta más.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._subscribers: dict[str, list] = {}
+
+    def publish(self, channel: str, message: bytes) -> None:
+        for callback in list(self._subscribers.get(channel, ())):
+            callback(message)
+
+    def subscribe(self, channel: str, callback) -> None:
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    def close(self) -> None:
+        self._subscribers.clear()
+
+
+class NodeCacheBackend(CacheBackend):
+    """
+    Canal entre los procesos de un mismo nodo, sin servidor: cada suscripción
+    escucha en un socket Unix de datagramas dentro de `directory` y publicar
+    es enviar el mensaje a todos los sockets del canal.
+
+    El master de `app.serve` lo instala cuando no hay `CACHE_URL`, para que
+    sus workers se pasen las invalidaciones. Los envíos no bloquean: si un
+    worker tiene el buffer lleno, ese mensaje no le llega y depende del TTL.
+    """
+
+    name = "node"
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._sender: socket.socket | None = None
+        self._sender_pid: int | None = None
+        self._lock = threading.Lock()
+        self._subscriptions: list[tuple[threading.Thread, socket.socket, Path]] = []
+        self._closed = threading.Event()
+
+    def _prefix(self, channel: str) -> str:
+        return re.sub(r"[^\w.-]", "_", channel)
+
+    def _get_sender(self) -> socket.socket:
+        with self._lock:
+            # El socket heredado del master no sirve en el worker: cada proceso abre el suyo
+            if self._sender_pid != os.getpid():
+                self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self._sender.setblocking(False)
+                self._sender_pid = os.getpid()
+            return self._sender
+
+    def publish(self, channel: str, message: bytes) -> None:
+        sender = self._get_sender()
+        failed = 0
+        for path in self.directory.glob(f"{self._prefix(channel)}-*.sock"):
+            try:
+                sender.sendto(message, str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket de un worker que terminó sin cerrarlo (ej. SIGKILL)
+                path.unlink(missing_ok=True)
+            except OSError:
+                failed += 1
+        if failed:
+            raise CacheError(f"{failed} suscriptores de {channel} no recibieron el mensaje")
+
+    def subscribe(self, channel: str, callback) -> None:
+        self._closed.clear()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self._prefix(channel)}-{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(path))
+        thread = threading.Thread(
+            target=self._listen,
+            args=(channel, sock, callback),
+            name=f"cache-subscriber-{channel}",
+            daemon=True,
+        )
+        self._subscriptions.append((thread, sock, path))
+        thread.start()
+
+    def _listen(self, channel: str, sock: socket.socket, callback) -> None:
+        while True:
+            try:
+                message = sock.recv(65536)
+            except OSError:
+                return
+            if self._closed.is_set():
+                return
+            try:
+                callback(message)
+            except Exception:
+                logger.exception("Fallo el manejo de un mensaje de %s", channel)
+
+    def close(self) -> None:
+        self._closed.set()
+        for thread, sock, path in self._subscriptions:
+            # Un datagrama vacío despierta al hilo bloqueado en recv
+            try:
+                self._get_sender().sendto(b"", str(path))
+            except OSError:
+                pass
+            thread.join(timeout=1)
+            sock.close()
+            path.unlink(missing_ok=True)
+        self._subscriptions.clear()
+
+
+def encode_command(*args) -> bytes:
+    """
+    Serializa un comando en el protocolo RESP (array de bulk strings).
+    """
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(stream):
+    """
+    Lee una respuesta RESP de un archivo binario (`socket.makefile("rb")`).
+    """
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Conexión cerrada por el servidor")
+    kind, payload = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise CacheError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise CacheError(f"Respuesta RESP inválida: {line!r}")
+
+
+class RespConnection:
+    def __init__(self, host: str, port: int, db: int, password: str | None, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def send(self, *args) -> None:
+        self.sock.sendall(encode_command(*args))
+
+    def execute(self, *args):
+        self.send(*args)
+        return read_reply(self.stream)
+
+    def close(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.stream.close()
+        self.sock.close()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend compartido sobre el protocolo de Redis (RESP), sin dependencias:
+    sirve con Redis, Valkey, KeyDB o cualquier servidor compatible.
+
+    Los comandos usan conexiones de un pool chico; cada suscripción tiene su
+    propia conexión y un hilo que reconecta si el servidor se cae.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, timeout: float = 1.0, pool_size: int = 8):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.timeout = timeout
+        self._pool: queue.LifoQueue[RespConnection] = queue.LifoQueue(maxsize=pool_size)
+        self._subscriptions: list[tuple[threading.Thread, dict]] = []
+        self._closed = threading.Event()
+
+    def _connect(self) -> RespConnection:
+        return RespConnection(self.host, self.port, self.db, self.password, self.timeout)
+
+    def execute(self, *args):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = None
+
+        try:
+            if connection is None:
+                connection = self._connect()
+            reply = connection.execute(*args)
+        except OSError as exc:
+            # Una respuesta de error (CacheError) deja la conexión sana; un error de red, no
+            if connection is not None:
+                connection.close()
+                connection = None
+            raise CacheError(f"Sin conexión con {self.host}:{self.port}: {exc}") from exc
+        finally:
+            if connection is not None:
+                try:
+                    self._pool.put_nowait(connection)
+                except queue.Full:
+                    connection.close()
+        return reply
+
+    def publish(self, channel: str, message: bytes) -> None:
+        self.execute("PUBLISH", channel, message)
+
+    def subscribe(self, channel: str, callback) -> None:
+        self._closed.clear()
+        state = {"connection": None}
+        thread = threading.Thread(
+            target=self._listen,
+            args=(channel, callback, state),
+            name=f"cache-subscriber-{channel}",
+            daemon=True,
+        )
+        self._subscriptions.append((thread, state))
+        thread.start()
+
+    def _listen(self, channel: str, callback, state: dict) -> None:
+        delay = 0.1
+        while not self._closed.is_set():
+            try:
+                connection = state["connection"] = self._connect()
+                # Bloquea leyendo mensajes; close() corta el socket para salir
+                connection.sock.settimeout(None)
+                connection.send("SUBSCRIBE", channel)
+                read_reply(connection.stream)
+                delay = 0.1
+                while True:
+                    reply = read_reply(connection.stream)
+                    if isinstance(reply, list) and reply[0] == b"message":
+                        try:
+                            callback(reply[2])
+                        except Exception:
+                            logger.exception("Fallo el manejo de un mensaje de %s", channel)
+            except (CacheError, OSError, ValueError) as exc:
+                if self._closed.is_set():
+                    return
+                logger.warning("Suscripción a %s interrumpida (%s); reintentando", channel, exc)
+            finally:
+                if state["connection"] is not None:
+                    state["connection"].close()
+                    state["connection"] = None
+            self._closed.wait(delay)
+            delay = min(delay * 2, 5.0)
+
+    def close(self) -> None:
+        self._closed.set()
+        for thread, state in self._subscriptions:
+            connection = state["connection"]
+            if connection is not None:
+                try:
+                    connection.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            thread.join(timeout=self.timeout + 1)
+        self._subscriptions.clear()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def create_cache_backend(url: str | None = CACHE_URL) -> CacheBackend:
+    """
+    `redis://[:password@]host[:port][/db]` usa el almacén compartido;
+    sin URL, la memoria del proceso.
+    """
+    if not url:
+        return MemoryCacheBackend()
+    scheme = urlparse(url).scheme
+    if scheme not in ("redis", "valkey"):
+        raise ValueError(f"CACHE_URL no soportada: {url}")
+    return RedisCacheBackend(url)
+
+
+class InvalidationBus:
+    """
+    Reparte las invalidaciones de las cachés en memoria entre workers.
+
+    Cada caché registra un handler por tema (ej. `"catalog:products"`). Al
+    publicar, el handler se ejecuta enseguida en este proceso y el mensaje
+    viaja por el backend a los demás, que ejecutan sus propios handlers.
+
+    `publish` corre en el after_commit de los requests: el envío lo hace un
+    hilo aparte desde una cola de `queue_size` mensajes, para que un almacén
+    lento o caído no frene las escrituras. Si no responde, la invalidación
+    local se aplica igual, los mensajes que no entran en la cola se descartan
+    y los demás workers dependen de los TTL de sus cachés.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        channel: str = CACHE_INVALIDATION_CHANNEL,
+        queue_size: int = CACHE_PUBLISH_QUEUE_SIZE,
+    ):
+        self.backend = backend
+        self.channel = channel
+        self.queue_size = queue_size
+        self.origin = self._new_origin()
+        self._handlers: dict[str, list] = {}
+        self._started = False
+        self._outbox: queue.Queue[tuple[str, bytes]] | None = None
+        self._publisher: threading.Thread | None = None
+        self._closing = threading.Event()
+
+    @staticmethod
+    def _new_origin() -> str:
+        return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def register(self, topic: str, handler) -> None:
+        """
+        `handler(*items)` se llama con los ítems publicados (ej. los tags).
+        """
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def _dispatch(self, topic: str, items) -> None:
+        for handler in self._handlers.get(topic, ()):
+            handler(*items)
+
+    def publish(self, topic: str, *items: str) -> None:
+        self._dispatch(topic, items)
+        if not self._started:
+            return
+        message = json.dumps({"origin": self.origin, "topic": topic, "items": list(items)})
+        try:
+            self._outbox.put_nowait((topic, message.encode()))
+        except queue.Full:
+            logger.warning("Cola de invalidaciones llena: se descarta la de %s", topic)
+
+    def _send_pending(self) -> None:
+        while True:
+            try:
+                topic, message = self._outbox.get(timeout=0.1)
+            except queue.Empty:
+                if self._closing.is_set():
+                    return
+                continue
+            try:
+                self.backend.publish(self.channel, message)
+            except CacheError as exc:
+                logger.warning("No se pudo publicar la invalidación de %s: %s", topic, exc)
+
+    def _receive(self, message: bytes) -> None:
+        payload = json.loads(message)
+        if payload.get("origin") == self.origin:
+            return
+        self._dispatch(payload["topic"], payload.get("items", ()))
+
+    def start(self) -> None:
+        if self._started:
+            return
+        # Los workers de app.serve heredan el bus del master: cada proceso
+        # necesita su propio origen o descartaría los mensajes de sus hermanos
+        self.origin = self._new_origin()
+        self.backend.subscribe(self.channel, self._receive)
+        self._closing.clear()
+        self._outbox = queue.Queue(maxsize=self.queue_size)
+        self._publisher = threading.Thread(
+            target=self._send_pending, name="cache-publisher", daemon=True
+        )
+        self._publisher.start()
+        self._started = True
+
+    def stop(self) -> None:
+        if not self._started:
+            return
+        self._started = False
+        # Lo que quedó en la cola se envía antes de cerrar el backend
+        self._closing.set()
+        self._publisher.join(timeout=5)
+        self._publisher = None
+        self.backend.close()
+
+
+cache_backend = create_cache_backend()
+invalidation_bus = InvalidationBus(cache_backend)
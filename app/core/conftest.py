@@ -0,0 +1,89 @@
+import socket
+import socketserver
+import threading
+import pytest
+from app.core.cache import read_reply
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """
+    Servidor mínimo compatible con el protocolo de Redis para tests: PUBLISH
+    y SUBSCRIBE en memoria.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.subscribers: dict[bytes, list] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"redis://{host}:{port}/0"
+
+    def drop_subscribers(self) -> None:
+        """
+        Corta las conexiones suscriptas, como si el servidor se reiniciara.
+        """
+        with self.lock:
+            handlers = [handler for group in self.subscribers.values() for handler in group]
+            self.subscribers.clear()
+        for handler in handlers:
+            handler.connection.shutdown(socket.SHUT_RDWR)
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def reply(self, value) -> None:
+        if value is None:
+            data = b"$-1\r\n"
+        elif isinstance(value, int):
+            data = b":%d\r\n" % value
+        elif isinstance(value, str):
+            data = f"+{value}\r\n".encode()
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self.reply(item)
+            return
+        else:
+            data = b"$%d\r\n%s\r\n" % (len(value), value)
+        self.wfile.write(data)
+
+    def handle(self) -> None:
+        server = self.server
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            name, args = command[0].upper(), command[1:]
+
+            with server.lock:
+                if name in (b"PING", b"AUTH", b"SELECT"):
+                    self.reply("OK")
+                elif name == b"PUBLISH":
+                    receivers = list(server.subscribers.get(args[0], ()))
+                    for handler in receivers:
+                        try:
+                            handler.reply([b"message", args[0], args[1]])
+                        except OSError:
+                            pass
+                    self.reply(len(receivers))
+                elif name == b"SUBSCRIBE":
+                    server.subscribers.setdefault(args[0], []).append(self)
+                    self.reply([b"subscribe", args[0], 1])
+                else:
+                    self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture(name="resp_server")
+def resp_server():
+    server = RespStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -1,14 +1,477 @@
+import logging
+import threading
+import time
 from typing import Annotated
-from fastapi import Depends
+from fastapi import Depends, Request
+from sqlalchemy import Engine, event, make_url
+from sqlalchemy.orm import raiseload
 from sqlmodel import Session, create_engine
+from app.core.cache import InvalidationBus, invalidation_bus
+from app.core.security import get_bearer_payload
+from app.core.config import (
+    DATABASE_URL,
+    DATABASE_REPLICA_URL,
+    READ_YOUR_WRITES_SECONDS,
+    STRICT_LOADING,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_CHECKPOINT_INTERVAL_SECONDS,
+    SQLITE_CHECKPOINT_MODE,
+)
 
-sqlite_name = "db.sqlite3"
-sqlite_url = f"sqlite:///{sqlite_name}"
+logger = logging.getLogger(__name__)
 
-engine = create_engine(sqlite_url)
 
-def get_session():
-    with Session(engine) as session:
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Aplica el perfil de conexión SQLite a cada conexión nueva del pool.
+
+    - WAL permite que los lectores no se bloqueen detrás de un escritor.
+    - `busy_timeout` hace que un escritor espere al lock en vez de fallar.
+    - `mmap_size` y `cache_size` reducen lecturas al disco en tablas calientes.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    # Valor negativo = tamaño en KiB en lugar de páginas
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.close()
+
+
+def create_sqlite_engine(url: str) -> Engine:
+    """
+    Crea un engine SQLite con el perfil de conexión aplicado en cada conexión.
+    """
+    sqlite_engine = create_engine(url)
+    event.listen(sqlite_engine, "connect", apply_sqlite_pragmas)
+    return sqlite_engine
+
+
+def create_server_engine(url: str) -> Engine:
+    """
+    Crea un engine para una base cliente/servidor (PostgreSQL) con pool configurable.
+
+    - `pool_pre_ping` descarta conexiones cortadas por el servidor o un proxy.
+    - `pool_recycle` renueva conexiones antes de que las cierre un timeout externo.
+    """
+    connect_args = {}
+    if make_url(url).get_backend_name() == "postgresql":
+        # Las columnas datetime se guardan sin zona horaria: la sesión trabaja en UTC
+        connect_args["options"] = "-c timezone=utc"
+
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+def is_sqlite_url(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def create_db_engine(url: str) -> Engine:
+    """
+    Crea el engine adecuado según el backend indicado en la URL.
+    """
+    if is_sqlite_url(url):
+        return create_sqlite_engine(url)
+    return create_server_engine(url)
+
+
+engine = create_db_engine(DATABASE_URL)
+
+replica_engine = create_db_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+
+
+def get_database_settings(db_engine: Engine = engine) -> dict:
+    """
+    Devuelve la configuración efectiva de la base de datos leída desde una conexión real.
+
+    En SQLite se leen los PRAGMA del perfil; en bases cliente/servidor,
+    la versión del servidor y los parámetros del pool.
+    """
+    with db_engine.connect() as connection:
+        if db_engine.dialect.name != "sqlite":
+            return {
+                "server_version": ".".join(map(str, db_engine.dialect.server_version_info)),
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT,
+                "pool_recycle": DB_POOL_RECYCLE,
+                "pool_pre_ping": DB_POOL_PRE_PING,
+            }
+
+        return {
+            pragma: connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+            for pragma in (
+                "journal_mode",
+                "synchronous",
+                "busy_timeout",
+                "mmap_size",
+                "cache_size",
+            )
+        }
+
+
+def report_database_settings(db_engine: Engine = engine) -> dict:
+    """
+    Registra en el log el perfil efectivo de la base de datos al iniciar.
+    """
+    settings = get_database_settings(db_engine)
+    logger.info(
+        "%s %s: %s",
+        db_engine.dialect.name,
+        db_engine.url.render_as_string(hide_password=True),
+        ", ".join(f"{key}={value}" for key, value in settings.items()),
+    )
+    return settings
+
+
+class WalCheckpointer:
+    """
+    Hilo en segundo plano que ejecuta `PRAGMA wal_checkpoint` periódicamente.
+
+    Evita que el archivo WAL crezca sin control en horas pico, cuando siempre
+    hay algún lector abierto y el autocheckpoint de SQLite no llega a completarse.
+    """
+
+    def __init__(
+        self,
+        db_engine: Engine,
+        interval: float = SQLITE_CHECKPOINT_INTERVAL_SECONDS,
+        mode: str = SQLITE_CHECKPOINT_MODE,
+    ):
+        self.engine = db_engine
+        self.interval = interval
+        self.mode = mode
+        self.last_result: tuple | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def checkpoint(self) -> tuple:
+        """
+        Ejecuta un checkpoint y devuelve (busy, páginas en el WAL, páginas copiadas).
+        """
+        with self.engine.connect() as connection:
+            result = connection.exec_driver_sql(
+                f"PRAGMA wal_checkpoint({self.mode})"
+            ).one()
+        self.last_result = tuple(result)
+        return self.last_result
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                busy, log_pages, checkpointed = self.checkpoint()
+                logger.debug(
+                    "WAL checkpoint %s: busy=%s log=%s checkpointed=%s",
+                    self.mode, busy, log_pages, checkpointed,
+                )
+            except Exception:
+                logger.exception("Fallo el checkpoint del WAL")
+
+    def start(self) -> None:
+        if self.engine.dialect.name != "sqlite":
+            return
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="wal-checkpointer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+
+wal_checkpointer = WalCheckpointer(engine)
+
+
+class ReadOnlySessionError(RuntimeError):
+    pass
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_writes_on_read_only_session(session, flush_context, instances):
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError("Sesión de solo lectura: la escritura debe ir al primario")
+
+
+@event.listens_for(Session, "after_flush")
+def _remember_session_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _start_read_your_writes_window(session):
+    router = session.info.get("router")
+    if router is not None and session.info.pop("wrote", False):
+        router.record_write(session.info.get("writer_key"))
+
+
+def on_commit_of(*models):
+    """
+    Decorador: ejecuta la función después de cada commit que haya insertado,
+    modificado o eliminado alguna instancia de `models`, en cualquier sesión.
+
+    Pensado para invalidar cachés en memoria sin depender de que cada
+    endpoint que escribe se acuerde de hacerlo. Un rollback descarta el aviso.
+    """
+    def decorator(callback):
+        key = f"changed:{callback.__module__}.{callback.__qualname__}"
+
+        def track(session, flush_context):
+            changed = (*session.new, *session.dirty, *session.deleted)
+            if any(isinstance(instance, models) for instance in changed):
+                session.info[key] = True
+
+        def notify(session):
+            if session.info.pop(key, False):
+                callback()
+
+        def discard(session):
+            session.info.pop(key, None)
+
+        event.listen(Session, "after_flush", track)
+        event.listen(Session, "after_commit", notify)
+        event.listen(Session, "after_rollback", discard)
+        return callback
+
+    return decorator
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_strict_loading(orm_execute_state):
+    """
+    En sesiones estrictas, toda relación que la consulta no cargue explícitamente
+    queda configurada para lanzar un error si se accede a ella (raiseload).
+
+    Las opciones específicas (`selectinload`, `joinedload`) tienen prioridad sobre
+    el comodín, por lo que solo fallan los accesos que hubieran sido lazy loads.
+    """
+    if (
+        orm_execute_state.session.info.get("strict_loading")
+        and orm_execute_state.is_select
+        and not orm_execute_state.is_column_load
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*"))
+
+
+class SessionRouter:
+    """
+    Decide contra qué engine se abre la sesión de cada request.
+
+    Reglas:
+    - Los GET/HEAD van a la réplica con una sesión de solo lectura.
+    - El resto de los métodos van al primario.
+    - Un usuario que acaba de escribir lee del primario durante `window`
+      segundos, para no ver datos anteriores a su propia escritura
+      mientras la réplica se pone al día (read-your-writes).
+
+    Con `bus`, la escritura se publica y la ventana se abre en todos los
+    workers: el request siguiente del usuario puede caer en cualquiera.
+    """
+
+    READ_METHODS = frozenset({"GET", "HEAD"})
+    TOPIC = "read_your_writes"
+
+    def __init__(
+        self,
+        primary: Engine,
+        replica: Engine | None = None,
+        window: float = READ_YOUR_WRITES_SECONDS,
+        bus: InvalidationBus | None = None,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.window = window
+        self.bus = bus
+        self._recent_writes: dict[str, float] = {}
+        self._lock = threading.Lock()
+        if bus is not None and replica is not None:
+            bus.register(self.TOPIC, self.mark_write)
+
+    def record_write(self, writer_key: str | None) -> None:
+        if not writer_key or self.replica is None:
+            return
+        if self.bus is None:
+            self.mark_write(writer_key)
+        else:
+            # El bus aplica el aviso enseguida en este worker y lo reparte al resto
+            self.bus.publish(self.TOPIC, writer_key)
+
+    def mark_write(self, writer_key: str | None) -> None:
+        if not writer_key or self.replica is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writes[writer_key] = now + self.window
+            # Limpieza de ventanas vencidas para no acumular usuarios
+            expired = [key for key, until in self._recent_writes.items() if until <= now]
+            for key in expired:
+                del self._recent_writes[key]
+
+    def wrote_recently(self, writer_key: str | None) -> bool:
+        if not writer_key:
+            return False
+        with self._lock:
+            until = self._recent_writes.get(writer_key)
+        return until is not None and until > time.monotonic()
+
+    def session_for(self, method: str, writer_key: str | None = None) -> Session:
+        if (
+            self.replica is not None
+            and method in self.READ_METHODS
+            and not self.wrote_recently(writer_key)
+        ):
+            return Session(self.replica, info={"read_only": True})
+
+        return Session(
+            self.primary,
+            info={"router": self, "writer_key": writer_key},
+        )
+
+
+session_router = SessionRouter(engine, replica_engine, bus=invalidation_bus)
+
+
+def get_writer_key(request: Request) -> str | None:
+    """
+    Identifica al usuario que escribe a partir del `sub` del token, si lo hay.
+    """
+    payload = get_bearer_payload(request.headers.get("authorization"))
+    return payload.get("sub") if payload else None
+
+
+def get_route_path(scope: dict) -> str:
+    """
+    Devuelve el path declarado de la ruta (ej. `/shop/{product_id}`), no el path concreto.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class CheckoutStats:
+    """
+    Sesiones pedidas vs conexiones realmente tomadas del pool, por ruta.
+
+    Una ruta con muchas sesiones y pocas conexiones es una ruta que resuelve
+    la mayoría de sus requests sin tocar la base (caché o rechazo temprano).
+    """
+
+    def __init__(self):
+        self._routes: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, route: str, index: int) -> None:
+        with self._lock:
+            counters = self._routes.setdefault(route, [0, 0])
+            counters[index] += 1
+
+    def record_session(self, route: str) -> None:
+        self._record(route, 0)
+
+    def record_checkout(self, route: str) -> None:
+        self._record(route, 1)
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                route: {"sessions": sessions, "checkouts": checkouts}
+                for route, (sessions, checkouts) in self._routes.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+checkout_stats = CheckoutStats()
+
+
+@event.listens_for(Session, "after_begin")
+def _record_connection_checkout(session, transaction, connection):
+    route = session.info.get("route")
+    if route is not None:
+        checkout_stats.record_checkout(route)
+
+
+class LazySession:
+    """
+    Proxy que crea la sesión real recién en el primer uso.
+
+    Las dependencias reciben el proxy como si fuera una `Session`. Si el handler
+    responde antes de tocar la base (caché, validación, auth rechazada), no se
+    decodifica el token para enrutar, no se crea la sesión y no se toma
+    ninguna conexión del pool.
+    """
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._session: Session | None = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def _get_session(self) -> Session:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self._get_session(), name)
+
+    def __contains__(self, instance) -> bool:
+        return instance in self._get_session()
+
+    def __iter__(self):
+        return iter(self._get_session())
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+
+def get_session(request: Request):
+    route = get_route_path(request.scope)
+    checkout_stats.record_session(route)
+
+    def open_session() -> Session:
+        # Sin réplica no hace falta identificar al usuario
+        writer_key = get_writer_key(request) if session_router.replica is not None else None
+        session = session_router.session_for(request.method, writer_key)
+        session.info["route"] = route
+        session.info["strict_loading"] = STRICT_LOADING
+        return session
+
+    session = LazySession(open_session)
+    try:
         yield session
+    finally:
+        session.close()
 
-SessionDep = Annotated[Session, Depends(get_session)]
\ No newline at end of file
+SessionDep = Annotated[Session, Depends(get_session)]
@@ -17,3 +17,8 @@ class MembershipStatusEnum(str, Enum):
     ACTIVE = "active"
     PENDING = "pending"
     INACTIVE = "inactive"
+
+class JobStatusEnum(str, Enum):
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
@@ -0,0 +1,86 @@
+from datetime import time
+from sqlalchemy import DateTime, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Expresiones SQL que cada backend escribe distinto. El default es la forma de
+# PostgreSQL; SQLite guarda las fechas como texto y necesita la suya.
+
+
+class minutes_between(FunctionElement):
+    """
+    Minutos completos entre dos timestamps, truncados como
+    `int((end - start).total_seconds() / 60)`.
+    """
+    type = Integer()
+    inherit_cache = True
+    name = "minutes_between"
+
+
+@compiles(minutes_between)
+def _minutes_between(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "CAST(TRUNC(EXTRACT(EPOCH FROM (%s - %s)) / 60) AS INTEGER)" % (
+        compiler.process(end, **kw), compiler.process(start, **kw),
+    )
+
+
+@compiles(minutes_between, "sqlite")
+def _minutes_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    # julianday es un float en días: se redondea a milisegundos antes de dividir
+    return "(CAST(ROUND((julianday(%s) - julianday(%s)) * 86400000) AS INTEGER) / 60000)" % (
+        compiler.process(end, **kw), compiler.process(start, **kw),
+    )
+
+
+class at_time_of_day(FunctionElement):
+    """
+    El mismo día que el timestamp, a la hora indicada: `at_time_of_day(check_in, time(23))`.
+    """
+    type = DateTime()
+    # La hora va en el SQL y no en los argumentos: no puede compartir caché
+    inherit_cache = False
+    name = "at_time_of_day"
+
+    def __init__(self, timestamp, at: time):
+        self.at = at
+        super().__init__(timestamp)
+
+
+@compiles(at_time_of_day)
+def _at_time_of_day(element, compiler, **kw):
+    (timestamp,) = list(element.clauses)
+    return "(CAST(%s AS DATE) + TIME '%s')" % (
+        compiler.process(timestamp, **kw), element.at.isoformat(),
+    )
+
+
+@compiles(at_time_of_day, "sqlite")
+def _at_time_of_day_sqlite(element, compiler, **kw):
+    (timestamp,) = list(element.clauses)
+    # Mismo formato de texto con el que SQLAlchemy guarda los DateTime en SQLite
+    return "(date(%s) || ' %s')" % (
+        compiler.process(timestamp, **kw), element.at.strftime("%H:%M:%S.%f"),
+    )
+
+
+class truncate_to_int(FunctionElement):
+    """
+    Parte entera de un número, como `int(x)` (PostgreSQL redondea al castear).
+    """
+    type = Integer()
+    inherit_cache = True
+    name = "truncate_to_int"
+
+
+@compiles(truncate_to_int)
+def _truncate_to_int(element, compiler, **kw):
+    (value,) = list(element.clauses)
+    return "CAST(TRUNC(%s) AS INTEGER)" % compiler.process(value, **kw)
+
+
+@compiles(truncate_to_int, "sqlite")
+def _truncate_to_int_sqlite(element, compiler, **kw):
+    (value,) = list(element.clauses)
+    return "CAST(%s AS INTEGER)" % compiler.process(value, **kw)
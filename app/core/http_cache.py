@@ -0,0 +1,63 @@
+import hashlib
+from fastapi import Request, Response, status
+from app.core.config import CATALOG_MAX_AGE_SECONDS
+
+
+# Catálogo visto por el público o por un cliente: igual para todos, se puede
+# reutilizar un rato sin preguntar
+PUBLIC_CATALOG_CACHE = f"public, max-age={int(CATALOG_MAX_AGE_SECONDS)}"
+# Vistas de administrador y datos propios: solo el navegador o la app del
+# usuario la guarda, y siempre revalida con If-None-Match
+PRIVATE_CACHE = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    ETag fuerte a partir de valores con `repr` estable (números, textos, fechas, enums).
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def row_etag(instance, *extra) -> str:
+    """
+    ETag de una fila: huella de todas sus columnas. Cualquier cambio en la
+    fila (incluido el hecho en otro worker) produce otro ETag.
+    """
+    columns = instance.__table__.columns.keys()
+    return make_etag(type(instance).__name__, *(getattr(instance, c) for c in columns), *extra)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: W/"x" coincide con "x"
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag in candidates
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str = PRIVATE_CACHE,
+) -> Response | None:
+    """
+    Agrega `ETag`, `Cache-Control` y `Vary` a la respuesta. Si el cliente ya
+    tiene esa versión devuelve un 304 listo para retornar desde el endpoint,
+    sin pasar por la serialización del `response_model`.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        # El contenido depende del rol del token
+        "Vary": "Authorization",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
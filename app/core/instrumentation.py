@@ -0,0 +1,442 @@
+import inspect
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from datetime import date
+from decimal import Decimal
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, event
+from app.core.config import (
+    DEBUG,
+    N_PLUS_ONE_THRESHOLD,
+    SERVER_TIMING_ENABLED,
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_LOG_FILE,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+from app.core.database import get_route_path
+from app.core.profiling import profile_block
+from app.core.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("app.requests")
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+# Orden en que se reportan las fases en `Server-Timing` y en el log
+PHASES = ("auth", "db", "handler", "serialization")
+
+
+@dataclass
+class RequestStats:
+    """
+    Actividad SQL y tiempos por fase acumulados durante un request.
+
+    `phases` guarda segundos por fase (`auth`, `handler`, `serialization`);
+    el tiempo de base de datos se lleva aparte en `db_time`.
+    """
+    method: str
+    path: str
+    route: str = "unmatched"
+    status_code: int = 500
+    statements: int = 0
+    db_time: float = 0.0
+    total_time: float = 0.0
+    statement_counts: Counter = field(default_factory=Counter)
+    phases: dict[str, float] = field(default_factory=dict)
+    handler_finished: float | None = None
+    # Modo de profiling pedido por un admin y el ID del perfil guardado
+    profile: str | None = None
+    profile_id: str | None = None
+
+    def add_phase(self, name: str, elapsed: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def phase_durations(self) -> dict[str, float]:
+        """
+        Duración de cada fase en segundos, con la base de datos incluida.
+        """
+        durations = dict(self.phases, db=self.db_time)
+        return {name: durations.get(name, 0.0) for name in PHASES}
+
+    def server_timing(self) -> str:
+        """
+        Valor del header `Server-Timing` (duraciones en milisegundos).
+        """
+        entries = []
+        for name, elapsed in self.phase_durations().items():
+            entry = f"{name};dur={elapsed * 1000:.2f}"
+            if name == "db":
+                entry += f';desc="{self.statements} queries"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.total_time * 1000:.2f}")
+        return ", ".join(entries)
+
+    def repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """
+        Sentencias ejecutadas al menos `threshold` veces: el patrón típico de un N+1.
+        """
+        return [
+            (statement, count)
+            for statement, count in self.statement_counts.most_common()
+            if count >= threshold
+        ]
+
+
+current_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "current_request_stats", default=None
+)
+
+_stats_listeners: list = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_start", []).append(time.perf_counter())
+    if context is not None:
+        context.statement_timer_pending = True
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_statement_timer(exception_context):
+    # Una sentencia que falla no llega a after_cursor_execute: sin esto su
+    # inicio quedaría en la pila y falsearía la duración de las siguientes
+    context = exception_context.execution_context
+    if context is not None and getattr(context, "statement_timer_pending", False):
+        context.statement_timer_pending = False
+        exception_context.connection.info["statement_start"].pop()
+
+
+def redact_parameters(parameters):
+    """
+    Reemplaza los valores que pueden contener datos personales (emails,
+    nombres, hashes) por su tipo y largo. Números, fechas y NULL se conservan
+    porque suelen ser IDs o rangos útiles para reproducir la consulta.
+    """
+    def redact(value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, (Decimal, date)):
+            return str(value)
+        if isinstance(value, (str, bytes)):
+            return f"<{type(value).__name__}:{len(value)}>"
+        return f"<{type(value).__name__}>"
+
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) for value in parameters]
+    return parameters
+
+
+def explain_statement(conn, statement: str, parameters) -> list[str] | None:
+    """
+    Plan de ejecución de un SELECT, obtenido con un cursor DBAPI aparte para
+    no disparar los eventos de SQLAlchemy. Devuelve None si no aplica o falla.
+
+    Corre sobre la conexión del request: fuera de SQLite va dentro de un
+    savepoint, porque en PostgreSQL un error abortaría su transacción.
+    """
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+
+    if conn.dialect.name == "sqlite":
+        explain = f"EXPLAIN QUERY PLAN {statement}"
+    else:
+        explain = f"EXPLAIN {statement}"
+
+    savepoint = conn.dialect.name != "sqlite"
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(explain, parameters or ())
+            rows = cursor.fetchall()
+        except Exception:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        finally:
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    except Exception:
+        logger.debug("No se pudo obtener el plan de la consulta lenta", exc_info=True)
+        return None
+    finally:
+        cursor.close()
+
+    # SQLite devuelve (id, parent, notused, detail); Postgres una fila por línea
+    return [str(row[-1]) for row in rows]
+
+
+def _log_slow_statement(conn, statement, parameters, executemany, elapsed, stats) -> None:
+    record = {
+        "duration_ms": round(elapsed * 1000, 2),
+        "method": stats.method if stats else None,
+        "route": stats.route if stats else None,
+        "sql": " ".join(statement.split()),
+        "params": redact_parameters(parameters) if not executemany else "<executemany>",
+    }
+    if SLOW_QUERY_EXPLAIN and not executemany:
+        record["plan"] = explain_statement(conn, statement, parameters)
+    slow_query_logger.warning(json.dumps(record, default=str))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["statement_start"].pop()
+    if context is not None:
+        context.statement_timer_pending = False
+
+    stats = current_request_stats.get()
+    if SLOW_QUERY_THRESHOLD_MS > 0 and elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        _log_slow_statement(conn, statement, parameters, executemany, elapsed, stats)
+
+    if stats is None:
+        return
+
+    stats.statements += 1
+    stats.db_time += elapsed
+    stats.statement_counts[statement] += 1
+
+
+def timed_phase(name: str):
+    """
+    Decorador que suma la duración de la función a la fase `name` del request.
+
+    Respeta si la función es async o síncrona, de modo que FastAPI la siga
+    ejecutando igual (en el event loop o en el threadpool).
+    """
+    def decorator(func):
+        def record(start: float) -> None:
+            stats = current_request_stats.get()
+            if stats is not None:
+                stats.add_phase(name, time.perf_counter() - start)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(start)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    record(start)
+        return wrapper
+    return decorator
+
+
+def _instrument_endpoint(func):
+    """
+    Mide el endpoint como fase `handler`, marca cuándo terminó (para medir la
+    serialización) y lo perfila si el request lo pidió.
+    """
+    timed = timed_phase("handler")(func)
+
+    def finish(stats) -> None:
+        if stats is not None:
+            stats.handler_finished = time.perf_counter()
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            stats = current_request_stats.get()
+            try:
+                with profile_block(stats):
+                    return await timed(*args, **kwargs)
+            finally:
+                finish(stats)
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = current_request_stats.get()
+            try:
+                with profile_block(stats):
+                    return timed(*args, **kwargs)
+            finally:
+                finish(stats)
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Ruta que mide el handler y la serialización de la respuesta.
+
+    - `handler`: ejecución del endpoint, incluidas sus consultas.
+    - `serialization`: desde que el endpoint retorna hasta que la respuesta
+      está armada (validación con `response_model` y encoding a JSON).
+
+    Los endpoints marcados con `@cache_response` se sirven desde `response_cache`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # El dependant ya se analizó con la firma original; solo se envuelve la llamada
+        self.dependant.call = _instrument_endpoint(self.dependant.call)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        policy = getattr(self.endpoint, "response_cache_policy", None)
+        if policy is not None:
+            handler = response_cache.wrap(handler, policy)
+
+        async def timed_handler(request):
+            stats = current_request_stats.get()
+            if stats is not None:
+                # Disponible desde ya para el log de consultas lentas
+                stats.route = self.path
+            response = await handler(request)
+            if stats is not None and stats.handler_finished is not None:
+                stats.add_phase("serialization", time.perf_counter() - stats.handler_finished)
+            return response
+
+        return timed_handler
+
+
+class SlowQueryLog:
+    """
+    Escribe el log de consultas lentas a través de una cola.
+
+    Mientras está iniciado, el hilo del request solo encola el registro; un
+    `QueueListener` lo formatea y lo escribe en stderr o en `SLOW_QUERY_LOG_FILE`.
+    Sin iniciar (tests, scripts) el logger se comporta como cualquier otro.
+    """
+
+    def __init__(self, logger: logging.Logger, filename: str | None = SLOW_QUERY_LOG_FILE):
+        self.logger = logger
+        self.filename = filename
+        self._queue_handler: logging.handlers.QueueHandler | None = None
+        self._listener: logging.handlers.QueueListener | None = None
+
+    def start(self) -> None:
+        if self._listener is not None:
+            return
+        if self.filename:
+            target = logging.FileHandler(self.filename)
+        else:
+            target = logging.StreamHandler()
+        target.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._queue_handler = logging.handlers.QueueHandler(log_queue)
+        self._listener = logging.handlers.QueueListener(log_queue, target)
+        self._listener.start()
+        self.logger.addHandler(self._queue_handler)
+        self.logger.propagate = False
+
+    def stop(self) -> None:
+        if self._listener is None:
+            return
+        self.logger.removeHandler(self._queue_handler)
+        self.logger.propagate = True
+        # Vacía la cola antes de cerrar el destino
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+        self._queue_handler = None
+
+
+slow_query_log = SlowQueryLog(slow_query_logger)
+
+
+@contextmanager
+def capture_request_stats():
+    """
+    Recolecta las estadísticas de cada request que termine dentro del bloque.
+
+    Uso principal: tests que fijan un máximo de sentencias por endpoint.
+    """
+    captured: list[RequestStats] = []
+    _stats_listeners.append(captured.append)
+    try:
+        yield captured
+    finally:
+        _stats_listeners.remove(captured.append)
+
+
+class RequestStatsMiddleware:
+    """
+    Acumula sentencias SQL y tiempos por fase de cada request.
+
+    - Agrega el header `Server-Timing` con auth, db, handler, serialization y total.
+    - Si el request fue perfilado, agrega `X-Profile-Id` con el perfil guardado.
+    - En modo DEBUG agrega los headers `X-DB-Statements` y `X-DB-Time-Ms`.
+    - Al terminar, escribe una línea JSON en el logger `app.requests` y
+      reporta las sentencias repetidas (posible N+1).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = RequestStats(method=scope["method"], path=scope["path"])
+        token = current_request_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                stats.status_code = message["status"]
+                stats.total_time = time.perf_counter() - start
+                headers = list(message.get("headers", []))
+                if SERVER_TIMING_ENABLED:
+                    headers.append((b"server-timing", stats.server_timing().encode()))
+                if stats.profile_id is not None:
+                    headers.append((b"x-profile-id", stats.profile_id.encode()))
+                if DEBUG:
+                    headers.append((b"x-db-statements", str(stats.statements).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.db_time * 1000:.2f}".encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_request_stats.reset(token)
+            stats.route = get_route_path(scope)
+            stats.total_time = time.perf_counter() - start
+            self._report(stats)
+
+    def _log_request(self, stats: RequestStats) -> None:
+        if not request_logger.isEnabledFor(logging.INFO):
+            return
+        record = {
+            "method": stats.method,
+            "route": stats.route,
+            "status": stats.status_code,
+            "statements": stats.statements,
+            "total_ms": round(stats.total_time * 1000, 2),
+        }
+        for name, elapsed in stats.phase_durations().items():
+            record[f"{name}_ms"] = round(elapsed * 1000, 2)
+        request_logger.info(json.dumps(record))
+
+    def _report(self, stats: RequestStats) -> None:
+        self._log_request(stats)
+
+        for statement, count in stats.repeated_statements():
+            logger.warning(
+                "Posible N+1 en %s %s: %d ejecuciones de %s",
+                stats.method, stats.route, count, " ".join(statement.split())[:200],
+            )
+
+        for listener in list(_stats_listeners):
+            listener(stats)
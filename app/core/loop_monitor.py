@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from anyio import to_thread
+from app.core.config import (
+    LOOP_BLOCK_THRESHOLD_MS,
+    LOOP_MONITOR_INTERVAL_MS,
+    THREADPOOL_SIZE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+)
+from app.core.database import get_route_path, engine
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds",
+    "Retraso del event loop respecto del latido esperado",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+event_loop_blocks_total = registry.counter(
+    "event_loop_blocks_total",
+    "Veces que el event loop quedó bloqueado más que el umbral, por ruta",
+    ("route",),
+)
+threadpool_queue_peak = registry.gauge(
+    "threadpool_queue_peak",
+    "Máximo de tareas esperando un hilo del threadpool desde el inicio del worker",
+)
+
+
+def configure_threadpool(size: int = THREADPOOL_SIZE) -> None:
+    """
+    Fija la capacidad del threadpool de AnyIO donde corren los handlers síncronos.
+
+    Debe llamarse dentro del event loop (en el lifespan).
+    """
+    to_thread.current_default_thread_limiter().total_tokens = size
+
+    connections = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    if engine.dialect.name != "sqlite" and size > connections:
+        # Los hilos de más quedarían esperando una conexión en lugar de un hilo
+        logger.warning(
+            "THREADPOOL_SIZE=%d supera las %d conexiones del pool (DB_POOL_SIZE + DB_MAX_OVERFLOW)",
+            size, connections,
+        )
+
+
+def find_request_scope(frame) -> dict | None:
+    """
+    Busca, desde la hoja hacia la raíz, el `scope` ASGI del request cuyo código
+    está ejecutándose en el stack (los middlewares lo tienen como variable local).
+    """
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            return scope
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    """
+    Vigila el event loop y el threadpool.
+
+    - Un latido async duerme `interval` y mide cuánto tarde despierta: ese
+      retraso es el tiempo que el loop estuvo ocupado con otra cosa.
+    - Un hilo vigía detecta cuando el latido deja de llegar por más de
+      `block_threshold` y, mientras el loop sigue bloqueado, registra el stack
+      del loop y la ruta que lo está bloqueando.
+    - En cada latido se lee la cola del threadpool: se avisa cuando empieza y
+      termina un período con tareas esperando un hilo.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL_MS / 1000,
+        block_threshold: float = LOOP_BLOCK_THRESHOLD_MS / 1000,
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.last_beat = time.monotonic()
+        self.queue_peak = 0
+        self._saturation_peak = 0
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_beat = time.monotonic()
+            event_loop_lag_seconds.observe(max(self.last_beat - expected, 0.0))
+            self.check_threadpool()
+
+    def check_threadpool(self) -> None:
+        statistics = to_thread.current_default_thread_limiter().statistics()
+        waiting = statistics.tasks_waiting
+        self.queue_peak = max(self.queue_peak, waiting)
+        threadpool_queue_peak.set(self.queue_peak)
+
+        if waiting and not self._saturation_peak:
+            logger.warning(
+                "Threadpool saturado: %d tareas esperando un hilo (capacidad %d)",
+                waiting, statistics.total_tokens,
+            )
+        if waiting:
+            self._saturation_peak = max(self._saturation_peak, waiting)
+        elif self._saturation_peak:
+            logger.info("Threadpool recuperado (pico de %d tareas en espera)", self._saturation_peak)
+            self._saturation_peak = 0
+
+    def report_block(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        scope = find_request_scope(frame)
+        route = f"{scope['method']} {get_route_path(scope)}" if scope else "sin request"
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+
+        event_loop_blocks_total.inc(get_route_path(scope) if scope else "none")
+        logger.warning(
+            "Event loop bloqueado hace %.0f ms en %s\n%s",
+            blocked_for * 1000, route, stack,
+        )
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stop.wait(self.interval):
+            blocked_for = time.monotonic() - self.last_beat - self.interval
+            # Un reporte por bloqueo: el siguiente latido habilita el próximo
+            if blocked_for > self.block_threshold and reported_beat != self.last_beat:
+                reported_beat = self.last_beat
+                try:
+                    self.report_block(blocked_for)
+                except Exception:
+                    logger.exception("Fallo el reporte de bloqueo del event loop")
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+
+loop_monitor = LoopMonitor()
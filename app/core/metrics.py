@@ -0,0 +1,319 @@
+import threading
+import time
+from bisect import bisect_left
+from anyio import to_thread
+from sqlalchemy import event
+from app.core.database import get_route_path, checkout_stats, engine, replica_engine
+from app.core.shared_counters import shared_counters
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape_label(value)}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """
+    Métrica con etiquetas, guardada en memoria del worker.
+
+    Implementa solo lo necesario para el formato de texto de Prometheus,
+    sin dependencias externas.
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        # `collect` calcula los valores al momento del scrape en lugar de acumularlos
+        self._collect = collect
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> list[tuple[str, tuple[str, ...], tuple, float]]:
+        if self._collect is not None:
+            values = self._collect()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [
+            (self.name, self.labels, labels, value)
+            for labels, value in values.items()
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, *labels) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # [conteos por bucket..., +Inf, suma]
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        bucket_labels = self.labels + ("le",)
+        samples = []
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                samples.append((f"{self.name}_bucket", bucket_labels, labels + (le,), cumulative))
+            samples.append((f"{self.name}_sum", self.labels, labels, series[-1]))
+            samples.append((f"{self.name}_count", self.labels, labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=(), collect=None) -> Counter:
+        return self.register(Counter(name, documentation, labels, collect))
+
+    def gauge(self, name, documentation, labels=(), collect=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, collect))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        """
+        Serializa todas las métricas en el formato de texto de Prometheus (0.0.4).
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, label_names, label_values, value in metric.samples():
+                lines.append(f"{name}{_format_labels(label_names, label_values)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+_active_requests: dict[int, dict] = {}
+
+
+def _collect_in_flight() -> dict[tuple, int]:
+    in_flight: dict[tuple, int] = {}
+    for scope in list(_active_requests.values()):
+        labels = (scope["method"], get_route_path(scope))
+        in_flight[labels] = in_flight.get(labels, 0) + 1
+    return in_flight
+
+
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "Requests HTTP atendidos, por ruta y código de estado",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Latencia de los requests HTTP en segundos",
+    ("method", "route"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "Requests HTTP en curso",
+    ("method", "route"),
+    collect=_collect_in_flight,
+)
+
+
+_engines = {"primary": engine}
+if replica_engine is not None:
+    _engines["replica"] = replica_engine
+
+
+def _collect_pool(attribute: str):
+    def collect() -> dict[tuple, int]:
+        values = {}
+        for name, db_engine in _engines.items():
+            # StaticPool/NullPool no exponen estos contadores
+            reader = getattr(db_engine.pool, attribute, None)
+            if reader is not None:
+                values[(name,)] = reader()
+        return values
+    return collect
+
+
+def _collect_threadpool() -> dict[tuple, float]:
+    """
+    Estado del threadpool de AnyIO donde corren los handlers síncronos.
+
+    Solo puede leerse desde el event loop (el endpoint /metrics es async).
+    """
+    try:
+        statistics = to_thread.current_default_thread_limiter().statistics()
+    except RuntimeError:
+        return {}
+    return {
+        ("capacity",): statistics.total_tokens,
+        ("busy",): statistics.borrowed_tokens,
+        ("waiting",): statistics.tasks_waiting,
+    }
+
+
+def _collect_route_checkouts(counter: str):
+    def collect() -> dict[tuple, int]:
+        return {
+            (route,): counters[counter]
+            for route, counters in checkout_stats.snapshot().items()
+        }
+    return collect
+
+
+def _collect_response_cache() -> dict[tuple, int]:
+    # Totales del nodo: con `app.serve` todos los workers informan el mismo valor
+    return {
+        (result,): shared_counters.get(f"response_cache.{result}")
+        for result in ("hit", "miss")
+    }
+
+
+db_pool_checkouts_total = registry.counter(
+    "db_pool_checkouts_total",
+    "Conexiones tomadas del pool",
+    ("database",),
+)
+registry.gauge(
+    "db_pool_checked_out",
+    "Conexiones del pool en uso",
+    ("database",),
+    collect=_collect_pool("checkedout"),
+)
+registry.gauge(
+    "db_pool_size",
+    "Tamaño configurado del pool",
+    ("database",),
+    collect=_collect_pool("size"),
+)
+registry.gauge(
+    "db_pool_overflow",
+    "Conexiones abiertas por encima del tamaño del pool",
+    ("database",),
+    collect=_collect_pool("overflow"),
+)
+registry.counter(
+    "db_route_sessions_total",
+    "Sesiones de base de datos entregadas a requests, por ruta",
+    ("route",),
+    collect=_collect_route_checkouts("sessions"),
+)
+registry.counter(
+    "db_route_checkouts_total",
+    "Sesiones de request que llegaron a tomar una conexión, por ruta",
+    ("route",),
+    collect=_collect_route_checkouts("checkouts"),
+)
+registry.gauge(
+    "threadpool_workers",
+    "Capacidad, hilos ocupados y tareas en espera del threadpool",
+    ("state",),
+    collect=_collect_threadpool,
+)
+registry.counter(
+    "response_cache_requests_total",
+    "Respuestas de la caché de respuestas del nodo, por resultado",
+    ("result",),
+    collect=_collect_response_cache,
+)
+
+
+for _name, _engine in _engines.items():
+    event.listen(
+        _engine,
+        "checkout",
+        lambda *args, _name=_name: db_pool_checkouts_total.inc(_name),
+    )
+
+
+class MetricsMiddleware:
+    """
+    Registra conteos, latencia, códigos de estado y requests en curso por ruta.
+
+    La ruta se etiqueta con su path declarado (ej. `/shop/{product_id}`) para
+    que la cardinalidad no crezca con los IDs.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        key = id(scope)
+        _active_requests[key] = scope
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _active_requests.pop(key, None)
+            route = get_route_path(scope)
+            method = scope["method"]
+            http_requests_total.inc(method, route, status_code)
+            http_request_duration_seconds.observe(time.perf_counter() - start, method, route)
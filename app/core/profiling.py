@@ -0,0 +1,371 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+from collections import Counter
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from app.core.config import (
+    PROFILES_DIR,
+    PROFILES_MAX_FILES,
+    PROFILE_SAMPLING_INTERVAL_MS,
+    SAMPLER_DIR,
+    SAMPLER_ENABLED,
+    SAMPLER_FLUSH_SECONDS,
+    SAMPLER_INTERVAL_MS,
+    SAMPLER_RETENTION_HOURS,
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_EXTENSIONS = {
+    "cprofile": ".txt",
+    "sampling": ".speedscope.json",
+}
+
+_PROFILE_ID = re.compile(r"^[\w.-]+$")
+
+
+def parse_profile_mode(value: str | None) -> str | None:
+    """
+    Interpreta el header `X-Profile` o el parámetro `?profile=`.
+
+    `sampling` pide el muestreador; cualquier otro valor verdadero, cProfile.
+    """
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ("", "0", "false", "no", "off"):
+        return None
+    return "sampling" if value == "sampling" else "cprofile"
+
+
+class StackSampler:
+    """
+    Muestrea el stack de un hilo cada `interval` segundos usando
+    `sys._current_frames()`, sin instrumentar cada llamada como cProfile.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: list[tuple[tuple, float]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _capture(self) -> tuple | None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return None
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        # De la raíz a la hoja, como espera speedscope
+        return tuple(reversed(stack))
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            stack = self._capture()
+            now = time.perf_counter()
+            if stack:
+                self.samples.append((stack, now - last))
+            last = now
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def cprofile_report(profiler: cProfile.Profile, title: str, limit: int = 40) -> str:
+    """
+    Reporte de texto: funciones con más tiempo acumulado y, para ellas,
+    a quién llaman (árbol de llamadas de un nivel).
+    """
+    output = io.StringIO()
+    output.write(f"{title}\n\n")
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(limit)
+    stats.print_callees(limit)
+    return output.getvalue()
+
+
+def speedscope_profile(samples: list[tuple[tuple, float]], title: str) -> dict:
+    """
+    Convierte stacks muestreados al formato "sampled" de speedscope.
+    """
+    frames: list[dict] = []
+    frame_index: dict[tuple, int] = {}
+    stacks = []
+    weights = []
+
+    for stack, weight in samples:
+        indexes = []
+        for frame in stack:
+            if frame not in frame_index:
+                name, filename, line = frame
+                frame_index[frame] = len(frames)
+                frames.append({"name": name, "file": filename, "line": line})
+            indexes.append(frame_index[frame])
+        stacks.append(indexes)
+        weights.append(weight)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": title,
+        "exporter": "gym-management-api",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": title,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": stacks,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+class ProfileStore:
+    """
+    Guarda los perfiles en un directorio y conserva solo los `max_files` más recientes.
+    """
+
+    def __init__(self, directory: str = PROFILES_DIR, max_files: int = PROFILES_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, method: str, route: str, mode: str, content: str) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^\w]+", "-", route).strip("-") or "root"
+        profile_id = f"{timestamp}-{method.lower()}-{slug}-{mode}{PROFILE_EXTENSIONS[mode]}"
+        (self.directory / profile_id).write_text(content)
+        self._prune()
+        return profile_id
+
+    def _prune(self) -> None:
+        profiles = self.list()
+        for path in profiles[self.max_files:] if self.max_files > 0 else []:
+            path.unlink(missing_ok=True)
+
+    def list(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        # Los subdirectorios (ej. el del muestreador continuo) no son perfiles
+        profiles = [path for path in self.directory.iterdir() if path.is_file()]
+        return sorted(profiles, key=lambda path: path.name, reverse=True)
+
+    def path(self, profile_id: str) -> Path | None:
+        """
+        Ruta del perfil, o None si el ID no es válido o no existe.
+        """
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / profile_id
+        return path if path.is_file() else None
+
+
+profile_store = ProfileStore()
+
+# cProfile no admite dos perfiles activos a la vez en Python 3.12+ (sys.monitoring)
+_cprofile_lock = threading.Lock()
+
+
+@contextmanager
+def profile_block(stats):
+    """
+    Perfila el bloque si el request lo pidió (`stats.profile`) y guarda el
+    resultado, dejando su ID en `stats.profile_id`.
+    """
+    if stats is None or stats.profile is None:
+        yield
+        return
+
+    title = f"{stats.method} {stats.route}"
+    if stats.profile == "sampling":
+        sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLING_INTERVAL_MS / 1000)
+        sampler.start()
+    elif _cprofile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        logger.warning("Profiling omitido en %s: ya hay otro perfil cProfile en curso", title)
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        # También se guarda el perfil de los requests que terminan en error
+        if stats.profile == "sampling":
+            sampler.stop()
+            content = json.dumps(speedscope_profile(sampler.samples, title))
+        else:
+            profiler.disable()
+            _cprofile_lock.release()
+            content = cprofile_report(profiler, title)
+        stats.profile_id = profile_store.save(stats.method, stats.route, stats.profile, content)
+
+
+# Hojas de stack de un hilo esperando (worker del threadpool ocioso, event
+# loop en select): no consumen CPU y taparían el resto del flame graph
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ContinuousSampler:
+    """
+    Hilo que muestrea los stacks de todos los hilos del proceso y los agrega
+    en formato de stacks colapsados (`hilo;raíz;...;hoja cantidad`).
+
+    Cada `flush_interval` escribe las muestras acumuladas desde el último
+    volcado en un archivo `<epoch>-<pid>.collapsed`, de modo que todos los
+    workers comparten el directorio y el endpoint de monitoreo puede sumar
+    cualquier ventana de tiempo.
+    """
+
+    def __init__(
+        self,
+        directory: str = SAMPLER_DIR,
+        interval: float = SAMPLER_INTERVAL_MS / 1000,
+        flush_interval: float = SAMPLER_FLUSH_SECONDS,
+        retention: float = SAMPLER_RETENTION_HOURS * 3600,
+        enabled: bool = SAMPLER_ENABLED,
+    ):
+        self.enabled = enabled
+        self.directory = Path(directory)
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            leaf = frame.f_code
+            if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            # Los hilos del threadpool se llaman igual: se agregan juntos
+            stack.append(names.get(thread_id, "thread"))
+            stacks.append(";".join(reversed(stack)))
+
+        with self._lock:
+            self.counts.update(stacks)
+
+    def flush(self) -> Path | None:
+        """
+        Escribe las muestras pendientes y borra los archivos fuera de la retención.
+        """
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+
+        self._prune()
+        if not counts:
+            return None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{int(time.time())}-{os.getpid()}.collapsed"
+        # Escritura atómica: el endpoint nunca lee un archivo a medias
+        partial = path.with_suffix(".tmp")
+        partial.write_text("".join(f"{stack} {count}\n" for stack, count in counts.items()))
+        partial.replace(path)
+        return path
+
+    def _prune(self) -> None:
+        if not self.directory.is_dir():
+            return
+        cutoff = time.time() - self.retention
+        for path in self.directory.glob("*.collapsed"):
+            if _collapsed_timestamp(path) < cutoff:
+                path.unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+                if time.monotonic() >= next_flush:
+                    self.flush()
+                    next_flush = time.monotonic() + self.flush_interval
+            except Exception:
+                logger.exception("Fallo el muestreador continuo")
+
+    def start(self) -> None:
+        if not self.enabled or self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="continuous-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+
+def _collapsed_timestamp(path: Path) -> float:
+    try:
+        return float(path.name.split("-", 1)[0])
+    except ValueError:
+        return 0.0
+
+
+def merge_collapsed_stacks(directory: str | Path = SAMPLER_DIR, since: float | None = None) -> str:
+    """
+    Suma los archivos de stacks colapsados de todos los workers, opcionalmente
+    solo los escritos desde `since` (epoch). El resultado se abre con
+    speedscope o con `flamegraph.pl`.
+    """
+    directory = Path(directory)
+    counts: Counter = Counter()
+    if directory.is_dir():
+        for path in directory.glob("*.collapsed"):
+            if since is not None and _collapsed_timestamp(path) < since:
+                continue
+            for line in path.read_text().splitlines():
+                stack, _, count = line.rpartition(" ")
+                if stack and count.isdigit():
+                    counts[stack] += int(count)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+continuous_sampler = ContinuousSampler()
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import string
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import Request, Response, status
+from sqlalchemy import event
+from sqlmodel import Session
+from app.core.cache import invalidation_bus
+from app.core.config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS,
+)
+from app.core.enums import RoleEnum
+from app.core.http_cache import etag_matches
+from app.core.profiling import parse_profile_mode
+from app.core.security import get_bearer_payload
+from app.core.shared_counters import shared_counters
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Cómo cachear las respuestas de un endpoint.
+
+    - `scope="role"`: la respuesta depende solo del rol (anónimo, cliente);
+      los administradores se cachean por usuario.
+    - `scope="user"`: la respuesta es propia de cada usuario autenticado.
+    - `tags`: plantillas formateadas con los path params y los campos de
+      primer nivel del JSON de la respuesta (ej. `"customer:{id}"`).
+    """
+    ttl: float = RESPONSE_CACHE_TTL_SECONDS
+    scope: str = "role"
+    tags: tuple[str, ...] = ()
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+    tags: frozenset[str]
+
+    def header(self, name: bytes) -> str | None:
+        for key, value in self.headers:
+            if key == name:
+                return value.decode()
+        return None
+
+
+def cache_response(
+    ttl: float = RESPONSE_CACHE_TTL_SECONDS,
+    scope: str = "role",
+    tags: tuple[str, ...] = (),
+):
+    """
+    Marca un endpoint GET para que `TimedRoute` cachee sus respuestas.
+
+    Va debajo del decorador de la ruta:
+
+        @router.get("/{product_id}")
+        @cache_response(tags=("catalog:products", "product:{product_id}"))
+        def read_product(...): ...
+    """
+    policy = CachePolicy(ttl=ttl, scope=scope, tags=tags)
+
+    def decorator(endpoint):
+        endpoint.response_cache_policy = policy
+        return endpoint
+
+    return decorator
+
+
+def scope_key(request: Request, policy: CachePolicy) -> tuple[str | None, str | None]:
+    """
+    Devuelve (clave de alcance, tag del usuario). Clave None: no se cachea.
+    """
+    authorization = request.headers.get("authorization")
+    payload = get_bearer_payload(authorization)
+    if authorization and payload is None:
+        # Token inválido o vencido: lo resuelve la autenticación del handler
+        # (401), no una respuesta pública cacheada
+        return None, None
+    subject = payload.get("sub") if payload else None
+
+    if policy.scope == "user":
+        if subject is None:
+            return None, None
+        return f"user:{subject}", f"user:{subject}"
+
+    if payload is None:
+        return "anonymous", None
+    if payload.get("role") == RoleEnum.ADMIN:
+        # Vistas de administrador: por usuario, para que desactivar a un admin
+        # invalide lo que tenga cacheado
+        return f"user:{subject}", f"user:{subject}"
+    return f"role:{payload.get('role')}", None
+
+
+def resolve_tags(templates: tuple[str, ...], path_params: dict, body: bytes) -> set[str]:
+    fields = dict(path_params)
+    needs_body = any(
+        name and name not in fields
+        for template in templates
+        for _, name, _, _ in string.Formatter().parse(template)
+    )
+    if needs_body:
+        payload = json.loads(body)
+        if isinstance(payload, dict):
+            fields.update(payload)
+
+    tags = set()
+    for template in templates:
+        try:
+            tags.add(template.format(**fields))
+        except KeyError:
+            continue
+    return tags
+
+
+class ResponseCache:
+    """
+    Caché de respuestas serializadas con TTL, desalojo LRU e invalidación por tags.
+
+    Varios requests concurrentes que fallan la misma clave esperan al primero
+    (single-flight) en lugar de calcular la respuesta cada uno.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._tags: dict[str, set[tuple]] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        # Las invalidaciones llegan desde los hilos del threadpool
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: tuple, entry: CachedResponse) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, *tags: str) -> int:
+        """
+        Elimina las entradas con alguno de los tags. Devuelve cuántas eliminó.
+        """
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    async def get_or_compute(self, key: tuple, compute):
+        """
+        Devuelve (entrada, hit). `compute` es una corrutina que devuelve
+        `CachedResponse | None`; None significa que la respuesta no se cachea.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            entry = await asyncio.shield(inflight)
+            if entry is not None:
+                return entry, True
+            return await compute(), False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await compute()
+        except BaseException:
+            future.set_result(None)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if not future.done():
+            future.set_result(entry)
+        if entry is not None:
+            self.set(key, entry)
+        return entry, False
+
+    def wrap(self, handler, policy: CachePolicy):
+        """
+        Envuelve el handler de una ruta GET con la caché.
+        """
+        async def cached_handler(request: Request) -> Response:
+            if not self.enabled or request.method != "GET":
+                return await handler(request)
+            # Un request perfilado tiene que ejecutar el handler
+            if parse_profile_mode(request.headers.get("x-profile", request.query_params.get("profile"))):
+                return await handler(request)
+
+            scope, user_tag = scope_key(request, policy)
+            if scope is None:
+                return await handler(request)
+            key = (request.url.path, tuple(sorted(request.query_params.multi_items())), scope)
+
+            response = None
+
+            async def compute() -> CachedResponse | None:
+                nonlocal response
+                response = await handler(request)
+                if response.status_code != status.HTTP_200_OK or not hasattr(response, "body"):
+                    return None
+                tags = resolve_tags(policy.tags, request.path_params, response.body)
+                if user_tag:
+                    tags.add(user_tag)
+                return CachedResponse(
+                    status_code=response.status_code,
+                    headers=list(response.raw_headers),
+                    body=response.body,
+                    expires_at=time.monotonic() + policy.ttl,
+                    tags=frozenset(tags),
+                )
+
+            entry, hit = await self.get_or_compute(key, compute)
+            if entry is None:
+                # No cacheable (error, 304, etc.) o seguidor de un cálculo no cacheable
+                return response if response is not None else await handler(request)
+
+            etag = entry.header(b"etag")
+            if etag is not None and etag_matches(request, etag):
+                headers = {
+                    name.decode(): value.decode()
+                    for name, value in entry.headers
+                    if name in (b"etag", b"cache-control", b"vary")
+                }
+                result = Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            elif not hit and response is not None:
+                result = response
+            else:
+                result = Response(content=entry.body, status_code=entry.status_code)
+                result.raw_headers = list(entry.headers)
+            result.headers["x-cache"] = "HIT" if hit else "MISS"
+            shared_counters.add("response_cache.hit" if hit else "response_cache.miss")
+            return result
+
+        return cached_handler
+
+
+response_cache = ResponseCache()
+invalidation_bus.register("response_cache", response_cache.invalidate)
+
+
+# Tags a invalidar por modelo: plantillas formateadas con los atributos de la fila
+_invalidation_templates: dict[type, tuple[str, ...]] = {}
+
+
+def invalidate_on_commit(model: type, *templates: str) -> None:
+    """
+    Invalida los tags indicados después de cada commit que escriba una
+    instancia de `model`, ej. `invalidate_on_commit(Product, "catalog:products", "product:{id}")`.
+    """
+    _invalidation_templates[model] = _invalidation_templates.get(model, ()) + templates
+
+
+def invalidate_after_commit(session, *tags: str) -> None:
+    """
+    Agrega tags a invalidar en el próximo commit de `session`, para escrituras
+    masivas (`update()`) que no pasan por el flush.
+    """
+    session.info.setdefault("response_cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidation_tags(session, flush_context):
+    if not _invalidation_templates:
+        return
+    # Los tags se calculan acá: después del commit las instancias están expiradas
+    tags = session.info.setdefault("response_cache_tags", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        for model, templates in _invalidation_templates.items():
+            if isinstance(instance, model):
+                tags.update(template.format_map(vars(instance)) for template in templates)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tags(session):
+    tags = session.info.pop("response_cache_tags", None)
+    if tags:
+        invalidation_bus.publish("response_cache", *sorted(tags))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidation_tags(session):
+    session.info.pop("response_cache_tags", None)
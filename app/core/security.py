@@ -38,4 +38,23 @@ def decode_token(token: str):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado"
-        )
\ No newline at end of file
+        )
+
+def get_bearer_payload(authorization: str | None) -> dict | None:
+    """
+    Decodifica el token Bearer de un header Authorization sin lanzar errores.
+
+    Pensado para usos fuera de la autenticación (ej. enrutar la sesión de base
+    de datos), donde un token ausente o inválido simplemente se ignora.
+    """
+    if not authorization:
+        return None
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
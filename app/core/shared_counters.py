@@ -0,0 +1,165 @@
+import fcntl
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable
+from app.core.config import SHARED_COUNTERS_SLOTS
+
+# Cada slot ocupa una línea de caché: nombre (hasta 56 bytes) y un entero de 64 bits
+SLOT_SIZE = 64
+KEY_SIZE = 56
+_VALUE = struct.Struct("q")
+
+
+class SharedCounters:
+    """
+    Tabla de contadores enteros compartida por los workers del nodo.
+
+    El master de `app.serve` la crea en un segmento de
+    `multiprocessing.shared_memory` antes de forkear y los workers la heredan:
+    sumar o leer un contador es una operación en memoria, sin viajes por la
+    red, y todos los workers ven el mismo valor.
+
+    Las escrituras se serializan con un lock de hilo y un `flock` sobre un
+    archivo del nodo; las lecturas no toman lock (el entero está alineado).
+    Sin `create()` (un solo proceso, tests) la tabla vive en la memoria del
+    proceso, con el mismo formato.
+    """
+
+    def __init__(self, slots: int = SHARED_COUNTERS_SLOTS):
+        self.slots = slots
+        self._memory: shared_memory.SharedMemory | None = None
+        self._buffer = memoryview(bytearray(slots * SLOT_SIZE))
+        self._index: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._lock_path: Path | None = None
+        self._lock_fd: int | None = None
+        self._lock_pid: int | None = None
+
+    @property
+    def shared(self) -> bool:
+        return self._memory is not None
+
+    @property
+    def name(self) -> str | None:
+        return self._memory.name if self._memory is not None else None
+
+    def create(self, name: str | None = None) -> None:
+        """
+        Pasa la tabla a memoria compartida, con los valores que ya tenía.
+        """
+        if self._memory is not None:
+            return
+        name = name or f"gym-counters-{os.getpid()}"
+        memory = shared_memory.SharedMemory(name=name, create=True, size=self.slots * SLOT_SIZE)
+        lock_path = Path(tempfile.gettempdir()) / f"{name}.lock"
+        lock_path.touch()
+        with self._lock:
+            memory.buf[: self.slots * SLOT_SIZE] = self._buffer
+            self._memory = memory
+            self._buffer = memory.buf
+            self._lock_path = lock_path
+
+    def unlink(self) -> None:
+        """
+        Libera el segmento (solo el proceso que lo creó, al terminar).
+        """
+        if self._memory is None:
+            return
+        with self._lock:
+            memory, self._memory = self._memory, None
+            # Los valores siguen disponibles en memoria del proceso
+            self._buffer = memoryview(bytearray(memory.buf[: self.slots * SLOT_SIZE]))
+            if self._lock_fd is not None and self._lock_pid == os.getpid():
+                os.close(self._lock_fd)
+            self._lock_fd = self._lock_pid = None
+            memory.close()
+            memory.unlink()
+            self._lock_path.unlink(missing_ok=True)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if self._memory is None:
+                yield
+                return
+            pid = os.getpid()
+            if self._lock_pid != pid:
+                # El fd heredado del master comparte su flock: cada proceso abre el suyo
+                self._lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT)
+                self._lock_pid = pid
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _key_at(self, slot: int) -> bytes:
+        offset = slot * SLOT_SIZE
+        return bytes(self._buffer[offset : offset + KEY_SIZE]).rstrip(b"\0")
+
+    def _slot(self, key: str, create: bool = False) -> int | None:
+        slot = self._index.get(key)
+        if slot is not None:
+            return slot
+        encoded = key.encode()
+        if not encoded or len(encoded) > KEY_SIZE:
+            raise ValueError(f"Nombre de contador inválido: {key!r}")
+
+        # Otro worker pudo haberlo agregado: se busca en la tabla
+        for slot in range(self.slots):
+            stored = self._key_at(slot)
+            if stored == encoded:
+                self._index[key] = slot
+                return slot
+            if not stored:
+                if not create:
+                    return None
+                offset = slot * SLOT_SIZE
+                self._buffer[offset : offset + len(encoded)] = encoded
+                self._index[key] = slot
+                return slot
+        raise RuntimeError("La tabla de contadores compartidos está llena (ver SHARED_COUNTERS_SLOTS)")
+
+    def _value_offset(self, slot: int) -> int:
+        return slot * SLOT_SIZE + KEY_SIZE
+
+    def get(self, key: str) -> int:
+        slot = self._slot(key)
+        if slot is None:
+            return 0
+        return _VALUE.unpack_from(self._buffer, self._value_offset(slot))[0]
+
+    def update(self, key: str, compute: Callable[[int], int]) -> tuple[int, int]:
+        """
+        Reemplaza el valor por `compute(valor)` sin que otro worker escriba
+        en el medio. Devuelve el valor anterior y el nuevo.
+        """
+        with self._locked():
+            offset = self._value_offset(self._slot(key, create=True))
+            previous = _VALUE.unpack_from(self._buffer, offset)[0]
+            value = compute(previous)
+            _VALUE.pack_into(self._buffer, offset, value)
+        return previous, value
+
+    def add(self, key: str, amount: int = 1) -> int:
+        return self.update(key, lambda value: value + amount)[1]
+
+    def set(self, key: str, value: int) -> None:
+        self.update(key, lambda _: value)
+
+    def items(self) -> dict[str, int]:
+        values = {}
+        for slot in range(self.slots):
+            key = self._key_at(slot)
+            if not key:
+                break
+            values[key.decode()] = _VALUE.unpack_from(self._buffer, self._value_offset(slot))[0]
+        return values
+
+
+shared_counters = SharedCounters()
@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import socket
+import time
+import pytest
+from app.core.cache import (
+    CacheBackend,
+    CacheError,
+    InvalidationBus,
+    MemoryCacheBackend,
+    NodeCacheBackend,
+    RedisCacheBackend,
+    create_cache_backend,
+)
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_cache_backend_requires_pub_sub():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_backend_is_chosen_from_the_url():
+    assert isinstance(create_cache_backend(None), MemoryCacheBackend)
+    assert isinstance(create_cache_backend("redis://localhost:6379/1"), RedisCacheBackend)
+    with pytest.raises(ValueError):
+        create_cache_backend("memcached://localhost")
+
+
+def test_error_replies_raise_cache_error(resp_server):
+    backend = RedisCacheBackend(resp_server.url)
+    with pytest.raises(CacheError):
+        backend.execute("FLUSHALL")
+    # La conexión sigue sirviendo después de una respuesta de error
+    assert backend.execute("PUBLISH", "test", "ping") == 0
+    backend.close()
+
+
+def test_invalidations_reach_other_workers(resp_server):
+    workers = [InvalidationBus(RedisCacheBackend(resp_server.url), channel="test") for _ in range(2)]
+    received = [[], []]
+    for bus, calls in zip(workers, received):
+        bus.register("catalog:products", lambda *items, calls=calls: calls.append(items))
+        bus.start()
+    assert wait_for(lambda: len(resp_server.subscribers.get(b"test", ())) == 2)
+
+    workers[0].publish("catalog:products", "product:1")
+
+    assert wait_for(lambda: received[1] == [("product:1",)])
+    # El que publica aplica su invalidación una sola vez, sin el eco del canal
+    time.sleep(0.05)
+    assert received[0] == [("product:1",)]
+    for bus in workers:
+        bus.stop()
+
+
+def _publish_from_forked_worker(bus: InvalidationBus, ready, origins) -> None:
+    ready.wait(5)
+    bus.start()
+    origins.put(bus.origin)
+    bus.publish("catalog:products", "product:2")
+    bus.stop()
+    os._exit(0)
+
+
+def test_forked_workers_receive_each_other_invalidations(resp_server):
+    # Como en app.serve: el bus se crea en el master y los workers lo heredan
+    bus = InvalidationBus(RedisCacheBackend(resp_server.url), channel="test")
+    received = []
+    bus.register("catalog:products", lambda *items: received.append(items))
+    context = multiprocessing.get_context("fork")
+    ready, origins = context.Event(), context.Queue()
+    worker = context.Process(target=_publish_from_forked_worker, args=(bus, ready, origins))
+    worker.start()
+
+    bus.start()
+    assert wait_for(lambda: len(resp_server.subscribers.get(b"test", ())) == 1)
+    ready.set()
+    worker.join(5)
+
+    assert origins.get(timeout=1) != bus.origin
+    assert wait_for(lambda: received == [("product:2",)])
+    bus.stop()
+
+
+def test_node_backend_relays_between_forked_workers(tmp_path):
+    # Sin CACHE_URL, app.serve instala este backend en el bus antes de forkear
+    bus = InvalidationBus(NodeCacheBackend(tmp_path / "bus"), channel="test")
+    received = []
+    bus.register("catalog:products", lambda *items: received.append(items))
+    context = multiprocessing.get_context("fork")
+    ready, origins = context.Event(), context.Queue()
+    worker = context.Process(target=_publish_from_forked_worker, args=(bus, ready, origins))
+    worker.start()
+
+    bus.start()
+    ready.set()
+    worker.join(5)
+
+    assert origins.get(timeout=1) != bus.origin
+    assert wait_for(lambda: received == [("product:2",)])
+    bus.stop()
+    assert list((tmp_path / "bus").iterdir()) == []
+
+
+def test_subscriber_reconnects_after_the_server_drops_it(resp_server):
+    publisher = InvalidationBus(RedisCacheBackend(resp_server.url), channel="test")
+    subscriber = InvalidationBus(RedisCacheBackend(resp_server.url), channel="test")
+    received = []
+    subscriber.register("catalog:memberships", lambda *items: received.append(items))
+    publisher.start()
+    subscriber.start()
+    assert wait_for(lambda: len(resp_server.subscribers.get(b"test", ())) == 2)
+
+    resp_server.drop_subscribers()
+    assert wait_for(lambda: len(resp_server.subscribers.get(b"test", ())) == 2)
+    publisher.publish("catalog:memberships")
+
+    assert wait_for(lambda: received == [()])
+    publisher.stop()
+    subscriber.stop()
+
+
+def test_local_invalidation_applies_when_the_store_is_down(caplog):
+    bus = InvalidationBus(RedisCacheBackend(f"redis://127.0.0.1:{free_port()}"), channel="test")
+    received = []
+    bus.register("response_cache", lambda *tags: received.append(tags))
+    bus.start()
+
+    bus.publish("response_cache", "product:1")
+
+    assert received == [("product:1",)]
+    assert wait_for(lambda: "No se pudo publicar" in caplog.text)
+    bus.stop()
+
+
+def test_publish_does_not_wait_for_an_unresponsive_store(caplog):
+    # Acepta conexiones pero nunca responde: cada envío espera el timeout entero
+    with socket.socket() as silent:
+        silent.bind(("127.0.0.1", 0))
+        silent.listen(16)
+        backend = RedisCacheBackend(f"redis://127.0.0.1:{silent.getsockname()[1]}", timeout=0.5)
+        bus = InvalidationBus(backend, channel="test", queue_size=2)
+        received = []
+        bus.register("response_cache", lambda *tags: received.append(tags))
+        bus.start()
+
+        start = time.perf_counter()
+        for index in range(5):
+            bus.publish("response_cache", f"user:{index}")
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.1
+        assert len(received) == 5
+        assert "Cola de invalidaciones llena" in caplog.text
+        bus.stop()
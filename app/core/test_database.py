@@ -0,0 +1,219 @@
+import time
+import pytest
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+from sqlmodel import SQLModel, Session, select
+from app.core import database
+from app.core.config import (SQLITE_BUSY_TIMEOUT_MS,
+                             SQLITE_CACHE_SIZE_KB,
+                             DB_POOL_SIZE,
+                             DB_MAX_OVERFLOW,
+                             DB_POOL_PRE_PING,
+                             DB_POOL_RECYCLE)
+from app.core.cache import InvalidationBus, NodeCacheBackend
+from app.core.database import (create_sqlite_engine,
+                               create_db_engine,
+                               get_database_settings,
+                               WalCheckpointer,
+                               SessionRouter,
+                               ReadOnlySessionError,
+                               get_session)
+from app.memberships.models import Membership
+import app.models
+
+
+def test_sqlite_profile_is_applied_on_every_connection(tmp_path):
+    db_engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'profile.sqlite3'}")
+
+    # Dos conexiones simultáneas: ambas deben salir del pool con el perfil aplicado
+    with db_engine.connect() as first, db_engine.connect() as second:
+        for connection in (first, second):
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == SQLITE_BUSY_TIMEOUT_MS
+
+    settings = get_database_settings(db_engine)
+    assert settings["journal_mode"] == "wal"
+    assert settings["synchronous"] == 1  # NORMAL
+    assert settings["cache_size"] == -SQLITE_CACHE_SIZE_KB
+
+
+def test_readers_are_not_blocked_by_an_open_writer(tmp_path):
+    db_engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'wal.sqlite3'}")
+
+    with db_engine.begin() as connection:
+        connection.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO item (id) VALUES (1)"))
+
+    with db_engine.connect() as writer, db_engine.connect() as reader:
+        writer.execute(text("BEGIN IMMEDIATE"))
+        writer.execute(text("INSERT INTO item (id) VALUES (2)"))
+
+        # Con WAL el lector ve el último snapshot confirmado sin esperar al escritor
+        assert reader.execute(text("SELECT count(*) FROM item")).scalar() == 1
+
+        writer.execute(text("COMMIT"))
+
+
+def test_wal_checkpointer_runs_in_background(tmp_path):
+    db_engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'checkpoint.sqlite3'}")
+
+    with db_engine.begin() as connection:
+        connection.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+
+    checkpointer = WalCheckpointer(db_engine, interval=0.01)
+    checkpointer.start()
+    try:
+        for _ in range(100):
+            if checkpointer.last_result is not None:
+                break
+            with db_engine.begin() as connection:
+                connection.execute(text("INSERT INTO item DEFAULT VALUES"))
+            time.sleep(0.01)
+    finally:
+        checkpointer.stop()
+
+    busy, log_pages, checkpointed = checkpointer.last_result
+    assert busy == 0
+    assert checkpointed <= log_pages
+
+
+def test_server_engine_uses_configured_pool():
+    pytest.importorskip("psycopg")
+    db_engine = create_db_engine("postgresql+psycopg://gym@localhost:5432/gym")
+
+    assert db_engine.pool.size() == DB_POOL_SIZE
+    assert db_engine.pool._max_overflow == DB_MAX_OVERFLOW
+    assert db_engine.pool._pre_ping is DB_POOL_PRE_PING
+    assert db_engine.pool._recycle == DB_POOL_RECYCLE
+
+
+def test_sqlite_urls_get_the_sqlite_profile(tmp_path):
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'profile.sqlite3'}")
+
+    assert get_database_settings(db_engine)["journal_mode"] == "wal"
+
+
+@pytest.fixture(name="routed_engines")
+def routed_engines(tmp_path):
+    primary = create_db_engine(f"sqlite:///{tmp_path / 'primary.sqlite3'}")
+    replica = create_db_engine(f"sqlite:///{tmp_path / 'replica.sqlite3'}")
+    for db_engine in (primary, replica):
+        SQLModel.metadata.create_all(db_engine)
+    return primary, replica
+
+
+def test_reads_go_to_replica_and_writes_to_primary(routed_engines):
+    primary, replica = routed_engines
+    router = SessionRouter(primary, replica)
+
+    with router.session_for("GET") as session:
+        assert session.get_bind() is replica
+        assert session.info["read_only"] is True
+
+    with router.session_for("POST") as session:
+        assert session.get_bind() is primary
+
+
+def test_read_only_session_rejects_writes(routed_engines):
+    primary, replica = routed_engines
+    router = SessionRouter(primary, replica)
+
+    with router.session_for("GET") as session:
+        session.add(Membership(name="Premium", max_days_per_week=5, points_multiplier=1.5))
+        with pytest.raises(ReadOnlySessionError):
+            session.commit()
+
+
+def test_writer_reads_from_primary_inside_window(routed_engines):
+    primary, replica = routed_engines
+    router = SessionRouter(primary, replica, window=60)
+
+    with router.session_for("POST", writer_key="7") as session:
+        session.add(Membership(name="Premium", max_days_per_week=5, points_multiplier=1.5))
+        session.commit()
+
+    # El usuario que escribió lee su propia escritura desde el primario
+    with router.session_for("GET", writer_key="7") as session:
+        assert session.get_bind() is primary
+        assert session.exec(select(Membership)).first() is not None
+
+    # Los demás usuarios siguen leyendo de la réplica
+    with router.session_for("GET", writer_key="8") as session:
+        assert session.get_bind() is replica
+
+
+def test_read_your_writes_window_opens_in_every_worker(routed_engines, tmp_path):
+    primary, replica = routed_engines
+    buses = [InvalidationBus(NodeCacheBackend(tmp_path / "bus"), channel="test") for _ in range(2)]
+    writer, other = (SessionRouter(primary, replica, window=60, bus=bus) for bus in buses)
+    for bus in buses:
+        bus.start()
+
+    with writer.session_for("POST", writer_key="7") as session:
+        session.add(Membership(name="Premium", max_days_per_week=5, points_multiplier=1.5))
+        session.commit()
+
+    assert writer.wrote_recently("7")
+    deadline = time.monotonic() + 2
+    while not other.wrote_recently("7") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with other.session_for("GET", writer_key="7") as session:
+        assert session.get_bind() is primary
+    with other.session_for("GET", writer_key="8") as session:
+        assert session.get_bind() is replica
+    for bus in buses:
+        bus.stop()
+
+
+def test_read_your_writes_window_expires(routed_engines):
+    primary, replica = routed_engines
+    router = SessionRouter(primary, replica, window=0)
+
+    router.mark_write("7")
+
+    with router.session_for("GET", writer_key="7") as session:
+        assert session.get_bind() is replica
+
+
+def test_without_replica_everything_uses_primary(routed_engines):
+    primary, _ = routed_engines
+    router = SessionRouter(primary)
+
+    with router.session_for("GET") as session:
+        assert session.get_bind() is primary
+        assert "read_only" not in session.info
+
+
+def test_strict_session_raises_on_lazy_load(routed_engines):
+    primary, _ = routed_engines
+
+    with Session(primary) as session:
+        membership = Membership(name="Premium", max_days_per_week=5, points_multiplier=1.5)
+        session.add(membership)
+        session.commit()
+
+    with Session(primary, info={"strict_loading": True}) as session:
+        membership = session.exec(select(Membership)).one()
+        with pytest.raises(InvalidRequestError):
+            membership.customer_memberships
+
+    with Session(primary, info={"strict_loading": True}) as session:
+        membership = session.exec(
+            select(Membership).options(selectinload(Membership.customer_memberships))
+        ).one()
+        assert membership.customer_memberships == []
+
+
+def test_request_sessions_follow_strict_loading_setting(routed_engines, monkeypatch):
+    primary, _ = routed_engines
+    monkeypatch.setattr(database, "session_router", SessionRouter(primary))
+    monkeypatch.setattr(database, "STRICT_LOADING", True)
+    request = Request({"type": "http", "method": "GET", "headers": [], "path": "/"})
+
+    dependency = get_session(request)
+    session = next(dependency)
+
+    assert session.info["strict_loading"] is True
+    dependency.close()
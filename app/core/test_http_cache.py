@@ -0,0 +1,23 @@
+from starlette.requests import Request
+from app.core.http_cache import make_etag, etag_matches
+
+
+def request_with(if_none_match: str | None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_etag_is_stable_and_depends_on_every_part():
+    assert make_etag("shop", 1, 10) == make_etag("shop", 1, 10)
+    assert make_etag("shop", 1, 10) != make_etag("shop", 2, 10)
+    assert make_etag("x").startswith('"') and make_etag("x").endswith('"')
+
+
+def test_if_none_match_accepts_lists_weak_tags_and_wildcard():
+    etag = make_etag("shop")
+
+    assert etag_matches(request_with(etag), etag)
+    assert etag_matches(request_with(f'"otro", W/{etag}'), etag)
+    assert etag_matches(request_with("*"), etag)
+    assert not etag_matches(request_with('"otro"'), etag)
+    assert not etag_matches(request_with(None), etag)
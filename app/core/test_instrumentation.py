@@ -0,0 +1,176 @@
+import json
+import logging
+from sqlalchemy import text
+from app.core import instrumentation
+from app.core.instrumentation import capture_request_stats, explain_statement
+from app.helpers import login
+
+
+def test_request_stats_count_statements_per_request(client, customer_with_credentials):
+    c = customer_with_credentials
+    token = login(client, c["email"], c["password"])
+
+    with capture_request_stats() as captured:
+        client.get("/customers/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert len(captured) == 1
+    stats = captured[0]
+    assert stats.route == "/customers/me"
+    assert stats.statements == 2  # usuario + customer
+    assert stats.db_time > 0
+
+
+def test_statements_outside_requests_are_not_counted(client, session):
+    with capture_request_stats() as captured:
+        session.exec(text("SELECT 1"))
+
+    assert captured == []
+
+
+def test_debug_mode_exposes_statement_headers(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "DEBUG", True)
+
+    response = client.get("/memberships/")
+
+    assert response.headers["x-db-statements"] == "1"
+    assert float(response.headers["x-db-time-ms"]) >= 0
+
+
+def test_statement_headers_are_hidden_outside_debug(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "DEBUG", False)
+
+    response = client.get("/memberships/")
+
+    assert "x-db-statements" not in response.headers
+
+
+def test_repeated_statements_are_reported_as_n_plus_one(caplog):
+    stats = instrumentation.RequestStats(method="GET", path="/x", route="/x")
+    stats.statement_counts["SELECT * FROM membership WHERE id = ?"] = 6
+    stats.statement_counts["SELECT * FROM customer"] = 1
+
+    assert stats.repeated_statements(threshold=5) == [
+        ("SELECT * FROM membership WHERE id = ?", 6)
+    ]
+
+    with caplog.at_level(logging.WARNING, logger="app.core.instrumentation"):
+        instrumentation.RequestStatsMiddleware(app=None)._report(stats)
+
+    assert "Posible N+1 en GET /x" in caplog.text
+
+
+def test_server_timing_header_breaks_down_request_phases(client, customer_with_credentials):
+    c = customer_with_credentials
+    token = login(client, c["email"], c["password"])
+
+    with capture_request_stats() as captured:
+        response = client.get("/customers/me", headers={"Authorization": f"Bearer {token}"})
+
+    entries = {
+        entry.split(";")[0]: entry
+        for entry in response.headers["server-timing"].split(", ")
+    }
+    assert list(entries) == ["auth", "db", "handler", "serialization", "total"]
+    assert 'desc="2 queries"' in entries["db"]
+
+    phases = captured[0].phase_durations()
+    assert phases["auth"] > 0
+    assert phases["handler"] > 0
+    assert phases["serialization"] > 0
+    assert captured[0].total_time >= phases["auth"] + phases["handler"]
+
+
+def test_server_timing_can_be_disabled(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "SERVER_TIMING_ENABLED", False)
+
+    response = client.get("/memberships/")
+
+    assert "server-timing" not in response.headers
+
+
+def test_each_request_writes_a_structured_log_line(client, caplog):
+    with caplog.at_level(logging.INFO, logger="app.requests"):
+        client.get("/memberships/")
+
+    [line] = [r.getMessage() for r in caplog.records if r.name == "app.requests"]
+    record = json.loads(line)
+    assert record["method"] == "GET"
+    assert record["route"] == "/memberships/"
+    assert record["status"] == 200
+    assert record["statements"] == 1
+    assert set(record) >= {"auth_ms", "db_ms", "handler_ms", "serialization_ms", "total_ms"}
+
+
+def test_slow_statements_are_logged_with_route_and_plan(client, admin_user, monkeypatch, caplog):
+    token = login(client, admin_user["email"], admin_user["password"])
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_THRESHOLD_MS", 0.000001)
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        client.get(
+            "/customers/",
+            params={"search": "perez"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    records = [
+        json.loads(r.getMessage()) for r in caplog.records if r.name == "app.slow_queries"
+    ]
+    search = next(r for r in records if "LIKE" in r["sql"] and "count" not in r["sql"])
+    assert search["method"] == "GET"
+    assert search["route"] == "/customers/"
+    params = search["params"]
+    assert "<str:7>" in (params.values() if isinstance(params, dict) else params)  # "%perez%"
+    assert any("scan" in line.lower() for line in search["plan"])
+
+
+def test_failed_explain_keeps_the_transaction_usable(session):
+    connection = session.connection()
+
+    assert explain_statement(connection, "SELECT * FROM no_such_table", ()) is None
+    assert connection.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_failed_statement_does_not_leave_its_timer_behind(session):
+    connection = session.connection()
+
+    try:
+        connection.execute(text("SELECT * FROM no_such_table"))
+    except Exception:
+        session.rollback()
+        connection = session.connection()
+
+    assert connection.info.get("statement_start", []) == []
+    connection.execute(text("SELECT 1"))
+    assert connection.info["statement_start"] == []
+
+
+def test_fast_statements_are_not_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_THRESHOLD_MS", 10_000)
+
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        client.get("/memberships/")
+
+    assert not [r for r in caplog.records if r.name == "app.slow_queries"]
+
+
+def test_redact_parameters_keeps_only_non_personal_values():
+    from datetime import date
+
+    assert instrumentation.redact_parameters(("ana@test.com", 3, None, date(2024, 1, 5))) == [
+        "<str:12>", 3, None, "2024-01-05"
+    ]
+    assert instrumentation.redact_parameters({"email": "ana@test.com", "id": 3}) == {
+        "email": "<str:12>", "id": 3
+    }
+
+
+def test_slow_query_log_writes_through_a_queue(tmp_path):
+    logger = logging.getLogger("app.slow_queries.test")
+    log = instrumentation.SlowQueryLog(logger, filename=str(tmp_path / "slow.log"))
+
+    log.start()
+    logger.warning('{"sql": "SELECT 1"}')
+    log.stop()
+
+    assert '{"sql": "SELECT 1"}' in (tmp_path / "slow.log").read_text()
+    assert logger.propagate
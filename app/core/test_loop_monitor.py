@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+from anyio import to_thread
+from app.core.loop_monitor import LoopMonitor, configure_threadpool
+
+
+def test_blocked_loop_is_reported_with_its_route(caplog):
+    async def blocking_handler():
+        scope = {"type": "http", "method": "GET", "route": SimpleNamespace(path="/slow")}
+        time.sleep(0.3)
+        return scope
+
+    async def main():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await blocking_handler()
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="app.core.loop_monitor"):
+        asyncio.run(main())
+
+    [report] = [r.getMessage() for r in caplog.records if "bloqueado" in r.getMessage()]
+    assert "GET /slow" in report
+    assert "blocking_handler" in report
+
+
+def test_threadpool_saturation_is_reported(caplog):
+    async def main():
+        configure_threadpool(1)
+        monitor = LoopMonitor(interval=0.01, block_threshold=1)
+        monitor.start()
+        await asyncio.gather(*(to_thread.run_sync(time.sleep, 0.05) for _ in range(3)))
+        await asyncio.sleep(0.05)
+        monitor.stop()
+        return monitor
+
+    with caplog.at_level(logging.INFO, logger="app.core.loop_monitor"):
+        monitor = asyncio.run(main())
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(m.startswith("Threadpool saturado") and "capacidad 1" in m for m in messages)
+    assert any(m.startswith("Threadpool recuperado") for m in messages)
+    assert monitor.queue_peak >= 1
@@ -0,0 +1,31 @@
+from app.core.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latencia", ("route",), buckets=(0.1, 1.0))
+
+    latency.observe(0.05, "/shop/")
+    latency.observe(0.5, "/shop/")
+    latency.observe(3, "/shop/")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/shop/",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/shop/",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/shop/",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/shop/"} 3' in lines
+    assert 'latency_seconds_sum{route="/shop/"} 3.55' in lines
+
+
+def test_counter_and_collected_gauge_render_with_escaped_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    registry.gauge("queue_depth", "Cola", collect=lambda: {(): 4})
+
+    requests.inc('/a"b')
+    requests.inc('/a"b')
+
+    body = registry.render()
+    assert "# TYPE requests_total counter" in body
+    assert 'requests_total{route="/a\\"b"} 2' in body
+    assert "queue_depth 4" in body
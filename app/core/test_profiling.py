@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from app.core.profiling import ContinuousSampler, merge_collapsed_stacks
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_aggregates_busy_threads_and_skips_idle_ones(tmp_path):
+    sampler = ContinuousSampler(tmp_path, interval=0.001)
+    stop = threading.Event()
+    busy = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    idle = threading.Thread(target=stop.wait, name="idle-worker")
+    busy.start()
+    idle.start()
+    try:
+        for _ in range(20):
+            sampler.sample()
+    finally:
+        stop.set()
+        busy.join()
+        idle.join()
+
+    stacks = list(sampler.counts)
+    assert any(stack.startswith("busy-worker;") and "busy_loop (" in stack for stack in stacks)
+    assert not any(stack.startswith("idle-worker;") for stack in stacks)
+
+
+def test_flush_writes_pending_samples_per_process(tmp_path):
+    sampler = ContinuousSampler(tmp_path)
+    sampler.counts["MainThread;main;handler"] = 3
+
+    path = sampler.flush()
+
+    assert path.name.endswith(f"-{os.getpid()}.collapsed")
+    assert path.read_text() == "MainThread;main;handler 3\n"
+    assert sampler.counts == {}
+    assert sampler.flush() is None
+
+
+def test_merge_sums_workers_inside_the_window(tmp_path):
+    now = int(time.time())
+    (tmp_path / f"{now}-101.collapsed").write_text("w;a;b 2\nw;a 1\n")
+    (tmp_path / f"{now}-102.collapsed").write_text("w;a;b 5\n")
+    (tmp_path / f"{now - 3600}-101.collapsed").write_text("w;old 9\n")
+
+    assert merge_collapsed_stacks(tmp_path, since=now - 60) == "w;a;b 7\nw;a 1\n"
+    assert "w;old 9" in merge_collapsed_stacks(tmp_path)
+
+
+def test_flush_prunes_files_outside_retention(tmp_path):
+    old = tmp_path / f"{int(time.time()) - 7200}-101.collapsed"
+    old.write_text("w;a 1\n")
+    sampler = ContinuousSampler(tmp_path, retention=3600)
+
+    sampler.flush()
+
+    assert not old.exists()
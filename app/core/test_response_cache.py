@@ -0,0 +1,95 @@
+import asyncio
+import time
+from app.core.response_cache import CachedResponse, ResponseCache, resolve_tags
+
+
+def entry(body: bytes = b"{}", ttl: float = 30, tags=()) -> CachedResponse:
+    return CachedResponse(
+        status_code=200,
+        headers=[(b"content-type", b"application/json")],
+        body=body,
+        expires_at=time.monotonic() + ttl,
+        tags=frozenset(tags),
+    )
+
+
+def test_evicts_least_recently_used_entry():
+    cache = ResponseCache(max_entries=2)
+    cache.set(("a",), entry())
+    cache.set(("b",), entry())
+    cache.get(("a",))
+    cache.set(("c",), entry())
+
+    assert cache.get(("a",)) is not None
+    assert cache.get(("b",)) is None
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_not_served():
+    cache = ResponseCache()
+    cache.set(("a",), entry(ttl=-1))
+
+    assert cache.get(("a",)) is None
+    assert len(cache) == 0
+
+
+def test_invalidate_removes_every_entry_with_the_tag():
+    cache = ResponseCache()
+    cache.set(("list",), entry(tags={"catalog:products"}))
+    cache.set(("detail", 1), entry(tags={"catalog:products", "product:1"}))
+    cache.set(("detail", 2), entry(tags={"catalog:products", "product:2"}))
+
+    assert cache.invalidate("product:1") == 1
+    assert cache.get(("detail", 2)) is not None
+    assert cache.invalidate("catalog:products") == 2
+    assert len(cache) == 0
+
+
+def test_tags_are_resolved_from_path_params_and_body():
+    tags = resolve_tags(
+        ("catalog:products", "product:{product_id}", "customer:{customer_id}", "otro:{missing}"),
+        {"product_id": "7"},
+        b'{"customer_id": 3}',
+    )
+
+    assert tags == {"catalog:products", "product:7", "customer:3"}
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return entry(b"[1]")
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute(("k",), compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert calls == 1
+    assert [hit for _, hit in results] == [False, True, True, True, True]
+    assert all(result.body == b"[1]" for result, _ in results)
+
+
+def test_followers_compute_when_the_leader_is_not_cacheable():
+    cache = ResponseCache()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return None
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute(("k",), compute) for _ in range(3)))
+
+    results = asyncio.run(main())
+
+    assert calls == 3
+    assert all(result is None for result, _ in results)
+    assert len(cache) == 0
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import uuid
+import pytest
+from app.core.shared_counters import SharedCounters
+
+
+@pytest.fixture
+def shared_table():
+    counters = SharedCounters(slots=8)
+    counters.create(name=f"test-counters-{uuid.uuid4().hex[:8]}")
+    yield counters
+    counters.unlink()
+
+
+def test_local_table_adds_and_reads():
+    counters = SharedCounters(slots=4)
+
+    assert counters.get("hits") == 0
+    assert counters.add("hits") == 1
+    assert counters.add("hits", 4) == 5
+    counters.set("misses", -2)
+    assert counters.update("misses", lambda value: max(value, 0)) == (-2, 0)
+
+    assert not counters.shared
+    assert counters.items() == {"hits": 5, "misses": 0}
+
+
+def test_rejects_invalid_names_and_full_table():
+    counters = SharedCounters(slots=2)
+    counters.add("a")
+    counters.add("b")
+
+    with pytest.raises(RuntimeError):
+        counters.add("c")
+    with pytest.raises(ValueError):
+        counters.get("x" * 57)
+
+
+def _add_many(counters: SharedCounters, times: int) -> None:
+    for _ in range(times):
+        counters.add("hits")
+    os._exit(0)
+
+
+def test_forked_workers_share_exact_counts(shared_table):
+    shared_table.add("before", 3)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_add_many, args=(shared_table, 2000)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert shared_table.shared
+    assert shared_table.items() == {"before": 3, "hits": 8000}
+
+
+def test_unlink_keeps_values_in_process_memory():
+    counters = SharedCounters(slots=4)
+    counters.create(name=f"test-counters-{uuid.uuid4().hex[:8]}")
+    name = counters.name
+    counters.add("hits", 2)
+
+    counters.unlink()
+
+    assert not counters.shared
+    assert counters.get("hits") == 2
+    assert not os.path.exists(f"/dev/shm/{name}")
@@ -0,0 +1,35 @@
+import json
+import time
+from app.core.workers import WorkerHeartbeats, default_workers
+
+
+def test_default_workers_uses_available_cpus():
+    assert default_workers(4) == 4
+    assert default_workers(0) == 1
+    assert default_workers() >= 1
+
+
+def test_heartbeats_report_stale_workers(tmp_path):
+    heartbeats = WorkerHeartbeats(tmp_path, timeout=30)
+    heartbeats.beat(101, requests=3, ready=True)
+    heartbeats.beat(102, requests=0, ready=True)
+    stale = json.loads(heartbeats.path(102).read_text())
+    stale["updated_at"] = time.time() - 60
+    heartbeats.path(102).write_text(json.dumps(stale))
+
+    workers = {worker["pid"]: worker for worker in heartbeats.read_all()}
+
+    assert not workers[101]["stale"]
+    assert workers[102]["stale"]
+    assert heartbeats.last_beat(101) is not None
+
+
+def test_removed_workers_disappear(tmp_path):
+    heartbeats = WorkerHeartbeats(tmp_path)
+    heartbeats.beat(101)
+    heartbeats.beat(102)
+
+    heartbeats.remove(101)
+    assert [worker["pid"] for worker in heartbeats.read_all()] == [102]
+    heartbeats.clear()
+    assert heartbeats.read_all() == []
@@ -0,0 +1,77 @@
+import json
+import os
+import time
+from pathlib import Path
+from app.core.config import WORKER_HEARTBEAT_DIR, WORKER_TIMEOUT_SECONDS
+
+
+def default_workers(cpus: int | None = None) -> int:
+    """
+    Un worker por CPU disponible para el proceso (respeta la afinidad y los
+    límites del contenedor cuando el sistema los expone).
+    """
+    if cpus is None:
+        try:
+            cpus = len(os.sched_getaffinity(0))
+        except AttributeError:
+            cpus = os.cpu_count() or 1
+    return max(cpus, 1)
+
+
+class WorkerHeartbeats:
+    """
+    Latidos de los workers de `app.serve`: un archivo JSON por PID en un
+    directorio compartido, reescrito periódicamente desde el event loop del
+    worker. El master los usa para detectar workers colgados y el endpoint de
+    monitoreo para mostrar su estado.
+    """
+
+    def __init__(self, directory: str | Path = WORKER_HEARTBEAT_DIR, timeout: float = WORKER_TIMEOUT_SECONDS):
+        self.directory = Path(directory)
+        self.timeout = timeout
+
+    def path(self, pid: int) -> Path:
+        return self.directory / f"{pid}.json"
+
+    def beat(self, pid: int, **info) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(pid)
+        # Escritura atómica: el master nunca lee un latido a medias
+        partial = path.with_suffix(".tmp")
+        partial.write_text(json.dumps({"pid": pid, "updated_at": time.time(), **info}))
+        partial.replace(path)
+
+    def last_beat(self, pid: int) -> float | None:
+        try:
+            return self.path(pid).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def remove(self, pid: int) -> None:
+        self.path(pid).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        if self.directory.is_dir():
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def read_all(self) -> list[dict]:
+        """
+        Estado de cada worker, con `stale=True` si dejó de latir hace más de `timeout`.
+        """
+        if not self.directory.is_dir():
+            return []
+        now = time.time()
+        workers = []
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                info = json.loads(path.read_text())
+            except (FileNotFoundError, ValueError):
+                # El worker terminó o está reescribiendo el archivo
+                continue
+            info["stale"] = now - info["updated_at"] > self.timeout
+            workers.append(info)
+        return workers
+
+
+worker_heartbeats = WorkerHeartbeats()
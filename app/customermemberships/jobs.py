@@ -0,0 +1,57 @@
+import argparse
+import logging
+import sys
+from datetime import date
+from sqlalchemy import Engine
+from sqlmodel import Session
+from app.core.config import MEMBERSHIP_ROLLOVER_CHUNK_SIZE
+from app.core.database import engine
+from app.customermemberships.services import RolloverResult, rollover_memberships
+
+logger = logging.getLogger("app.customermemberships.jobs")
+
+
+def run_membership_rollover(
+    db_engine: Engine = engine,
+    today: date | None = None,
+    chunk_size: int = MEMBERSHIP_ROLLOVER_CHUNK_SIZE,
+) -> RolloverResult:
+    """
+    Corre el rollover en una sesión propia y deja en el log filas y tiempos
+    de cada paso. Pensado para correr a diario (cron o scheduler): fuera del
+    cambio de mes no encuentra nada que actualizar.
+    """
+    with Session(db_engine) as session:
+        result = rollover_memberships(session, today=today, chunk_size=chunk_size)
+
+    logger.info(
+        "Rollover de membresías del %s: %d filas en %.0f ms (%s)",
+        result.today,
+        result.total_rows,
+        result.total_seconds * 1000,
+        ", ".join(
+            f"{name}={rows} en {result.chunks[name]} chunks/{result.seconds[name] * 1000:.0f}ms"
+            for name, rows in result.rows.items()
+        ),
+    )
+    return result
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.customermemberships.jobs",
+        description="Vence las membresías terminadas y activa las pendientes",
+    )
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Fecha de corte (default: hoy)")
+    parser.add_argument("--chunk-size", type=int, default=MEMBERSHIP_ROLLOVER_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    # Registra todos los modelos (relaciones entre tablas) antes de consultar
+    import app.models  # noqa: F401
+
+    run_membership_rollover(today=args.date, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, TYPE_CHECKING
 from datetime import date
@@ -10,6 +11,12 @@ if TYPE_CHECKING:
 
 
 class CustomerMembership(SQLModel, table=True):
+    # "La membresía activa/pendiente del cliente": la consultan la asignación y
+    # el rollover mensual por cada fila que evalúa
+    __table_args__ = (
+        Index("ix_customermembership_customer_id_status", "customer_id", "status"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     customer_id: int = Field(foreign_key="customer.id")
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 from sqlmodel import select, desc
 from datetime import date
 from app.core.database import SessionDep
+from app.core.instrumentation import TimedRoute
+from app.core.response_cache import cache_response, invalidate_on_commit
 from app.core.enums import MembershipStatusEnum
 from app.core.pagination import DefaultPagination
+from app.core.http_cache import conditional_response, row_etag
 from app.customers.models import Customer
 from app.customermemberships.models import CustomerMembership
 from app.customermemberships.schemas import CustomerMembershipRead
@@ -16,9 +19,12 @@ from app.auth.models import User
 
 router = APIRouter(
     prefix="/customer-memberships",
-    tags=["customer-memberships"]
+    tags=["customer-memberships"],
+    route_class=TimedRoute
 )
 
+invalidate_on_commit(CustomerMembership, "customer:{customer_id}")
+
 
 @router.post(
     "/assign/{membership_id}",
@@ -152,15 +158,20 @@ def list_customer_memberships(
     - Permite consultar membresías pendientes o inactivas usando el parámetro `status`.
     - Solo devuelve membresías del propio cliente.
     - Requiere autenticación con token Bearer.
+    - Devuelve `ETag`; con `If-None-Match` vigente responde 304 sin cuerpo.
     """,
     responses={
         200: {"description": "Membresía obtenida correctamente"},
+        304: {"description": "Sin cambios desde el ETag enviado"},
         401: {"description": "No autenticado"},
         403: {"description": "Token inválido o sin permisos"},
         404: {"description": "El cliente no posee una membresía con el estado solicitado"},
     },
 )
+@cache_response(scope="user", tags=("customer:{customer_id}",))
 def read_my_membership(
+    request: Request,
+    response: Response,
     session: SessionDep,
     current_customer: Customer = Depends(get_current_customer),
     status: MembershipStatusEnum = MembershipStatusEnum.ACTIVE,
@@ -181,6 +192,10 @@ def read_my_membership(
             detail=f"El cliente no posee una membresía {status.value}"
         )
 
+    not_modified = conditional_response(request, response, row_etag(membership))
+    if not_modified:
+        return not_modified
+
     return membership
 
 
@@ -0,0 +1,159 @@
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from sqlalchemy import exists, func, update
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+from app.core.config import MEMBERSHIP_ROLLOVER_CHUNK_SIZE
+from app.core.enums import MembershipStatusEnum
+from app.core.response_cache import invalidate_after_commit
+from app.customermemberships.models import CustomerMembership
+from app.customers.services import obtener_ultimo_dia
+
+
+@dataclass
+class RolloverResult:
+    """
+    Resultado de un rollover: filas actualizadas, transacciones y duración
+    (en segundos) de cada paso.
+    """
+    today: date
+    rows: dict[str, int] = field(default_factory=dict)
+    chunks: dict[str, int] = field(default_factory=dict)
+    seconds: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+
+def expired_conditions(today: date) -> tuple:
+    """
+    Membresías activas cuyo último día ya pasó.
+    """
+    return (
+        CustomerMembership.status == MembershipStatusEnum.ACTIVE,
+        CustomerMembership.end_date < today,
+    )
+
+
+def superseded_conditions(today: date) -> tuple:
+    """
+    Pendientes que ya deberían empezar pero tienen otra pendiente más nueva
+    del mismo cliente (se reasignó antes del cambio de mes): gana la última.
+    """
+    newer = aliased(CustomerMembership)
+    return (
+        CustomerMembership.status == MembershipStatusEnum.PENDING,
+        CustomerMembership.start_date <= today,
+        exists().where(
+            newer.customer_id == CustomerMembership.customer_id,
+            newer.status == MembershipStatusEnum.PENDING,
+            newer.start_date <= today,
+            newer.id > CustomerMembership.id,
+        ),
+    )
+
+
+def due_conditions(today: date) -> tuple:
+    """
+    Pendientes que ya deberían empezar, de clientes sin membresía activa.
+    """
+    active = aliased(CustomerMembership)
+    return (
+        CustomerMembership.status == MembershipStatusEnum.PENDING,
+        CustomerMembership.start_date <= today,
+        ~exists().where(
+            active.customer_id == CustomerMembership.customer_id,
+            active.status == MembershipStatusEnum.ACTIVE,
+        ),
+    )
+
+
+def update_in_chunks(session: Session, conditions: tuple, values: dict, chunk_size: int) -> tuple[int, int]:
+    """
+    Aplica `values` a las filas que cumplen `conditions`, recorriendo la tabla
+    en ventanas de `chunk_size` IDs con una transacción por ventana. Devuelve
+    (filas actualizadas, transacciones).
+
+    Cada ventana es un rango de la clave primaria, así que ninguna vuelve a
+    recorrer lo ya procesado. Lo actualizado deja de cumplir `conditions`:
+    cortar a mitad de camino y volver a correr retoma donde quedó.
+    """
+    first_id, last_id = session.exec(
+        select(func.min(CustomerMembership.id), func.max(CustomerMembership.id)).where(*conditions)
+    ).one()
+    rows = chunks = 0
+    if first_id is None:
+        return rows, chunks
+
+    for window_start in range(first_id, last_id + 1, chunk_size):
+        window = (
+            CustomerMembership.id >= window_start,
+            CustomerMembership.id < window_start + chunk_size,
+            *conditions,
+        )
+        customer_ids = session.exec(select(CustomerMembership.customer_id).where(*window)).all()
+        if not customer_ids:
+            continue
+
+        result = session.execute(
+            update(CustomerMembership)
+            .where(*window)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        # El update masivo no pasa por el flush: los tags se agregan a mano
+        invalidate_after_commit(session, *{f"customer:{customer_id}" for customer_id in customer_ids})
+        session.commit()
+        rows += result.rowcount
+        chunks += 1
+    return rows, chunks
+
+
+def rollover_memberships(
+    session: Session,
+    today: date | None = None,
+    chunk_size: int = MEMBERSHIP_ROLLOVER_CHUNK_SIZE,
+) -> RolloverResult:
+    """
+    Pasa a INACTIVE las membresías vencidas y activa las pendientes que
+    empiezan hoy o antes, con updates por conjunto en lugar de fila a fila.
+
+    Es idempotente: correrlo de nuevo el mismo día no cambia nada, y si una
+    corrida se saltea la siguiente se pone al día.
+    """
+    today = today or date.today()
+    result = RolloverResult(today=today)
+    # Las pendientes se crean sin fin: al activarse duran hasta fin de mes,
+    # el mismo corte de mes que usa assign_membership, y el rollover del mes
+    # siguiente las vence
+    ultimo_dia, _ = obtener_ultimo_dia(today)
+
+    # El orden importa: primero se vence la activa anterior, así la pendiente
+    # del mismo cliente puede activarse en la misma corrida
+    steps = (
+        ("expired", expired_conditions(today), {"status": MembershipStatusEnum.INACTIVE}),
+        (
+            "superseded",
+            superseded_conditions(today),
+            {"status": MembershipStatusEnum.INACTIVE, "end_date": CustomerMembership.start_date},
+        ),
+        (
+            "activated",
+            due_conditions(today),
+            {
+                "status": MembershipStatusEnum.ACTIVE,
+                "end_date": func.coalesce(CustomerMembership.end_date, ultimo_dia),
+            },
+        ),
+    )
+    for name, conditions, values in steps:
+        start = time.perf_counter()
+        result.rows[name], result.chunks[name] = update_in_chunks(session, conditions, values, chunk_size)
+        result.seconds[name] = time.perf_counter() - start
+    return result
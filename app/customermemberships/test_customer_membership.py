@@ -5,6 +5,7 @@ from app.helpers import login
 from app.core.enums import MembershipStatusEnum
 from app.customers.services import obtener_ultimo_dia
 from app.customermemberships.models import CustomerMembership
+from app.customermemberships.services import rollover_memberships
 
 #------- TEST CRUD CUSTOMERMEMBERSHIP -------#
 
@@ -155,4 +156,98 @@ def test_list_customer_membership_paginated(
     # comportamiento esperado
     assert body["page"] == 1
     assert body["size"] == 1
-    assert len(body["items"]) <= 1
\ No newline at end of file
+    assert len(body["items"]) <= 1
+
+def test_read_my_membership_returns_304_for_current_etag(client, customer_with_membership):
+    c = customer_with_membership
+    token = login(client, c["email"], c["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.get("/customer-memberships/me", headers=headers)
+    cached = client.get(
+        "/customer-memberships/me",
+        headers={**headers, "If-None-Match": first.headers["etag"]},
+    )
+
+    assert first.status_code == status.HTTP_200_OK
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+#------- TEST ROLLOVER -------#
+
+def test_rollover_expires_active_and_activates_pending(client, customer_with_pending_membership, session):
+    c = customer_with_pending_membership
+    ultimo_dia, primer_dia_siguiente = obtener_ultimo_dia(date.today())
+
+    result = rollover_memberships(session, today=primer_dia_siguiente)
+
+    assert result.rows == {"expired": 1, "superseded": 0, "activated": 1}
+    memberships = session.exec(
+        select(CustomerMembership)
+        .where(CustomerMembership.customer_id == c["customer"]["id"])
+        .order_by(CustomerMembership.id)
+    ).all()
+    for membership in memberships:
+        session.refresh(membership)
+    assert [m.status for m in memberships] == [MembershipStatusEnum.INACTIVE, MembershipStatusEnum.ACTIVE]
+    assert memberships[0].end_date == ultimo_dia
+
+def test_rollover_expires_activated_membership_at_the_next_month_end(client, customer_with_pending_membership, session):
+    c = customer_with_pending_membership
+    _, primer_dia_siguiente = obtener_ultimo_dia(date.today())
+    ultimo_dia_siguiente, segundo_corte = obtener_ultimo_dia(primer_dia_siguiente)
+
+    rollover_memberships(session, today=primer_dia_siguiente)
+    activated = session.get(CustomerMembership, c["membership"].id)
+    session.refresh(activated)
+    assert activated.status == MembershipStatusEnum.ACTIVE
+    assert activated.end_date == ultimo_dia_siguiente
+
+    assert rollover_memberships(session, today=ultimo_dia_siguiente).total_rows == 0
+    result = rollover_memberships(session, today=segundo_corte)
+
+    assert result.rows["expired"] == 1
+    session.refresh(activated)
+    assert activated.status == MembershipStatusEnum.INACTIVE
+
+def test_rollover_is_idempotent_and_noop_before_month_end(client, customer_with_pending_membership, session):
+    _, primer_dia_siguiente = obtener_ultimo_dia(date.today())
+
+    assert rollover_memberships(session, today=date.today()).total_rows == 0
+    assert rollover_memberships(session, today=primer_dia_siguiente).total_rows == 2
+    assert rollover_memberships(session, today=primer_dia_siguiente).total_rows == 0
+
+def test_rollover_activates_only_latest_pending(client, customer_with_pending_membership, admin_user, session):
+    c = customer_with_pending_membership
+    _, primer_dia_siguiente = obtener_ultimo_dia(date.today())
+    admin_token = login(client, admin_user["email"], admin_user["password"])
+    third = client.post(
+        "/memberships/",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"name": "Basic", "max_days_per_week": 2, "points_multiplier": 1.0},
+    ).json()
+    token = login(client, "example@example.com", "password123")
+    client.post(f"/customer-memberships/assign/{third['id']}", headers={"Authorization": f"Bearer {token}"})
+
+    result = rollover_memberships(session, today=primer_dia_siguiente, chunk_size=1)
+
+    assert result.rows == {"expired": 1, "superseded": 1, "activated": 1}
+    active = session.exec(
+        select(CustomerMembership).where(
+            CustomerMembership.customer_id == c["customer"]["id"],
+            CustomerMembership.status == MembershipStatusEnum.ACTIVE,
+        )
+    ).all()
+    assert [m.membership_id for m in active] == [third["id"]]
+
+def test_rollover_invalidates_cached_my_membership(client, customer_with_pending_membership, session):
+    c = customer_with_pending_membership
+    _, primer_dia_siguiente = obtener_ultimo_dia(date.today())
+    token = login(client, "example@example.com", "password123")
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/customer-memberships/me", headers=headers)
+
+    rollover_memberships(session, today=primer_dia_siguiente)
+    response = client.get("/customer-memberships/me", headers=headers)
+
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["id"] == c["membership"].id
@@ -28,6 +28,10 @@ class Customer(SQLModel, table=True):
 
     @property
     def active_membership(self) -> Optional["CustomerMembership"]:
+        """
+        Recorre `memberships`: con STRICT_LOADING hay que cargarlas en la
+        consulta del cliente (`selectinload(Customer.memberships)`).
+        """
         return next(
             (cm for cm in self.memberships if cm.status == MembershipStatusEnum.ACTIVE),
             None)
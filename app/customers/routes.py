@@ -1,11 +1,14 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlmodel import paginate
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from app.core.database import SessionDep
+from app.core.instrumentation import TimedRoute
+from app.core.response_cache import cache_response, invalidate_on_commit
 from app.core.enums import StatusEnum
 from app.core.pagination import DefaultPagination
+from app.core.http_cache import conditional_response, row_etag
 from app.customers.models import Customer
 from app.customers.schemas import CustomerCreate, CustomerRead, CustomerUpdate
 from app.customers.services import register_customer
@@ -14,9 +17,13 @@ from app.auth.models import User
 
 router = APIRouter(
     prefix="/customers",
-    tags=["customers"]
+    tags=["customers"],
+    route_class=TimedRoute
 )
 
+# Las respuestas cacheadas de /customers/me se etiquetan con el ID del cliente
+invalidate_on_commit(Customer, "customer:{id}")
+
 
 @router.post(
     "/",
@@ -63,16 +70,25 @@ def register_customer_endpoint(
     - Requiere autenticación con token Bearer.
     - El cliente se obtiene a partir del usuario autenticado.
     - Solo devuelve el perfil propio (no permite acceder a otros clientes).
+    - Devuelve `ETag`; con `If-None-Match` vigente responde 304 sin cuerpo.
     """,
     responses={
         200: {"description": "Perfil del cliente obtenido correctamente"},
+        304: {"description": "Sin cambios desde el ETag enviado"},
         401: {"description": "No autenticado"},
         403: {"description": "Token inválido o sin permisos"},
     },
 )
+@cache_response(scope="user", tags=("customer:{id}",))
 def read_me(
+    request: Request,
+    response: Response,
     current_customer: Customer = Depends(get_current_customer)
 ):
+    not_modified = conditional_response(request, response, row_etag(current_customer))
+    if not_modified:
+        return not_modified
+
     return current_customer
 
 
@@ -2,6 +2,7 @@ from fastapi import status
 from app.customers.models import Customer
 from app.helpers import login, create_customer
 from app.core.enums import StatusEnum
+from app.core.shared_counters import shared_counters
 
 #------- TEST CRUD CUSTOMERS -------#
 def test_create_customer_success(client):
@@ -173,4 +174,49 @@ def test_list_customers_paginated(
     # comportamiento esperado
     assert body["page"] == 1
     assert body["size"] == 1
-    assert len(body["items"]) <= 1
\ No newline at end of file
+    assert len(body["items"]) <= 1
+
+def test_read_me_etag_follows_profile_changes(client, customer_with_credentials):
+    c = customer_with_credentials
+    token = login(client, c["email"], c["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.get("/customers/me", headers=headers)
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    cached = client.get("/customers/me", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+    client.patch("/customers/me", headers=headers, json={"first_name": "Pablo"})
+    changed = client.get("/customers/me", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed.json()["first_name"] == "Pablo"
+
+
+def test_read_me_cache_is_per_user(client, customer_with_credentials):
+    c = customer_with_credentials
+    create_customer(client, first_name="Ana", email="ana@example.com")
+    pepe = {"Authorization": f"Bearer {login(client, c['email'], c['password'])}"}
+    ana = {"Authorization": f"Bearer {login(client, 'ana@example.com', 'password123')}"}
+    hits, misses = shared_counters.get("response_cache.hit"), shared_counters.get("response_cache.miss")
+
+    assert client.get("/customers/me", headers=pepe).headers["x-cache"] == "MISS"
+    assert client.get("/customers/me", headers=pepe).headers["x-cache"] == "HIT"
+
+    response = client.get("/customers/me", headers=ana)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["first_name"] == "Ana"
+    assert shared_counters.get("response_cache.hit") - hits == 1
+    assert shared_counters.get("response_cache.miss") - misses == 2
+
+
+def test_read_me_cache_is_dropped_when_the_customer_is_deactivated(client, customer_with_credentials):
+    c = customer_with_credentials
+    headers = {"Authorization": f"Bearer {login(client, c['email'], c['password'])}"}
+    client.get("/customers/me", headers=headers)
+
+    client.delete("/customers/me/deactivate", headers=headers)
+
+    response = client.get("/customers/me", headers=headers)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["status"] == StatusEnum.INACTIVE.value
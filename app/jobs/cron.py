@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (mínimo, máximo) de cada campo: minuto, hora, día del mes, mes, día de la semana
+FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+# Hasta dónde se busca la próxima ejecución antes de declarar la expresión imposible
+MAX_SEARCH = timedelta(days=366 * 5)
+
+
+def parse_field(expression: str, minimum: int, maximum: int) -> frozenset[int]:
+    """
+    Valores de un campo cron: `*`, `5`, `1-5`, `*/15`, `10-50/20` y listas
+    separadas por coma.
+    """
+    values = set()
+    for part in expression.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Paso inválido en '{expression}'")
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            # `5/10` es "desde 5, cada 10" hasta el final del rango
+            end = maximum if step > 1 else start
+        if not minimum <= start <= end <= maximum:
+            raise ValueError(f"'{expression}' fuera de rango ({minimum}-{maximum})")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronSpec:
+    """
+    Expresión cron de cinco campos (minuto hora día mes día-de-semana), en UTC.
+
+    Como en cron, si se restringen tanto el día del mes como el de la semana
+    alcanza con que coincida uno de los dos.
+    """
+    expression: str
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> "CronSpec":
+        fields = ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"La expresión cron '{expression}' debe tener 5 campos")
+        minutes, hours, days, months, weekdays = (
+            parse_field(field, minimum, maximum)
+            for field, (minimum, maximum) in zip(fields, FIELDS)
+        )
+        return cls(
+            expression=expression,
+            minutes=minutes,
+            hours=hours,
+            days=days,
+            months=months,
+            # 0 y 7 son domingo
+            weekdays=frozenset(day % 7 for day in weekdays),
+            any_day=fields[2] == "*",
+            any_weekday=fields[4] == "*",
+        )
+
+    def matches_day(self, moment: datetime) -> bool:
+        day_matches = moment.day in self.days
+        # datetime.weekday(): lunes=0; en cron domingo=0
+        weekday_matches = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Primer minuto posterior a `moment` que cumple la expresión.
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + MAX_SEARCH
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                # Saltar al primer día del mes siguiente
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"La expresión cron '{self.expression}' no tiene próximas ejecuciones")
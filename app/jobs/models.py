@@ -0,0 +1,32 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime, timezone
+from app.core.enums import JobStatusEnum
+
+
+class JobLease(SQLModel, table=True):
+    """
+    Una fila por job: quién lo está corriendo, hasta cuándo y qué ejecución
+    programada tomó. Es el lock que comparten todos los workers.
+    """
+    name: str = Field(primary_key=True, max_length=100)
+    owner: str | None = Field(default=None, max_length=200)
+    expires_at: datetime
+    # Ejecución programada (minuto cron) que tomó el último dueño
+    slot: datetime | None = None
+
+
+class JobRun(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+
+    name: str = Field(max_length=100, index=True, nullable=False)
+    owner: str = Field(max_length=200, nullable=False)
+
+    scheduled_for: datetime
+    started_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    finished_at: datetime | None = None
+    duration_ms: float | None = None
+
+    status: JobStatusEnum = Field(default=JobStatusEnum.RUNNING)
+    detail: str | None = None
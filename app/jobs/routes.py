@@ -0,0 +1,136 @@
+from fastapi import APIRouter, status, HTTPException, Depends
+from typing import Optional
+from fastapi_pagination import Page
+from fastapi_pagination.ext.sqlmodel import paginate
+from sqlmodel import select, desc, func
+from datetime import datetime, timezone
+from app.core.database import SessionDep
+from app.core.instrumentation import TimedRoute
+from app.core.pagination import DefaultPagination
+from app.jobs.models import JobRun
+from app.jobs.schemas import JobRead, JobRunRead
+from app.jobs.scheduler import scheduler
+from app.auth.dependencies import check_admin
+from app.auth.models import User
+import app.jobs.tasks  # noqa: F401  (registra los jobs en el scheduler)
+
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    route_class=TimedRoute
+)
+
+
+@router.get(
+    "/",
+    response_model=list[JobRead],
+    status_code=status.HTTP_200_OK,
+    summary="Listar jobs programados",
+    description="""
+    Devuelve los jobs registrados en el scheduler con su expresión cron (UTC),
+    la próxima ejecución y el resultado de la última.
+
+    - Solo accesible por administradores.
+    """,
+    responses={
+        200: {"description": "Jobs obtenidos correctamente"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+    },
+)
+def list_jobs(
+    session: SessionDep,
+    admin: User = Depends(check_admin),
+):
+    latest = (
+        select(func.max(JobRun.id))
+        .where(JobRun.name.in_(list(scheduler.jobs)))
+        .group_by(JobRun.name)
+    )
+    last_runs = {
+        run.name: run
+        for run in session.exec(select(JobRun).where(JobRun.id.in_(latest))).all()
+    }
+    now = datetime.now(timezone.utc)
+
+    return [
+        JobRead(
+            name=name,
+            cron=job.cron.expression,
+            next_run=job.cron.next_after(now),
+            last_run=last_runs.get(name),
+        )
+        for name, job in scheduler.jobs.items()
+    ]
+
+
+@router.get(
+    "/runs",
+    response_model=Page[JobRunRead],
+    status_code=status.HTTP_200_OK,
+    summary="Historial de ejecuciones",
+    description="""
+    Devuelve un listado paginado de las ejecuciones de jobs, más recientes
+    primero, con su duración, estado y resumen del resultado.
+
+    - Solo accesible por administradores.
+    - Permite filtrar por job con `name`.
+    """,
+    responses={
+        200: {"description": "Historial obtenido correctamente"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+    },
+)
+def list_job_runs(
+    session: SessionDep,
+    name: Optional[str] = None,
+    admin: User = Depends(check_admin),
+    params: DefaultPagination = Depends(),
+):
+    query = select(JobRun)
+
+    if name is not None:
+        query = query.where(JobRun.name == name)
+
+    query = query.order_by(desc(JobRun.id))
+    return paginate(session, query, params)
+
+
+@router.post(
+    "/{name}/run",
+    response_model=JobRunRead,
+    status_code=status.HTTP_200_OK,
+    summary="Ejecutar un job ahora",
+    description="""
+    Ejecuta el job indicado fuera de su horario y devuelve la ejecución.
+
+    - Solo accesible por administradores.
+    - Respeta el lease: si otro worker lo está corriendo responde 409.
+    - No cuenta como ejecución programada: la del próximo minuto cron corre igual.
+    """,
+    responses={
+        200: {"description": "Job ejecutado (ver `status` para el resultado)"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+        404: {"description": "Job no encontrado"},
+        409: {"description": "El job ya se está ejecutando"},
+    },
+)
+async def run_job(
+    name: str,
+    admin: User = Depends(check_admin),
+):
+    job = scheduler.jobs.get(name)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+
+    run = await scheduler.execute(job)
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El job ya se está ejecutando"
+        )
+
+    return run
@@ -0,0 +1,195 @@
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from sqlalchemy import Engine, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from app.core.config import SCHEDULER_ENABLED, SCHEDULER_JITTER_SECONDS, JOB_LEASE_SECONDS
+from app.core.database import engine
+from app.core.enums import JobStatusEnum
+from app.core.metrics import registry
+from app.jobs.cron import CronSpec
+from app.jobs.models import JobLease, JobRun
+
+logger = logging.getLogger(__name__)
+
+job_runs_total = registry.counter(
+    "job_runs_total",
+    "Ejecuciones de jobs programados en este worker",
+    labels=("job", "status"),
+)
+job_duration_seconds = registry.histogram(
+    "job_duration_seconds",
+    "Duración de los jobs programados",
+    labels=("job",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+
+
+@dataclass
+class Job:
+    name: str
+    cron: CronSpec
+    func: Callable[[], object]
+    jitter: float = SCHEDULER_JITTER_SECONDS
+    lease_seconds: float = JOB_LEASE_SECONDS
+    next_run: datetime | None = None
+
+
+def describe_result(result) -> str | None:
+    """
+    Resumen del valor devuelto por un job para el historial (JSON si es un dataclass).
+    """
+    if result is None:
+        return None
+    if dataclasses.is_dataclass(result):
+        return json.dumps(dataclasses.asdict(result), default=str)
+    return str(result)
+
+
+class Scheduler:
+    """
+    Scheduler de tareas periódicas dentro del event loop de cada worker.
+
+    Cada job duerme hasta su próximo minuto cron (más un azar de hasta
+    `jitter` segundos, para no despertar todos los workers juntos) y corre en
+    un hilo aparte. Antes de correr toma el lease del job en la base: de todos
+    los workers que despiertan para la misma ejecución, solo uno la hace.
+    Cada ejecución queda en `JobRun`.
+    """
+
+    def __init__(self, db_engine: Engine = engine, enabled: bool = SCHEDULER_ENABLED):
+        self.engine = db_engine
+        self.enabled = enabled
+        self.jobs: dict[str, Job] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def owner(self) -> str:
+        # Se calcula en cada uso: después del fork cada worker tiene su PID
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def add(self, name: str, cron: str, func: Callable[[], object], **options) -> Job:
+        job = Job(name=name, cron=CronSpec.parse(cron), func=func, **options)
+        self.jobs[name] = job
+        return job
+
+    def acquire(self, job: Job, slot: datetime | None) -> bool:
+        """
+        Toma el lease de `job` para la ejecución `slot`. Falla si otro worker
+        lo tiene vigente o si esa ejecución ya la tomó alguien.
+
+        Con `slot=None` (ejecución manual) solo se respeta el lease vigente:
+        no se anota ningún minuto cron, así que no adelanta ni suprime la
+        próxima ejecución programada.
+        """
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=job.lease_seconds)
+        conditions = [JobLease.name == job.name, JobLease.expires_at < now]
+        values = {"owner": self.owner, "expires_at": expires_at}
+        if slot is not None:
+            conditions.append(or_(JobLease.slot == None, JobLease.slot < slot))
+            values["slot"] = slot
+        with Session(self.engine) as session:
+            taken = session.execute(
+                update(JobLease).where(*conditions).values(**values)
+            ).rowcount
+            if taken:
+                session.commit()
+                return True
+            if session.get(JobLease, job.name) is not None:
+                return False
+
+            # Primera ejecución del job: la fila se crea, y si dos workers
+            # la insertan a la vez la clave primaria deja pasar a uno
+            session.add(JobLease(name=job.name, owner=self.owner, expires_at=expires_at, slot=slot))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return False
+        return True
+
+    def release(self, job: Job) -> None:
+        with Session(self.engine) as session:
+            session.execute(
+                update(JobLease)
+                .where(JobLease.name == job.name, JobLease.owner == self.owner)
+                .values(expires_at=datetime.now(timezone.utc))
+            )
+            session.commit()
+
+    def run(self, job: Job, slot: datetime | None = None) -> JobRun | None:
+        """
+        Corre `job` si consigue el lease y registra la ejecución. Devuelve
+        None si otro worker la tomó. Sin `slot` es una ejecución manual.
+        """
+        if not self.acquire(job, slot):
+            logger.debug("El job %s (%s) lo tomó otro worker", job.name, slot or "manual")
+            return None
+
+        with Session(self.engine, expire_on_commit=False) as session:
+            run = JobRun(name=job.name, owner=self.owner, scheduled_for=slot or datetime.now(timezone.utc))
+            session.add(run)
+            session.commit()
+
+            start = time.perf_counter()
+            try:
+                run.detail = describe_result(job.func())
+                run.status = JobStatusEnum.SUCCESS
+            except Exception as exc:
+                logger.exception("Falló el job %s", job.name)
+                run.detail = f"{type(exc).__name__}: {exc}"
+                run.status = JobStatusEnum.FAILED
+            finally:
+                elapsed = time.perf_counter() - start
+                run.duration_ms = round(elapsed * 1000, 2)
+                run.finished_at = datetime.now(timezone.utc)
+                session.add(run)
+                session.commit()
+                self.release(job)
+
+        job_runs_total.inc(job.name, run.status.value)
+        job_duration_seconds.observe(elapsed, job.name)
+        logger.info("Job %s: %s en %.0f ms", job.name, run.status.value, run.duration_ms)
+        return run
+
+    async def execute(self, job: Job, slot: datetime | None = None) -> JobRun | None:
+        # Fuera del threadpool de AnyIO: un job largo no le quita hilos a los requests
+        return await asyncio.to_thread(self.run, job, slot)
+
+    async def _loop(self, job: Job) -> None:
+        while True:
+            now = datetime.now(timezone.utc)
+            job.next_run = job.cron.next_after(now)
+            delay = (job.next_run - now).total_seconds() + random.uniform(0, job.jitter)
+            await asyncio.sleep(delay)
+            try:
+                await self.execute(job, job.next_run)
+            except Exception:
+                logger.exception("No se pudo ejecutar el job %s", job.name)
+
+    def start(self) -> None:
+        if not self.enabled or self._tasks:
+            return
+        self._tasks = [
+            asyncio.get_running_loop().create_task(self._loop(job), name=f"job:{name}")
+            for name, job in self.jobs.items()
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+scheduler = Scheduler()
@@ -0,0 +1,23 @@
+from sqlmodel import SQLModel
+from typing import Optional
+from datetime import datetime
+from app.core.enums import JobStatusEnum
+
+
+class JobRunRead(SQLModel):
+    id: int
+    name: str
+    owner: str
+    scheduled_for: datetime
+    started_at: datetime
+    finished_at: Optional[datetime]
+    duration_ms: Optional[float]
+    status: JobStatusEnum
+    detail: Optional[str]
+
+
+class JobRead(SQLModel):
+    name: str
+    cron: str
+    next_run: Optional[datetime]
+    last_run: Optional[JobRunRead]
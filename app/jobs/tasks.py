@@ -0,0 +1,55 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Engine, delete
+from sqlmodel import Session
+from app.core.config import (
+    ATTENDANCE_SWEEP_CRON,
+    DB_MAINTENANCE_CRON,
+    JOB_RUNS_RETENTION_DAYS,
+    MEMBERSHIP_ROLLOVER_CRON,
+)
+from app.core.database import engine
+from app.attendances.jobs import run_attendance_sweep
+from app.customermemberships.jobs import run_membership_rollover
+from app.jobs.models import JobRun
+from app.jobs.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def prune_job_runs(db_engine: Engine = engine, retention_days: int = JOB_RUNS_RETENTION_DAYS) -> int:
+    """
+    Borra el historial de ejecuciones más viejo que `retention_days`.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    with Session(db_engine) as session:
+        deleted = session.execute(delete(JobRun).where(JobRun.started_at < cutoff)).rowcount
+        session.commit()
+    return deleted
+
+
+def analyze_database(db_engine: Engine = engine) -> str:
+    """
+    Actualiza las estadísticas del planificador: `PRAGMA optimize` en SQLite
+    (corre ANALYZE solo sobre las tablas que lo necesitan) y `VACUUM (ANALYZE)`
+    en PostgreSQL, que no puede correr dentro de una transacción.
+    """
+    if db_engine.dialect.name == "sqlite":
+        statement = "PRAGMA optimize"
+    else:
+        statement = "VACUUM (ANALYZE)"
+    with db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql(statement)
+    return statement
+
+
+def run_database_maintenance(db_engine: Engine = engine) -> dict:
+    return {
+        "analyze": analyze_database(db_engine),
+        "job_runs_pruned": prune_job_runs(db_engine),
+    }
+
+
+scheduler.add("membership-rollover", MEMBERSHIP_ROLLOVER_CRON, run_membership_rollover)
+scheduler.add("attendance-sweep", ATTENDANCE_SWEEP_CRON, run_attendance_sweep)
+scheduler.add("database-maintenance", DB_MAINTENANCE_CRON, run_database_maintenance)
@@ -0,0 +1,41 @@
+import pytest
+from datetime import datetime, timezone
+from app.jobs.cron import CronSpec, parse_field
+
+
+def test_parse_field_supports_ranges_lists_and_steps():
+    assert parse_field("*/15", 0, 59) == {0, 15, 30, 45}
+    assert parse_field("1-5", 0, 7) == {1, 2, 3, 4, 5}
+    assert parse_field("10-50/20,3", 0, 59) == {3, 10, 30, 50}
+    assert parse_field("5/20", 0, 59) == {5, 25, 45}
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSpec.parse(expression)
+
+def test_next_after_daily_time():
+    spec = CronSpec.parse("5 0 * * *")
+    moment = datetime(2026, 10, 19, 10, 30, tzinfo=timezone.utc)
+
+    assert spec.next_after(moment) == datetime(2026, 10, 20, 0, 5, tzinfo=timezone.utc)
+
+def test_next_after_skips_to_next_month_and_year():
+    spec = CronSpec.parse("@monthly")
+
+    assert spec.next_after(datetime(2026, 12, 1, 0, 0)) == datetime(2027, 1, 1, 0, 0)
+
+def test_day_of_month_or_weekday_when_both_are_restricted():
+    # Día 15 o cualquier domingo, como en cron
+    spec = CronSpec.parse("0 12 15 * 0")
+
+    # 2026-10-19 es lunes: primero llega el domingo 25; el 15 de diciembre es martes
+    assert spec.next_after(datetime(2026, 10, 19)) == datetime(2026, 10, 25, 12, 0)
+    assert spec.next_after(datetime(2026, 12, 14, 13)) == datetime(2026, 12, 15, 12, 0)
+
+def test_sunday_can_be_zero_or_seven():
+    assert CronSpec.parse("0 0 * * 7").weekdays == CronSpec.parse("0 0 * * 0").weekdays == {0}
+
+def test_impossible_expression_has_no_next_run():
+    with pytest.raises(ValueError):
+        CronSpec.parse("0 0 31 2 *").next_after(datetime(2026, 1, 1))
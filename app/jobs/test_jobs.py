@@ -0,0 +1,145 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi import status
+from app.core.enums import JobStatusEnum
+from app.helpers import login
+from app.jobs.models import JobLease
+from app.jobs.cron import CronSpec
+from app.jobs.scheduler import Job, Scheduler, scheduler, job_runs_total
+from app.jobs.tasks import analyze_database, prune_job_runs
+from app.customermemberships.services import RolloverResult
+
+SLOT = datetime(2026, 11, 1, 0, 5, tzinfo=timezone.utc)
+
+
+class OtherWorker(Scheduler):
+    owner = "other-host:2"
+
+
+@pytest.fixture(name="worker")
+def worker_fixture(session):
+    return Scheduler(session.get_bind(), enabled=True)
+
+def test_run_records_success_with_result_and_releases_lease(worker, session):
+    job = worker.add("rollover", "5 0 * * *", lambda: RolloverResult(today=SLOT.date(), rows={"expired": 3}))
+
+    run = worker.run(job, SLOT)
+
+    assert run.status == JobStatusEnum.SUCCESS
+    assert run.duration_ms >= 0
+    assert json.loads(run.detail)["rows"] == {"expired": 3}
+    lease = session.get(JobLease, "rollover")
+    assert lease.owner == worker.owner
+    assert lease.expires_at <= datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=1)
+
+def test_only_one_worker_takes_each_scheduled_run(worker, session):
+    other = OtherWorker(session.get_bind())
+    job = worker.add("sweep", "0 23 * * *", lambda: None)
+    other_job = other.add("sweep", "0 23 * * *", lambda: None)
+
+    assert worker.acquire(job, SLOT) is True
+    # Lease vigente
+    assert other.acquire(other_job, SLOT) is False
+    worker.release(job)
+    # Lease libre, pero esa ejecución ya la hizo otro
+    assert other.acquire(other_job, SLOT) is False
+    assert other.acquire(other_job, SLOT + timedelta(days=1)) is True
+
+def test_manual_run_does_not_take_the_scheduled_slot(worker, session):
+    other = OtherWorker(session.get_bind())
+    job = worker.add("sweep", "0 23 * * *", lambda: None)
+    other_job = other.add("sweep", "0 23 * * *", lambda: None)
+    assert worker.run(job, SLOT) is not None
+
+    manual = other.run(other_job)
+
+    assert manual is not None
+    assert session.get(JobLease, "sweep").slot == SLOT.replace(tzinfo=None)
+    assert worker.run(job, SLOT + timedelta(days=1)) is not None
+
+def test_manual_run_waits_for_the_current_lease(worker, session):
+    other = OtherWorker(session.get_bind())
+    job = worker.add("sweep", "0 23 * * *", lambda: None)
+    other_job = other.add("sweep", "0 23 * * *", lambda: None)
+
+    assert worker.acquire(job, SLOT) is True
+    assert other.run(other_job) is None
+    worker.release(job)
+    assert other.acquire(other_job, None) is True
+    # El lease de la manual sigue vigente: la programada no se pisa con ella
+    assert worker.acquire(job, SLOT + timedelta(days=1)) is False
+
+def test_failed_job_is_recorded_and_counted(worker):
+    def broken():
+        raise RuntimeError("sin conexión")
+
+    job = worker.add("broken", "@hourly", broken)
+    before = dict(job_runs_total._values).get(("broken", "failed"), 0)
+
+    run = worker.run(job, SLOT)
+
+    assert run.status == JobStatusEnum.FAILED
+    assert run.detail == "RuntimeError: sin conexión"
+    assert job_runs_total._values[("broken", "failed")] == before + 1
+
+def test_start_and_stop_schedule_one_task_per_job(worker):
+    worker.add("a", "@daily", lambda: None)
+    worker.add("b", "@hourly", lambda: None)
+
+    async def lifecycle():
+        worker.start()
+        await asyncio.sleep(0)
+        names = sorted(task.get_name() for task in worker._tasks)
+        await worker.stop()
+        return names
+
+    assert asyncio.run(lifecycle()) == ["job:a", "job:b"]
+    assert worker._tasks == []
+    assert worker.jobs["a"].next_run is not None
+
+def test_maintenance_analyzes_and_prunes_old_runs(worker, session):
+    job = worker.add("old", "@daily", lambda: None)
+    run = worker.run(job, SLOT)
+    run.started_at = datetime.now(timezone.utc) - timedelta(days=90)
+    session.add(run)
+    session.commit()
+
+    assert analyze_database(session.get_bind())
+    assert prune_job_runs(session.get_bind(), retention_days=30) == 1
+
+def test_admin_lists_jobs_and_runs_one_on_demand(client, admin_user, session, monkeypatch):
+    monkeypatch.setattr(scheduler, "engine", session.get_bind())
+    monkeypatch.setitem(scheduler.jobs, "ping", Job("ping", CronSpec.parse("@daily"), lambda: "pong"))
+    token = login(client, admin_user["email"], admin_user["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    run = client.post("/jobs/ping/run", headers=headers)
+    jobs = client.get("/jobs/", headers=headers)
+    runs = client.get("/jobs/runs?name=ping", headers=headers)
+
+    assert run.status_code == status.HTTP_200_OK
+    assert run.json()["status"] == "success"
+    assert run.json()["detail"] == "pong"
+    assert session.get(JobLease, "ping").slot is None
+    by_name = {job["name"]: job for job in jobs.json()}
+    assert {"membership-rollover", "attendance-sweep", "database-maintenance", "ping"} <= set(by_name)
+    assert by_name["ping"]["last_run"]["id"] == run.json()["id"]
+    assert by_name["membership-rollover"]["last_run"] is None
+    assert [item["id"] for item in runs.json()["items"]] == [run.json()["id"]]
+
+def test_jobs_endpoints_are_only_for_admin(client, customer_with_credentials):
+    c = customer_with_credentials
+    token = login(client, c["email"], c["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/jobs/", headers=headers).status_code == status.HTTP_403_FORBIDDEN
+    assert client.post("/jobs/membership-rollover/run", headers=headers).status_code == status.HTTP_403_FORBIDDEN
+
+def test_run_unknown_job_returns_404(client, admin_user):
+    token = login(client, admin_user["email"], admin_user["password"])
+
+    response = client.post("/jobs/nope/run", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
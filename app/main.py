@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi_pagination import add_pagination
 from app.customers import routes as customers_router
 from app.memberships import routes as memberships_router
@@ -7,12 +9,65 @@ from app.attendances import routes as attendances_router
 from app.shop import routes as shop_router
 from app.redemptions import routes as redemptions_router
 from app.auth import routes as auth_router
+from app.monitoring import routes as monitoring_router
+from app.jobs import routes as jobs_router
+from app.monitoring.dependencies import profile_request
+from app.warmup import warm_up
+from app.openapi import setup_docs
+from app.core.config import LOG_LEVEL, METRICS_ENABLED
+from app.core.cache import invalidation_bus
+from app.jobs.scheduler import scheduler
+from app.attendances.occupancy import occupancy
+from app.core.database import report_database_settings, wal_checkpointer, replica_engine
+from app.core.instrumentation import RequestStatsMiddleware, slow_query_log
+from app.core.profiling import continuous_sampler
+from app.core.loop_monitor import configure_threadpool, loop_monitor
+from app.core.metrics import MetricsMiddleware
 import app.models
 
-app = FastAPI()
+logging.basicConfig(level=LOG_LEVEL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    report_database_settings()
+    if replica_engine is not None:
+        report_database_settings(replica_engine)
+    configure_threadpool()
+    warm_up(app)
+    invalidation_bus.start()
+    wal_checkpointer.start()
+    slow_query_log.start()
+    continuous_sampler.start()
+    loop_monitor.start()
+    scheduler.start()
+    occupancy.start()
+    yield
+    await occupancy.stop()
+    await scheduler.stop()
+    loop_monitor.stop()
+    continuous_sampler.stop()
+    slow_query_log.stop()
+    wal_checkpointer.stop()
+    invalidation_bus.stop()
+
+
+# Cualquier request puede pedir un perfil (solo admins, ver profile_request)
+app = FastAPI(
+    lifespan=lifespan,
+    dependencies=[Depends(profile_request)],
+    # La documentación la registra setup_docs, desde el esquema precalculado
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
+)
 
 add_pagination(app)
 
+app.add_middleware(RequestStatsMiddleware)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 app.include_router(customers_router.router)
 app.include_router(memberships_router.router)
@@ -21,7 +76,14 @@ app.include_router(attendances_router.router)
 app.include_router(shop_router.router)
 app.include_router(redemptions_router.router)
 app.include_router(auth_router.router)
+app.include_router(monitoring_router.router)
+app.include_router(jobs_router.router)
+app.include_router(monitoring_router.health_router)
+if METRICS_ENABLED:
+    app.include_router(monitoring_router.metrics_router)
+
+setup_docs(app)
 
 @app.get("/")
 async def root():
-    return {"Mensaje": "Bienvenido"}
\ No newline at end of file
+    return {"Mensaje": "Bienvenido"}
@@ -0,0 +1,115 @@
+import threading
+import time
+from sqlmodel import Session, select
+from app.core.config import CATALOG_CACHE_TTL_SECONDS
+from app.core.cache import invalidation_bus
+from app.core.database import on_commit_of
+from app.core.enums import StatusEnum
+from app.core.http_cache import make_etag
+from app.core.response_cache import invalidate_on_commit
+from app.memberships.models import Membership
+from app.memberships.schemas import MembershipRead
+
+
+def record_values(record: MembershipRead) -> tuple:
+    return tuple(record.model_dump().values())
+
+
+class MembershipCatalog:
+    """
+    Copia en memoria del catálogo de membresías.
+
+    La tabla cambia pocas veces al año y se lee en cada apertura de la app,
+    así que se carga entera y se sirve desde memoria hasta que cambie su
+    versión: cualquier commit que escriba una `Membership` la incrementa.
+    La recarga ocurre en el primer request posterior, con la sesión de ese request.
+    """
+
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.version = 0
+        self._loaded_version: int | None = None
+        self._loaded_at = 0.0
+        self._all: tuple[MembershipRead, ...] = ()
+        self._active: tuple[MembershipRead, ...] = ()
+        self._by_id: dict[int, MembershipRead] = {}
+        # Huella del contenido cargado: base de los ETag de los listados
+        self.fingerprint = make_etag()
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    def is_stale(self) -> bool:
+        return (
+            self._loaded_version != self.version
+            or time.monotonic() - self._loaded_at > self.ttl
+        )
+
+    def load(self, session: Session) -> None:
+        with self._lock:
+            version = self.version
+
+        memberships = session.exec(select(Membership).order_by(Membership.id)).all()
+        records = tuple(MembershipRead.model_validate(m) for m in memberships)
+
+        with self._lock:
+            self._all = records
+            self._active = tuple(r for r in records if r.status == StatusEnum.ACTIVE)
+            self._by_id = {r.id: r for r in records}
+            self.fingerprint = make_etag(*(record_values(r) for r in records))
+            # Si hubo una invalidación durante la carga, la próxima lectura recarga
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self, session: Session) -> None:
+        if self.is_stale():
+            self.load(session)
+
+    def list(
+        self,
+        session: Session,
+        include_inactive: bool = False,
+        status: StatusEnum | None = None,
+        search: str | None = None,
+    ) -> list[MembershipRead]:
+        """
+        Vista pública (solo activas) o de administrador (todas, filtrables por estado).
+        """
+        self._ensure_loaded(session)
+        records = self._all if include_inactive else self._active
+
+        if include_inactive and status:
+            records = [r for r in records if r.status == status]
+        if search:
+            needle = search.casefold()
+            records = [r for r in records if needle in r.name.casefold()]
+
+        return list(records)
+
+    def get(
+        self,
+        session: Session,
+        membership_id: int,
+        include_inactive: bool = False,
+    ) -> MembershipRead | None:
+        self._ensure_loaded(session)
+        record = self._by_id.get(membership_id)
+        if record is None:
+            return None
+        if not include_inactive and record.status != StatusEnum.ACTIVE:
+            return None
+        return record
+
+
+membership_catalog = MembershipCatalog()
+invalidation_bus.register("catalog:memberships", membership_catalog.invalidate)
+
+
+@on_commit_of(Membership)
+def _invalidate_membership_catalog():
+    invalidation_bus.publish("catalog:memberships")
+
+
+invalidate_on_commit(Membership, "catalog:memberships", "membership:{id}")
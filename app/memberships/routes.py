@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from sqlmodel import select
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from sqlalchemy.exc import IntegrityError
 from app.memberships.schemas import MembershipRead, MembershipCreate, MembershipUpdate
 from app.memberships.models import Membership
+from app.memberships.cache import membership_catalog, record_values
 from app.core.database import SessionDep
+from app.core.instrumentation import TimedRoute
+from app.core.response_cache import cache_response
 from app.core.enums import RoleEnum, StatusEnum
+from app.core.http_cache import conditional_response, make_etag, PUBLIC_CATALOG_CACHE, PRIVATE_CACHE
 from app.auth.dependencies import check_admin, get_current_user_optional
 from app.auth.models import User
 
@@ -12,7 +15,8 @@ from app.auth.models import User
 
 router = APIRouter(
     prefix="/memberships",
-    tags=["memberships"]
+    tags=["memberships"],
+    route_class=TimedRoute
 )
 
 @router.post(
@@ -70,31 +74,46 @@ def create_membership(
     Filtros:
     - `status`: filtra por estado (solo para administradores).
     - `search`: filtra por nombre de la membresía.
+
+    Se sirve desde el catálogo en memoria, que se recarga cuando una
+    membresía se crea, modifica o desactiva. Devuelve `ETag`; con
+    `If-None-Match` vigente responde 304 sin cuerpo.
     """,
     responses={
         200: {"description": "Lista de membresías obtenida correctamente"},
+        304: {"description": "Sin cambios desde el ETag enviado"},
         401: {"description": "No autenticado"},
         403: {"description": "No autorizado"},
     },
 )
+@cache_response(tags=("catalog:memberships",))
 def list_memberships(
+    request: Request,
+    response: Response,
     session: SessionDep,
     status: StatusEnum | None = None,
     search: str | None = None,
     current_user: User | None = Depends(get_current_user_optional),
 ):
-    query = select(Membership)
+    is_admin = bool(current_user and current_user.role == RoleEnum.ADMIN)
 
-    if current_user and current_user.role == RoleEnum.ADMIN:
-        if status:
-            query = query.where(Membership.status == status)
-    else:
-        query = query.where(Membership.status == StatusEnum.ACTIVE)
+    memberships = membership_catalog.list(
+        session,
+        include_inactive=is_admin,
+        status=status,
+        search=search,
+    )
 
-    if search:
-        query = query.where(Membership.name.ilike(f"%{search}%"))
+    not_modified = conditional_response(
+        request,
+        response,
+        make_etag(membership_catalog.fingerprint, is_admin, status, search),
+        PRIVATE_CACHE if is_admin else PUBLIC_CATALOG_CACHE,
+    )
+    if not_modified:
+        return not_modified
 
-    return session.exec(query).all()
+    return memberships
 
 
 @router.get(
@@ -115,23 +134,28 @@ def list_memberships(
     """,
     responses={
         200: {"description": "Membresía obtenida correctamente"},
+        304: {"description": "Sin cambios desde el ETag enviado"},
         401: {"description": "No autenticado"},
         403: {"description": "No autorizado"},
         404: {"description": "Membresía no encontrada"},
     },
 )
+@cache_response(tags=("catalog:memberships", "membership:{membership_id}"))
 def read_membership(
     membership_id: int,
+    request: Request,
+    response: Response,
     session: SessionDep,
     include_inactive: bool = False,
     current_user: User | None = Depends(get_current_user_optional),
 ):
-    query = select(Membership).where(Membership.id == membership_id)
-
-    if not (current_user and current_user.role == RoleEnum.ADMIN and include_inactive):
-        query = query.where(Membership.status == StatusEnum.ACTIVE)
+    is_admin = bool(current_user and current_user.role == RoleEnum.ADMIN)
 
-    membership = session.exec(query).first()
+    membership = membership_catalog.get(
+        session,
+        membership_id,
+        include_inactive=is_admin and include_inactive,
+    )
 
     if not membership:
         raise HTTPException(
@@ -139,6 +163,15 @@ def read_membership(
             detail="Membresía no encontrada"
         )
 
+    not_modified = conditional_response(
+        request,
+        response,
+        make_etag(*record_values(membership)),
+        PRIVATE_CACHE if is_admin else PUBLIC_CATALOG_CACHE,
+    )
+    if not_modified:
+        return not_modified
+
     return membership
 
 
@@ -1,5 +1,6 @@
 from fastapi import status
 from app.memberships.models import Membership
+from app.memberships.cache import membership_catalog
 from app.helpers import login
 from app.core.enums import StatusEnum
 
@@ -96,4 +97,86 @@ def test_delete_membership(client, session, admin_user, membership):
     assert response_delete.status_code == status.HTTP_204_NO_CONTENT
 
     deleted_membership = session.get(Membership, membership_id)
-    assert deleted_membership.status == StatusEnum.INACTIVE
\ No newline at end of file
+    assert deleted_membership.status == StatusEnum.INACTIVE
+
+def test_membership_catalog_is_served_from_memory(client, membership, assert_max_statements):
+    client.get("/memberships/")
+
+    with assert_max_statements(0):
+        listed = client.get("/memberships/")
+        read = client.get(f"/memberships/{membership['id']}")
+
+    assert [m["id"] for m in listed.json()] == [membership["id"]]
+    assert read.json()["name"] == membership["name"]
+
+
+def test_membership_catalog_is_reloaded_after_changes(client, admin_user, membership):
+    token = login(client, admin_user["email"], admin_user["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+    assert len(client.get("/memberships/").json()) == 1
+
+    client.patch(f"/memberships/{membership['id']}", headers=headers, json={"max_days_per_week": 2})
+    assert client.get(f"/memberships/{membership['id']}").json()["max_days_per_week"] == 2
+
+    client.delete(f"/memberships/{membership['id']}/deactivate", headers=headers)
+    assert client.get("/memberships/").json() == []
+    assert client.get(f"/memberships/{membership['id']}").status_code == status.HTTP_404_NOT_FOUND
+
+    admin_view = client.get(
+        f"/memberships/{membership['id']}",
+        params={"include_inactive": True},
+        headers=headers,
+    )
+    assert admin_view.json()["status"] == StatusEnum.INACTIVE
+
+
+def test_membership_catalog_search_and_admin_status_filter(client, admin_user, membership):
+    token = login(client, admin_user["email"], admin_user["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+    basic = client.post(
+        "/memberships/",
+        headers=headers,
+        json={"name": "Basic", "max_days_per_week": 2, "points_multiplier": 1},
+    ).json()
+    client.delete(f"/memberships/{basic['id']}/deactivate", headers=headers)
+
+    public = client.get("/memberships/", params={"search": "PREM"}).json()
+    public_basic = client.get("/memberships/", params={"search": "basic"}).json()
+    inactive = client.get("/memberships/", params={"status": "inactive"}, headers=headers).json()
+
+    assert [m["id"] for m in public] == [membership["id"]]
+    assert public_basic == []
+    assert [m["id"] for m in inactive] == [basic["id"]]
+
+
+def test_membership_catalog_version_changes_only_on_commit(session):
+    version = membership_catalog.version
+    session.add(Membership(name="Gold", max_days_per_week=3, points_multiplier=2))
+    session.flush()
+    session.rollback()
+    assert membership_catalog.version == version
+
+    session.add(Membership(name="Gold", max_days_per_week=3, points_multiplier=2))
+    session.commit()
+    assert membership_catalog.version == version + 1
+
+
+def test_read_membership_returns_304_for_current_etag(client, membership):
+    first = client.get(f"/memberships/{membership['id']}")
+
+    cached = client.get(
+        f"/memberships/{membership['id']}",
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached.headers["cache-control"].startswith("public")
+
+def test_invalid_token_bypasses_cached_public_catalog(client, membership):
+    assert client.get("/memberships/").headers["x-cache"] == "MISS"
+    assert client.get("/memberships/").headers["x-cache"] == "HIT"
+
+    response = client.get("/memberships/", headers={"Authorization": "Bearer no-es-un-jwt"})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert "x-cache" not in response.headers
@@ -4,4 +4,5 @@ from app.customermemberships.models import CustomerMembership
 from app.memberships.models import Membership
 from app.attendances.models import Attendance
 from app.shop.models import Product
-from app.redemptions.models import Redemption
\ No newline at end of file
+from app.redemptions.models import Redemption
+from app.jobs.models import JobLease, JobRun
@@ -0,0 +1,30 @@
+import pytest
+from app.main import app
+from app.core import database
+from app.core import profiling
+from app.core.database import get_session, checkout_stats, SessionRouter
+from app.monitoring import routes as monitoring_routes
+from app.monitoring import dependencies as monitoring_dependencies
+
+
+@pytest.fixture(name="lazy_client")
+def lazy_client(client, session, monkeypatch):
+    """
+    Cliente que usa el `get_session` real (sesión perezosa) sobre el engine de tests.
+    """
+    monkeypatch.setattr(database, "session_router", SessionRouter(session.get_bind()))
+    app.dependency_overrides.pop(get_session)
+    checkout_stats.reset()
+    return client
+
+
+@pytest.fixture(name="profiles_dir")
+def profiles_dir(tmp_path, session, monkeypatch):
+    """
+    Guarda los perfiles de los tests en un directorio temporal. La
+    verificación del administrador usa el engine de tests.
+    """
+    monkeypatch.setattr(monitoring_dependencies, "engine", session.get_bind())
+    monkeypatch.setattr(profiling, "profile_store", profiling.ProfileStore(tmp_path))
+    monkeypatch.setattr(monitoring_routes, "profile_store", profiling.profile_store)
+    return tmp_path
@@ -0,0 +1,30 @@
+from fastapi import Request
+from sqlmodel import Session
+from app.core.database import engine
+from app.core.instrumentation import current_request_stats
+from app.core.profiling import parse_profile_mode
+from app.auth.dependencies import oauth2_scheme, get_current_user, check_admin
+
+
+async def profile_request(request: Request) -> None:
+    """
+    Activa el profiling del request si trae `X-Profile` o `?profile=`.
+
+    Corre en todos los requests, así que solo lee el header o el parámetro:
+    la sesión para verificar el token y `check_admin` se abre únicamente
+    cuando se pide un perfil. El resto de los requests no pasa por el
+    threadpool ni cuenta una sesión para su ruta.
+    """
+    mode = parse_profile_mode(
+        request.headers.get("x-profile", request.query_params.get("profile"))
+    )
+    if mode is None:
+        return
+
+    token = await oauth2_scheme(request)
+    with Session(engine) as session:
+        check_admin(await get_current_user(token, session))
+
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.profile = mode
@@ -0,0 +1,233 @@
+import time
+from datetime import datetime, timezone
+from fastapi import APIRouter, status, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, FileResponse, JSONResponse
+from app.core.database import checkout_stats
+from app.core.instrumentation import TimedRoute
+from app.core.metrics import registry
+from app.core.profiling import profile_store, continuous_sampler, merge_collapsed_stacks
+from app.core.workers import worker_heartbeats
+from app.monitoring.schemas import RouteCheckoutRead, ProfileRead, HealthRead, WorkerRead
+from app.warmup import readiness
+from app.auth.dependencies import check_admin
+from app.auth.models import User
+
+
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["monitoring"],
+    route_class=TimedRoute
+)
+
+# /metrics vive fuera del prefijo: es la ruta que espera Prometheus por defecto
+metrics_router = APIRouter(tags=["monitoring"], route_class=TimedRoute)
+health_router = APIRouter(tags=["monitoring"], route_class=TimedRoute)
+
+
+@health_router.get(
+    "/health",
+    response_model=HealthRead,
+    status_code=status.HTTP_200_OK,
+    summary="Estado del worker",
+    description="""
+    Indica si el worker terminó el warm-up de arranque y puede recibir tráfico.
+
+    Pensado como readiness probe del balanceador u orquestador: responde 503
+    mientras el worker se está preparando.
+    """,
+    responses={
+        200: {"description": "Worker listo, con la duración de cada paso del warm-up"},
+        503: {"description": "Warm-up en curso"},
+    },
+)
+async def health():
+    if not readiness.ready:
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return HealthRead(
+        status="ready",
+        warmup_ms=round(readiness.warmup_seconds * 1000, 2),
+        steps={name: round(seconds * 1000, 2) for name, seconds in readiness.steps.items()},
+    )
+
+
+@metrics_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+)
+async def metrics():
+    # async: el estado del threadpool solo puede leerse desde el event loop
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get(
+    "/db/checkouts",
+    response_model=list[RouteCheckoutRead],
+    status_code=status.HTTP_200_OK,
+    summary="Conexiones tomadas del pool por ruta",
+    description="""
+    Devuelve, por ruta, cuántos requests pidieron una sesión de base de datos
+    y cuántos de ellos llegaron a tomar una conexión del pool.
+
+    Características:
+    - Solo accesible para administradores.
+    - Los contadores son del worker que atiende el request, desde su inicio.
+    - Una diferencia grande entre sesiones y conexiones indica requests
+      resueltos sin tocar la base (caché o rechazo temprano).
+    """,
+    responses={
+        200: {"description": "Estadísticas obtenidas correctamente"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+    },
+)
+def list_route_checkouts(
+    admin: User = Depends(check_admin),
+):
+    return [
+        RouteCheckoutRead(route=route, **counters)
+        for route, counters in sorted(checkout_stats.snapshot().items())
+    ]
+
+
+@router.get(
+    "/profiles",
+    response_model=list[ProfileRead],
+    status_code=status.HTTP_200_OK,
+    summary="Listar perfiles de requests",
+    description="""
+    Lista los perfiles guardados, del más reciente al más antiguo.
+
+    Un administrador obtiene el perfil de cualquier request agregando el header
+    `X-Profile: cprofile` (o `sampling`) o el parámetro `?profile=`; la
+    respuesta incluye el ID del perfil en `X-Profile-Id`.
+
+    Características:
+    - Solo accesible para administradores.
+    - `cprofile`: reporte de texto con las funciones de mayor tiempo acumulado
+      y sus llamadas.
+    - `sampling`: stacks muestreados en formato speedscope (JSON).
+    """,
+    responses={
+        200: {"description": "Perfiles obtenidos correctamente"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+    },
+)
+def list_profiles(
+    admin: User = Depends(check_admin),
+):
+    return [
+        ProfileRead(
+            id=path.name,
+            size=path.stat().st_size,
+            created_at=datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc),
+        )
+        for path in profile_store.list()
+    ]
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Descargar un perfil",
+    description="""
+    Devuelve el contenido de un perfil guardado.
+
+    Características:
+    - Solo accesible para administradores.
+    - Los perfiles `.speedscope.json` se abren en https://www.speedscope.app.
+    """,
+    responses={
+        200: {"description": "Perfil obtenido correctamente"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+        404: {"description": "Perfil no encontrado"},
+    },
+)
+def get_profile(
+    profile_id: str,
+    admin: User = Depends(check_admin),
+):
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil no encontrado"
+        )
+
+    media_type = "application/json" if path.suffix == ".json" else "text/plain"
+    return FileResponse(path, media_type=media_type)
+
+
+@router.get(
+    "/flamegraph",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Stacks colapsados del muestreador continuo",
+    description="""
+    Suma las muestras de stacks de todos los workers en los últimos `minutes`
+    minutos, en formato de stacks colapsados (`hilo;raíz;...;hoja cantidad`),
+    ordenados de mayor a menor.
+
+    Características:
+    - Solo accesible para administradores.
+    - Requiere `SAMPLER_ENABLED=true`; cada worker vuelca sus muestras cada
+      `SAMPLER_FLUSH_SECONDS`.
+    - El resultado se abre en https://www.speedscope.app o con `flamegraph.pl`.
+    - Los hilos esperando trabajo (threadpool ocioso, event loop en select)
+      no se muestrean.
+    """,
+    responses={
+        200: {"description": "Stacks obtenidos correctamente"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+    },
+)
+def get_flamegraph(
+    minutes: float = Query(15, gt=0),
+    admin: User = Depends(check_admin),
+):
+    return PlainTextResponse(
+        merge_collapsed_stacks(continuous_sampler.directory, since=time.time() - minutes * 60)
+    )
+
+
+@router.get(
+    "/workers",
+    response_model=list[WorkerRead],
+    status_code=status.HTTP_200_OK,
+    summary="Estado de los workers",
+    description="""
+    Lista los workers de `python -m app.serve` según su último latido.
+
+    Características:
+    - Solo accesible para administradores.
+    - `requests`: requests atendidos desde que el worker arrancó.
+    - `stale`: el worker lleva más de `WORKER_TIMEOUT_SECONDS` sin latir; el
+      master lo reemplaza en su próxima revisión.
+    - Con uvicorn lanzado a mano la lista está vacía.
+    """,
+    responses={
+        200: {"description": "Workers obtenidos correctamente"},
+        401: {"description": "No autenticado"},
+        403: {"description": "No autorizado (solo administradores)"},
+    },
+)
+def list_workers(
+    admin: User = Depends(check_admin),
+):
+    return [
+        WorkerRead(
+            pid=worker["pid"],
+            started_at=datetime.fromtimestamp(worker["started_at"], tz=timezone.utc),
+            updated_at=datetime.fromtimestamp(worker["updated_at"], tz=timezone.utc),
+            requests=worker["requests"],
+            ready=worker["ready"],
+            stale=worker["stale"],
+        )
+        for worker in worker_heartbeats.read_all()
+    ]
@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlmodel import SQLModel
+
+
+class RouteCheckoutRead(SQLModel):
+    route: str
+    sessions: int
+    checkouts: int
+
+
+class HealthRead(SQLModel):
+    status: str
+    warmup_ms: float | None = None
+    steps: dict[str, float] = {}
+
+
+class WorkerRead(SQLModel):
+    pid: int
+    started_at: datetime
+    updated_at: datetime
+    requests: int
+    ready: bool
+    stale: bool
+
+
+class ProfileRead(SQLModel):
+    id: str
+    size: int
+    created_at: datetime
@@ -0,0 +1,198 @@
+import json
+from fastapi import status
+from app.core.database import checkout_stats, LazySession
+from app.helpers import login
+
+
+def test_lazy_session_is_not_opened_until_first_use():
+    opened = []
+
+    def factory():
+        opened.append(True)
+        return "session"
+
+    session = LazySession(factory)
+    assert session.opened is False
+    assert opened == []
+
+    session.close()
+    assert opened == []
+
+
+def test_rejected_request_does_not_checkout_connection(lazy_client):
+    response = lazy_client.post("/attendances/", json={})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert checkout_stats.snapshot()["/attendances/"] == {"sessions": 1, "checkouts": 0}
+
+
+def test_request_that_queries_checks_out_a_connection(lazy_client, admin_user):
+    token = login(lazy_client, admin_user["email"], admin_user["password"])
+
+    response = lazy_client.get(
+        "/customers/",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert checkout_stats.snapshot()["/customers/"] == {"sessions": 1, "checkouts": 1}
+
+
+def test_routes_without_database_do_not_open_sessions(lazy_client):
+    assert lazy_client.get("/health").status_code in (status.HTTP_200_OK, status.HTTP_503_SERVICE_UNAVAILABLE)
+    lazy_client.get("/metrics")
+
+    assert "/health" not in checkout_stats.snapshot()
+    assert "/metrics" not in checkout_stats.snapshot()
+
+
+def test_admin_can_list_route_checkouts(lazy_client, admin_user):
+    token = login(lazy_client, admin_user["email"], admin_user["password"])
+    lazy_client.post("/attendances/", json={})
+
+    response = lazy_client.get(
+        "/monitoring/db/checkouts",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    routes = {item["route"]: item for item in response.json()}
+    assert routes["/attendances/"]["checkouts"] == 0
+    assert routes["/auth/login"]["checkouts"] == 1
+
+
+def test_customer_cannot_list_route_checkouts(lazy_client, customer_with_credentials):
+    c = customer_with_credentials
+    token = login(lazy_client, c["email"], c["password"])
+
+    response = lazy_client.get(
+        "/monitoring/db/checkouts",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_metrics_endpoint_exposes_route_metrics(client, membership):
+    client.get("/memberships/")
+    client.get(f"/memberships/{membership['id']}")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/memberships/",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/memberships/{membership_id}",le="+Inf"}' in body
+    assert 'http_requests_in_flight{method="GET",route="/metrics"} 1' in body
+    assert 'threadpool_workers{state="capacity"}' in body
+
+
+def test_admin_can_profile_a_request_with_cprofile(client, admin_user, profiles_dir):
+    token = login(client, admin_user["email"], admin_user["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/customers/", headers={**headers, "X-Profile": "1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    profile_id = response.headers["x-profile-id"]
+    assert profile_id.endswith("-get-customers-cprofile.txt")
+
+    listing = client.get("/monitoring/profiles", headers=headers).json()
+    assert [item["id"] for item in listing] == [profile_id]
+
+    report = client.get(f"/monitoring/profiles/{profile_id}", headers=headers)
+    assert report.status_code == status.HTTP_200_OK
+    assert "GET /customers/" in report.text
+    assert "list_customers" in report.text
+
+
+def test_sampling_profile_is_exported_as_speedscope(client, admin_user, profiles_dir, monkeypatch):
+    import time
+    from app.core import profiling
+    from app.customers import routes as customers_routes
+
+    token = login(client, admin_user["email"], admin_user["password"])
+    original = customers_routes.paginate
+
+    def slow_paginate(*args, **kwargs):
+        time.sleep(0.05)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(customers_routes, "paginate", slow_paginate)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLING_INTERVAL_MS", 1)
+
+    response = client.get(
+        "/customers/",
+        params={"profile": "sampling"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    profile = json.loads((profiles_dir / response.headers["x-profile-id"]).read_text())
+    assert profile["profiles"][0]["type"] == "sampled"
+    assert profile["profiles"][0]["samples"]
+    names = {frame["name"] for frame in profile["shared"]["frames"]}
+    assert "slow_paginate" in names
+
+
+def test_customer_cannot_profile_requests(client, customer_with_credentials, profiles_dir):
+    c = customer_with_credentials
+    token = login(client, c["email"], c["password"])
+
+    response = client.get(
+        "/customers/me",
+        headers={"Authorization": f"Bearer {token}", "X-Profile": "1"},
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert list(profiles_dir.iterdir()) == []
+
+
+def test_profile_download_rejects_unknown_ids(client, admin_user, profiles_dir):
+    token = login(client, admin_user["email"], admin_user["password"])
+
+    response = client.get(
+        "/monitoring/profiles/..%2Fdb.sqlite3",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_admin_reads_merged_flamegraph(client, admin_user, monkeypatch, tmp_path):
+    import time
+    from app.core.profiling import ContinuousSampler
+    from app.monitoring import routes as monitoring_routes
+
+    monkeypatch.setattr(monitoring_routes, "continuous_sampler", ContinuousSampler(tmp_path))
+    (tmp_path / f"{int(time.time())}-101.collapsed").write_text("w;checkout 4\n")
+    (tmp_path / f"{int(time.time())}-102.collapsed").write_text("w;checkout 1\n")
+    token = login(client, admin_user["email"], admin_user["password"])
+
+    response = client.get(
+        "/monitoring/flamegraph",
+        params={"minutes": 5},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text == "w;checkout 5\n"
+
+
+def test_admin_lists_worker_heartbeats(client, admin_user, monkeypatch, tmp_path):
+    import time
+    from app.core.workers import WorkerHeartbeats
+    from app.monitoring import routes as monitoring_routes
+
+    heartbeats = WorkerHeartbeats(tmp_path, timeout=30)
+    monkeypatch.setattr(monitoring_routes, "worker_heartbeats", heartbeats)
+    heartbeats.beat(101, started_at=time.time(), requests=7, ready=True)
+    token = login(client, admin_user["email"], admin_user["password"])
+
+    response = client.get("/monitoring/workers", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+    [worker] = response.json()
+    assert worker["pid"] == 101
+    assert worker["requests"] == 7
+    assert worker["ready"] and not worker["stale"]
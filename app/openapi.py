@@ -0,0 +1,106 @@
+import json
+import sys
+from pathlib import Path
+from fastapi import FastAPI, Request, Response
+from fastapi.openapi.docs import (
+    get_redoc_html,
+    get_swagger_ui_html,
+    get_swagger_ui_oauth2_redirect_html,
+)
+from app.core.config import DOCS_ENABLED, OPENAPI_FILE
+
+OPENAPI_URL = "/openapi.json"
+OAUTH2_REDIRECT_URL = "/docs/oauth2-redirect"
+
+
+def serialize_openapi(app: FastAPI) -> bytes:
+    return json.dumps(app.openapi(), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def build_openapi(app: FastAPI, path: str | Path) -> Path:
+    """
+    Genera el esquema OpenAPI de la app y lo escribe en `path`.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".tmp")
+    partial.write_bytes(serialize_openapi(app))
+    partial.replace(path)
+    return path
+
+
+class OpenAPIDocument:
+    """
+    Bytes del documento OpenAPI servido en `/openapi.json`.
+
+    Si existe el archivo precalculado en el build (`python -m app.openapi
+    openapi.json`) se sirve tal cual; si no, se genera una vez a partir de la
+    app y se reutiliza.
+    """
+
+    def __init__(self, app: FastAPI, path: str | None = OPENAPI_FILE):
+        self.app = app
+        self.path = Path(path) if path else None
+        self.prebuilt = False
+        self._content: bytes | None = None
+
+    def content(self) -> bytes:
+        if self._content is None:
+            if self.path is not None and self.path.is_file():
+                self._content = self.path.read_bytes()
+                # app.openapi() devuelve el mismo esquema sin volver a generarlo
+                self.app.openapi_schema = json.loads(self._content)
+                self.prebuilt = True
+            else:
+                self._content = serialize_openapi(self.app)
+        return self._content
+
+
+def setup_docs(app: FastAPI, enabled: bool = DOCS_ENABLED, path: str | None = OPENAPI_FILE) -> OpenAPIDocument | None:
+    """
+    Registra `/openapi.json`, `/docs` y `/redoc`. La app debe crearse con
+    `openapi_url=None` para que FastAPI no registre las suyas.
+
+    Con `enabled=False` (workers de producción) no se expone documentación.
+    """
+    if not enabled:
+        app.state.openapi_document = None
+        return None
+
+    document = OpenAPIDocument(app, path)
+    app.state.openapi_document = document
+
+    async def openapi(request: Request) -> Response:
+        return Response(document.content(), media_type="application/json")
+
+    async def swagger_ui(request: Request) -> Response:
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        return get_swagger_ui_html(
+            openapi_url=root_path + OPENAPI_URL,
+            title=f"{app.title} - Swagger UI",
+            oauth2_redirect_url=root_path + OAUTH2_REDIRECT_URL,
+        )
+
+    async def swagger_ui_redirect(request: Request) -> Response:
+        return get_swagger_ui_oauth2_redirect_html()
+
+    async def redoc(request: Request) -> Response:
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        return get_redoc_html(openapi_url=root_path + OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+    app.add_route(OPENAPI_URL, openapi, include_in_schema=False)
+    app.add_route("/docs", swagger_ui, include_in_schema=False)
+    app.add_route(OAUTH2_REDIRECT_URL, swagger_ui_redirect, include_in_schema=False)
+    app.add_route("/redoc", redoc, include_in_schema=False)
+    return document
+
+
+def main(argv: list[str]) -> None:
+    from app.main import app
+
+    path = build_openapi(app, argv[0] if argv else OPENAPI_FILE or "openapi.json")
+    print(f"OpenAPI escrito en {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
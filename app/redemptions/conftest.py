@@ -1,8 +1,7 @@
 import pytest
 from fastapi import status
 from datetime import datetime, timedelta, timezone
-from app.attendances.models import Attendance
-from app.attendances.services import finalize_attendance, apply_attendance_points
+from app.attendances.services import finalize_attendance, apply_attendance_points, load_attendance_for_points
 from app.customers.models import Customer
 from app.helpers import login
 from app.shop.models import Product
@@ -32,7 +31,7 @@ def customer_with_75_points(client, session, customer_with_membership):
         attendance_id = response.json()["id"]
 
         # traer asistencia desde DB
-        attendance = session.get(Attendance, attendance_id)
+        attendance = load_attendance_for_points(session, attendance_id)
 
         base_time = datetime.now(timezone.utc) + timedelta(days=day)
 
@@ -7,6 +7,7 @@ from app.redemptions.schemas import RedemptionRead, RedemptionCreate
 from app.shop.models import Product
 from app.customers.models import Customer
 from app.core.database import SessionDep
+from app.core.instrumentation import TimedRoute
 from app.core.enums import ProductType, RoleEnum, StatusEnum
 from app.core.pagination import DefaultPagination
 from app.auth.dependencies import get_current_customer, check_admin, get_current_user
@@ -14,7 +15,8 @@ from app.auth.models import User
 
 
 router = APIRouter(prefix="/redemptions",
-                   tags=["redemptions"])
+                   tags=["redemptions"],
+                   route_class=TimedRoute)
 
 @router.post(
     "/",
@@ -109,6 +109,8 @@ def test_create_redemption(
     c = customer_with_credentials
     token = login(client, c["email"], c["password"])
 
+    assert client.get(f"/shop/{cheap_product.id}").json()["stock"] == 5
+
     r = client.post(
         f"/redemptions/",
         headers={"Authorization": f"Bearer {token}"},
@@ -125,6 +127,8 @@ def test_create_redemption(
 
     assert customer_with_75_points.points_balance == 5
     assert cheap_product.stock == 4
+    # El catálogo de la tienda refleja el stock descontado
+    assert client.get(f"/shop/{cheap_product.id}").json()["stock"] == 4
 
 def test_list_redemptions(client,
                           redemption,
@@ -186,3 +190,29 @@ def test_list_redemptions_paginated(client, admin_user, redemption):
     # comportamiento esperado
     assert body["size"] == 1
     assert len(body["items"]) <= 1
+
+
+def test_create_redemption_statement_budget(
+        client,
+        session,
+        customer_with_credentials,
+        customer_with_75_points,
+        cheap_product,
+        assert_max_statements
+):
+    c = customer_with_credentials
+    token = login(client, c["email"], c["password"])
+    product_id = cheap_product.id
+    session.expunge_all()
+
+    with assert_max_statements(7):
+        r = client.post(
+            "/redemptions/",
+            headers={"Authorization": f"Bearer {token}"},
+            json={
+                "product_id": product_id,
+                "quantity": 1
+            }
+        )
+
+    assert r.status_code == status.HTTP_201_CREATED
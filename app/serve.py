@@ -0,0 +1,330 @@
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from app.core.config import (
+    SERVE_HOST,
+    SERVE_PORT,
+    WEB_CONCURRENCY,
+    WORKER_MAX_REQUESTS,
+    WORKER_MAX_REQUESTS_JITTER,
+    WORKER_HEARTBEAT_SECONDS,
+    WORKER_TIMEOUT_SECONDS,
+    WORKER_GRACEFUL_TIMEOUT_SECONDS,
+    SHARED_COUNTERS_ENABLED,
+    DATABASE_REPLICA_URL,
+)
+from app.core.shared_counters import shared_counters
+from app.core.workers import WorkerHeartbeats, default_workers
+
+logger = logging.getLogger("app.serve")
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, heartbeats: WorkerHeartbeats, max_requests: int, jitter: int) -> None:
+    """
+    Cuerpo del proceso hijo: un servidor uvicorn sobre el socket del master.
+    """
+    import uvicorn
+    from app.core.database import engine, replica_engine
+    from app.warmup import readiness
+
+    # Las conexiones que el master pudiera haber abierto no se comparten entre procesos
+    engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+    gc.enable()
+
+    pid = os.getpid()
+    started_at = time.time()
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        limit_max_requests=max_requests or None,
+        limit_max_requests_jitter=jitter if max_requests else 0,
+        timeout_notify=WORKER_HEARTBEAT_SECONDS,
+        timeout_graceful_shutdown=int(WORKER_GRACEFUL_TIMEOUT_SECONDS),
+    )
+    server = uvicorn.Server(config)
+
+    # uvicorn llama a callback_notify desde su loop principal cada timeout_notify
+    # segundos: si el event loop se bloquea, el latido deja de llegar
+    async def heartbeat():
+        heartbeats.beat(
+            pid,
+            started_at=started_at,
+            requests=server.server_state.total_requests,
+            ready=readiness.ready,
+        )
+
+    config.callback_notify = heartbeat
+    try:
+        server.run(sockets=[sock])
+    finally:
+        heartbeats.remove(pid)
+
+
+class Master:
+    """
+    Proceso master con workers preforkeados.
+
+    - Importa la app una sola vez, congela el heap con `gc.freeze()` y recién
+      entonces forkea: los workers comparten esas páginas (copy-on-write) y el
+      GC de cada worker no las recorre ni las ensucia.
+    - Cada worker atiende el socket del master y se recicla tras
+      `max_requests` (más azar); el master lo reemplaza.
+    - Un worker que deja de latir por más de `timeout` se mata y se reemplaza.
+    - SIGTERM/SIGINT apagan los workers ordenadamente; SIGHUP los recicla de
+      a uno, sin dejar de atender.
+    - La tabla de `shared_counters` se crea en memoria compartida antes del
+      primer fork y se libera al terminar.
+    - Sin `CACHE_URL`, el bus de invalidaciones pasa a sockets Unix del nodo
+      (`NodeCacheBackend`): lo que un worker invalida, lo invalidan todos.
+    """
+
+    def __init__(
+        self,
+        host: str = SERVE_HOST,
+        port: int = SERVE_PORT,
+        workers: int = 0,
+        max_requests: int = WORKER_MAX_REQUESTS,
+        max_requests_jitter: int = WORKER_MAX_REQUESTS_JITTER,
+        timeout: float = WORKER_TIMEOUT_SECONDS,
+        graceful_timeout: float = WORKER_GRACEFUL_TIMEOUT_SECONDS,
+        heartbeats: WorkerHeartbeats | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers or default_workers()
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.heartbeats = heartbeats or WorkerHeartbeats(timeout=timeout)
+        self.children: dict[int, float] = {}
+        self.app = None
+        self.sock: socket.socket | None = None
+        self._stopping = False
+        self._reload = False
+        self._failures = 0
+        self._retiring: set[int] = set()
+        self.relay_dir: Path | None = None
+
+    def preload(self) -> None:
+        gc.disable()
+        start = time.perf_counter()
+        from app.main import app
+
+        self.app = app
+        # El esquema OpenAPI no depende del proceso: se arma una vez y se hereda
+        document = getattr(app.state, "openapi_document", None)
+        if document is not None:
+            document.content()
+        # Lo que sobrevive al import queda fuera del GC de los workers
+        gc.collect()
+        gc.freeze()
+        logger.info(
+            "App precargada en %.0f ms (%d objetos congelados)",
+            (time.perf_counter() - start) * 1000, gc.get_freeze_count(),
+        )
+
+    def relay_invalidations(self) -> None:
+        """
+        Sin almacén compartido, cada worker tendría su caché de respuestas y
+        sus catálogos aislados (un PATCH en uno dejaría al resto respondiendo
+        el dato viejo hasta el TTL): el bus se pasa a un canal del nodo.
+        """
+        from app.core.cache import NodeCacheBackend, invalidation_bus
+
+        if self.workers < 2 or invalidation_bus.backend.name != "memory":
+            return
+        self.relay_dir = Path(tempfile.gettempdir()) / f"gym-bus-{os.getpid()}"
+        invalidation_bus.backend = NodeCacheBackend(self.relay_dir)
+        logger.info("Invalidaciones entre workers por %s (sin CACHE_URL)", self.relay_dir)
+        if DATABASE_REPLICA_URL:
+            logger.warning(
+                "DATABASE_REPLICA_URL sin CACHE_URL: el read-your-writes cubre solo "
+                "a los workers de este nodo; con varios nodos, configurar CACHE_URL"
+            )
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                for signum in (signal.SIGTERM, signal.SIGINT):
+                    signal.signal(signum, signal.SIG_DFL)
+                # Un hangup de la terminal (al grupo de procesos) es para el master
+                signal.signal(signal.SIGHUP, signal.SIG_IGN)
+                run_worker(self.app, self.sock, self.heartbeats, self.max_requests, self.max_requests_jitter)
+            except BaseException:
+                logger.exception("El worker %d terminó con error", os.getpid())
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+
+        self.children[pid] = time.monotonic()
+        logger.info("Worker %d iniciado", pid)
+        return pid
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            spawned_at = self.children.pop(pid, None)
+            self.heartbeats.remove(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping:
+                continue
+            if pid in self._retiring:
+                # uvicorn vuelve a levantar la señal tras el apagado ordenado
+                self._retiring.discard(pid)
+                logger.info("Worker %d reemplazado", pid)
+            elif code == 0:
+                logger.info("Worker %d reciclado", pid)
+                self._failures = 0
+            else:
+                logger.warning("Worker %d terminó con código %d", pid, code)
+                if spawned_at is not None and time.monotonic() - spawned_at < self.timeout:
+                    self._failures += 1
+
+    def check_heartbeats(self) -> None:
+        now = time.monotonic()
+        wall_now = time.time()
+        for pid, spawned_at in list(self.children.items()):
+            last_beat = self.heartbeats.last_beat(pid)
+            if last_beat is not None:
+                silent_for = wall_now - last_beat
+                self._failures = 0
+            else:
+                # Todavía en el arranque (warm-up): se cuenta desde el fork
+                silent_for = now - spawned_at
+            if silent_for > self.timeout:
+                logger.warning("Worker %d sin latir hace %.0f s; se reemplaza", pid, silent_for)
+                self.kill(pid, signal.SIGKILL)
+
+    def kill(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def maintain(self) -> None:
+        if self._stopping:
+            return
+        if self._reload:
+            self._reload = False
+            self.reload()
+        while len(self.children) < self.workers:
+            if self._failures:
+                # Un worker que no llega a arrancar (ej. base caída) no debe forkear en loop
+                time.sleep(min(2 ** self._failures, 30))
+            self.spawn()
+
+    def reload(self) -> None:
+        """
+        Reemplaza los workers de a uno: el nuevo arranca antes de apagar el viejo.
+        """
+        for pid in list(self.children):
+            new_pid = self.spawn()
+            deadline = time.monotonic() + self.timeout
+            while self.heartbeats.last_beat(new_pid) is None and time.monotonic() < deadline:
+                time.sleep(0.1)
+            self._retiring.add(pid)
+            self.kill(pid, signal.SIGTERM)
+
+    def stop(self) -> None:
+        self._stopping = True
+        for pid in list(self.children):
+            self.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            logger.warning("Worker %d no terminó a tiempo; se mata", pid)
+            self.kill(pid, signal.SIGKILL)
+        while self.children:
+            self.reap()
+            time.sleep(0.05)
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame) -> None:
+        self._reload = True
+
+    def run(self) -> None:
+        self.sock = bind_socket(self.host, self.port)
+        self.heartbeats.clear()
+        if SHARED_COUNTERS_ENABLED:
+            shared_counters.create()
+        self.preload()
+        self.relay_invalidations()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        logger.info(
+            "Master %d escuchando en %s:%d con %d workers",
+            os.getpid(), self.host, self.port, self.workers,
+        )
+
+        try:
+            while not self._stopping:
+                self.maintain()
+                time.sleep(0.5)
+                self.reap()
+                self.check_heartbeats()
+        finally:
+            self.stop()
+            self.sock.close()
+            shared_counters.unlink()
+            if self.relay_dir is not None:
+                shutil.rmtree(self.relay_dir, ignore_errors=True)
+            logger.info("Master %d detenido", os.getpid())
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Servidor de producción con workers preforkeados")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY, help="0: uno por CPU")
+    parser.add_argument("--max-requests", type=int, default=WORKER_MAX_REQUESTS, help="0: sin reciclado")
+    parser.add_argument("--max-requests-jitter", type=int, default=WORKER_MAX_REQUESTS_JITTER)
+    parser.add_argument("--timeout", type=float, default=WORKER_TIMEOUT_SECONDS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    Master(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        timeout=args.timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
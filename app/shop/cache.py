@@ -0,0 +1,129 @@
+import threading
+import time
+from fastapi_pagination import create_page
+from sqlmodel import Session, select
+from app.core.config import CATALOG_CACHE_TTL_SECONDS
+from app.core.cache import invalidation_bus
+from app.core.database import on_commit_of
+from app.core.enums import ProductType, StatusEnum
+from app.core.http_cache import make_etag
+from app.core.pagination import ProductPagination
+from app.core.response_cache import invalidate_on_commit
+from app.shop.models import Product
+
+
+class ProductRecord:
+    """
+    Copia liviana de un producto: sin estado de SQLAlchemy ni diccionario por instancia.
+    """
+
+    __slots__ = ("id", "name", "description", "product_type", "stock", "price", "status")
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        description: str | None,
+        product_type: ProductType,
+        stock: int,
+        price: int,
+        status: StatusEnum,
+    ):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.product_type = product_type
+        self.stock = stock
+        self.price = price
+        self.status = status
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_product(cls, product: Product) -> "ProductRecord":
+        return cls(
+            product.id,
+            product.name,
+            product.description,
+            product.product_type,
+            product.stock,
+            product.price,
+            product.status,
+        )
+
+
+class CatalogSnapshot:
+    """
+    Catálogo inmutable con los órdenes ya calculados (precio, luego ID).
+    """
+
+    __slots__ = ("version", "loaded_at", "active", "all", "by_id", "fingerprint")
+
+    def __init__(self, version: int, records: list[ProductRecord]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.all = tuple(sorted(records, key=lambda r: (r.price, r.id)))
+        self.active = tuple(r for r in self.all if r.status == StatusEnum.ACTIVE)
+        self.by_id = {r.id: r for r in self.all}
+        # Huella del contenido: igual en todos los workers si ven los mismos datos
+        self.fingerprint = make_etag(*(r.values() for r in self.all))
+
+    def page(self, params: ProductPagination, include_inactive: bool = False):
+        records = self.all if include_inactive else self.active
+        start = (params.page - 1) * params.size
+        return create_page(records[start:start + params.size], total=len(records), params=params)
+
+
+class ProductCatalog:
+    """
+    Catálogo de productos en memoria para el listado público de la tienda.
+
+    Cualquier commit que escriba un `Product` (alta, edición, activación,
+    baja o el descuento de stock de un canje) incrementa la versión; el
+    siguiente request arma un snapshot nuevo y lo reemplaza de una sola vez,
+    así que un request nunca ve un catálogo a medio actualizar.
+    """
+
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot: CatalogSnapshot | None = None
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    def load(self, session: Session) -> CatalogSnapshot:
+        version = self.version
+        products = session.exec(select(Product)).all()
+        snapshot = CatalogSnapshot(version, [ProductRecord.from_product(p) for p in products])
+        # Si hubo una invalidación durante la carga, la próxima lectura recarga
+        self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self, session: Session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or snapshot.version != self.version
+            or time.monotonic() - snapshot.loaded_at > self.ttl
+        ):
+            snapshot = self.load(session)
+        return snapshot
+
+    def get(self, session: Session, product_id: int) -> ProductRecord | None:
+        return self.snapshot(session).by_id.get(product_id)
+
+
+product_catalog = ProductCatalog()
+invalidation_bus.register("catalog:products", product_catalog.invalidate)
+
+
+@on_commit_of(Product)
+def _invalidate_product_catalog():
+    invalidation_bus.publish("catalog:products")
+
+
+invalidate_on_commit(Product, "catalog:products", "product:{id}")
@@ -1,19 +1,22 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import select
 from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlmodel import paginate
 from app.core.database import SessionDep
+from app.core.instrumentation import TimedRoute
+from app.core.response_cache import cache_response
 from app.core.enums import RoleEnum, StatusEnum
 from app.core.pagination import ProductPagination
+from app.core.http_cache import conditional_response, make_etag, PUBLIC_CATALOG_CACHE, PRIVATE_CACHE
 from app.shop.models import Product
+from app.shop.cache import product_catalog
 from app.shop.schemas import ProductRead, ProductCreate, ProductUpdate
 from app.auth.models import User
 from app.auth.dependencies import check_admin, get_current_user_optional
 
 
 router = APIRouter(prefix="/shop",
-                   tags=["shop"])
+                   tags=["shop"],
+                   route_class=TimedRoute)
 
 @router.post(
     "/",
@@ -75,6 +78,9 @@ def create_product(
     - Los usuarios administradores pueden incluir productos inactivos.
     - Resultados ordenados por precio y luego por ID.
     - Soporta paginación mediante parámetros personalizados.
+    - Se sirve desde el catálogo en memoria, que se recarga cuando un
+      producto cambia (incluido el stock descontado por un canje).
+    - Devuelve `ETag`; con `If-None-Match` vigente responde 304 sin cuerpo.
 
     Comportamiento según rol:
     - Usuarios no autenticados: solo productos activos.
@@ -86,24 +92,35 @@ def create_product(
     """,
     responses={
         200: {"description": "Listado de productos obtenido correctamente"},
+        304: {"description": "Sin cambios desde el ETag enviado"},
         401: {"description": "No autenticado"},
     },
 )
+@cache_response(tags=("catalog:products",))
 def list_products(
+    request: Request,
+    response: Response,
     session: SessionDep,
     include_inactive: bool = False,
     current_user: User | None = Depends(get_current_user_optional),
     params: ProductPagination = Depends(),
 ):
-    query = select(Product)
-
     # Solo admin puede ver inactivos explícitamente
-    if not (current_user and current_user.role == RoleEnum.ADMIN and include_inactive):
-        query = query.where(Product.status == StatusEnum.ACTIVE)
+    is_admin = bool(current_user and current_user.role == RoleEnum.ADMIN)
+    include_inactive = is_admin and include_inactive
 
-    query = query.order_by(Product.price, Product.id)
+    snapshot = product_catalog.snapshot(session)
+    not_modified = conditional_response(
+        request,
+        response,
+        make_etag(snapshot.fingerprint, include_inactive, params.page, params.size),
+        PRIVATE_CACHE if is_admin else PUBLIC_CATALOG_CACHE,
+    )
+    if not_modified:
+        return not_modified
 
-    return paginate(session, query, params)
+    # Cada página es un slice del orden ya calculado en el catálogo en memoria
+    return snapshot.page(params, include_inactive=include_inactive)
 
 
 @router.get(
@@ -130,16 +147,20 @@ def list_products(
     """,
     responses={
         200: {"description": "Producto obtenido correctamente"},
+        304: {"description": "Sin cambios desde el ETag enviado"},
         401: {"description": "No autenticado"},
         404: {"description": "Producto no encontrado"},
     },
 )
+@cache_response(tags=("catalog:products", "product:{product_id}"))
 def read_product(
     product_id: int,
+    request: Request,
+    response: Response,
     session: SessionDep,
     current_user: User | None = Depends(get_current_user_optional),
 ):
-    product = session.get(Product, product_id)
+    product = product_catalog.get(session, product_id)
 
     if not product:
         raise HTTPException(
@@ -157,6 +178,16 @@ def read_product(
             detail="Producto no encontrado"
         )
 
+    is_admin = bool(current_user and current_user.role == RoleEnum.ADMIN)
+    not_modified = conditional_response(
+        request,
+        response,
+        make_etag(*product.values()),
+        PRIVATE_CACHE if is_admin else PUBLIC_CATALOG_CACHE,
+    )
+    if not_modified:
+        return not_modified
+
     return product
 
     
@@ -172,4 +172,101 @@ def test_list_products_paginated(client, admin_user, product):
     # comportamiento esperado
     assert body["page"] == 1
     assert body["size"] == 5
-    assert isinstance(body["items"], list)
\ No newline at end of file
+    assert isinstance(body["items"], list)
+
+def test_list_products_statement_budget(client, product, assert_max_statements):
+    # Primer request: una sola carga del catálogo, sin COUNT aparte
+    with assert_max_statements(1):
+        response = client.get("/shop/")
+
+    assert response.status_code == status.HTTP_200_OK
+
+    with assert_max_statements(0):
+        client.get("/shop/?page=2&size=5")
+        client.get(f"/shop/{product['id']}")
+
+
+def test_catalog_pages_are_slices_of_price_order(client, admin_user, product):
+    token = login(client, admin_user["email"], admin_user["password"])
+    headers = {"Authorization": f"Bearer {token}"}
+    for name, price in [("Agua", 100), ("Toalla", 900), ("Shaker", 100)]:
+        client.post(
+            "/shop/",
+            headers=headers,
+            json={
+                "name": name,
+                "description": name,
+                "product_type": ProductType.POINTS.value,
+                "price": price,
+                "stock": 5,
+            },
+        )
+    client.delete(f"/shop/{product['id']}", headers=headers)
+
+    first = client.get("/shop/", params={"page": 1, "size": 2}).json()
+    second = client.get("/shop/", params={"page": 2, "size": 2}).json()
+    admin = client.get("/shop/", params={"include_inactive": True, "size": 10}, headers=headers).json()
+
+    assert [p["name"] for p in first["items"]] == ["Agua", "Shaker"]
+    assert [p["name"] for p in second["items"]] == ["Toalla"]
+    assert first["total"] == second["total"] == 3
+    assert [p["name"] for p in admin["items"]] == ["Agua", "Shaker", "Barra energética", "Toalla"]
+
+
+def test_list_products_revalidates_with_etag(client, admin_user, product, assert_max_statements):
+    first = client.get("/shop/")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public, max-age=")
+
+    with assert_max_statements(0):
+        cached = client.get("/shop/", headers={"If-None-Match": etag})
+
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    token = login(client, admin_user["email"], admin_user["password"])
+    client.patch(f"/shop/{product['id']}", headers={"Authorization": f"Bearer {token}"}, json={"stock": 3})
+
+    changed = client.get("/shop/", headers={"If-None-Match": etag})
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed.json()["items"][0]["stock"] == 3
+    assert changed.headers["etag"] != etag
+
+
+def test_admin_product_views_are_private(client, admin_user, product):
+    token = login(client, admin_user["email"], admin_user["password"])
+
+    response = client.get(f"/shop/{product['id']}", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["vary"] == "Authorization"
+
+
+def test_product_responses_are_cached_until_a_product_changes(client, admin_user, product, assert_max_statements):
+    assert client.get(f"/shop/{product['id']}").headers["x-cache"] == "MISS"
+
+    with assert_max_statements(0):
+        cached = client.get(f"/shop/{product['id']}")
+    assert cached.headers["x-cache"] == "HIT"
+    assert cached.json() == product
+    assert cached.headers["etag"]
+
+    token = login(client, admin_user["email"], admin_user["password"])
+    client.patch(f"/shop/{product['id']}", headers={"Authorization": f"Bearer {token}"}, json={"stock": 3})
+
+    changed = client.get(f"/shop/{product['id']}")
+    assert changed.headers["x-cache"] == "MISS"
+    assert changed.json()["stock"] == 3
+
+
+def test_cached_product_list_is_scoped_by_role(client, admin_user, product):
+    token = login(client, admin_user["email"], admin_user["password"])
+    admin_headers = {"Authorization": f"Bearer {token}"}
+    client.delete(f"/shop/{product['id']}", headers=admin_headers)
+
+    assert client.get("/shop/?include_inactive=true").json()["items"] == []
+    admin_view = client.get("/shop/?include_inactive=true", headers=admin_headers)
+
+    assert admin_view.headers["x-cache"] == "MISS"
+    assert [item["id"] for item in admin_view.json()["items"]] == [product["id"]]
@@ -0,0 +1,37 @@
+import json
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from app.main import app
+from app.openapi import build_openapi, setup_docs
+
+
+def test_docs_serve_the_application_schema(client):
+    response = client.get("/openapi.json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "/shop/" in response.json()["paths"]
+    assert client.get("/docs").status_code == status.HTTP_200_OK
+    assert client.get("/redoc").status_code == status.HTTP_200_OK
+
+
+def test_prebuilt_schema_is_served_without_generating_it(tmp_path):
+    path = build_openapi(app, tmp_path / "openapi.json")
+    assert json.loads(path.read_bytes()) == app.openapi()
+
+    worker = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
+    document = setup_docs(worker, enabled=True, path=str(path))
+    # El worker no tiene rutas propias: lo que sirve es el archivo del build
+    response = TestClient(worker).get("/openapi.json")
+
+    assert document.prebuilt
+    assert response.content == path.read_bytes()
+    assert "/shop/" in worker.openapi()["paths"]
+
+
+def test_docs_can_be_disabled():
+    worker = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
+    assert setup_docs(worker, enabled=False) is None
+
+    client = TestClient(worker)
+    for url in ("/openapi.json", "/docs", "/redoc"):
+        assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,98 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+from sqlmodel import SQLModel
+from app.core.cache import MemoryCacheBackend, NodeCacheBackend, invalidation_bus
+from app.core.database import create_db_engine
+from app import serve
+from app.serve import Master
+from app.core.workers import WorkerHeartbeats
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.1)
+    raise AssertionError("condición no alcanzada a tiempo")
+
+
+def test_master_recycles_workers_and_stops_cleanly(tmp_path):
+    url = f"sqlite:///{tmp_path / 'db.sqlite3'}"
+    engine = create_db_engine(url)
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+
+    heartbeats = WorkerHeartbeats(tmp_path / "workers")
+    port = free_port()
+    master = subprocess.Popen(
+        [
+            sys.executable, "-m", "app.serve",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+            "--max-requests", "2", "--max-requests-jitter", "0",
+        ],
+        env={
+            **os.environ,
+            "DATABASE_URL": url,
+            "WORKER_HEARTBEAT_DIR": str(heartbeats.directory),
+            "WORKER_HEARTBEAT_SECONDS": "1",
+            "CACHE_URL": "",
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        first = wait_for(lambda: {w["pid"] for w in heartbeats.read_all() if w["ready"]} if len(heartbeats.read_all()) == 2 else None)
+
+        served = 0
+        for _ in range(20):
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health", headers={"Connection": "close"})
+            except httpx.TransportError:
+                # Un worker que llegó a max_requests corta las conexiones que ya aceptó
+                continue
+            assert response.status_code == 200
+            served += 1
+            if served == 6:
+                break
+        assert served == 6
+
+        # Los workers que llegaron a max_requests se reemplazan por otros
+        wait_for(lambda: len(heartbeats.read_all()) == 2 and {w["pid"] for w in heartbeats.read_all()} != first)
+        # Sin CACHE_URL cada worker escucha las invalidaciones de sus hermanos
+        relay_dir = Path(tempfile.gettempdir()) / f"gym-bus-{master.pid}"
+        wait_for(lambda: len(list(relay_dir.glob("*.sock"))) == 2)
+    finally:
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=30) == 0
+
+    assert heartbeats.read_all() == []
+    assert not relay_dir.exists()
+
+
+def test_master_relays_invalidations_between_workers_without_cache_url(monkeypatch, caplog):
+    monkeypatch.setattr(invalidation_bus, "backend", MemoryCacheBackend())
+    monkeypatch.setattr(serve, "DATABASE_REPLICA_URL", "sqlite:///replica.sqlite3")
+
+    Master(workers=1).relay_invalidations()
+    assert invalidation_bus.backend.name == "memory"
+
+    master = Master(workers=2)
+    master.relay_invalidations()
+    assert isinstance(invalidation_bus.backend, NodeCacheBackend)
+    assert invalidation_bus.backend.directory == master.relay_dir
+    assert "read-your-writes cubre solo a los workers de este nodo" in caplog.text
@@ -0,0 +1,39 @@
+from fastapi import status
+from app.main import app
+from app.memberships.cache import membership_catalog
+from app.shop.cache import product_catalog
+from app.warmup import prime_pool, readiness, warm_up
+
+
+def test_health_is_not_ready_until_warm_up_finishes(client, session):
+    readiness.reset()
+    starting = client.get("/health")
+    assert starting.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert starting.json() == {"status": "starting"}
+
+    steps = warm_up(app, session.get_bind())
+
+    assert list(steps) == ["catalogs", "statements", "openapi", "pool"]
+    ready = client.get("/health")
+    assert ready.status_code == status.HTTP_200_OK
+    assert ready.json()["status"] == "ready"
+    assert set(ready.json()["steps"]) == set(steps)
+
+
+def test_warm_up_leaves_catalogs_and_openapi_ready(session, assert_max_statements, client):
+    warm_up(app, session.get_bind())
+
+    assert not membership_catalog.is_stale()
+    assert product_catalog.get(session, 0) is None
+    assert app.openapi_schema is not None
+    with assert_max_statements(0):
+        client.get("/memberships/")
+
+
+def test_prime_pool_never_exceeds_the_pool_size(session):
+    engine = session.get_bind()
+    size = getattr(engine.pool, "size", None)
+
+    opened = prime_pool(engine, connections=50)
+
+    assert opened == (min(50, size()) if size else 50)
@@ -0,0 +1,124 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from fastapi import FastAPI
+from sqlalchemy import Engine
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select
+from app.core.config import WARMUP_ENABLED, WARMUP_POOL_CONNECTIONS
+from app.core.database import engine, replica_engine
+from app.core.enums import MembershipStatusEnum
+from app.auth.models import User
+from app.customers.models import Customer
+from app.customermemberships.models import CustomerMembership
+from app.attendances.services import get_open_attendance_today, get_weekly_attendance_count
+from app.memberships.cache import membership_catalog
+from app.shop.cache import product_catalog
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """
+    Estado de arranque del worker: listo recién cuando terminó el warm-up.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.warmup_seconds: float | None = None
+        self.steps: dict[str, float] = {}
+
+    def mark_ready(self, steps: dict[str, float]) -> None:
+        self.steps = steps
+        self.warmup_seconds = sum(steps.values())
+        self.ready = True
+
+    def reset(self) -> None:
+        self.ready = False
+        self.warmup_seconds = None
+        self.steps = {}
+
+
+readiness = Readiness()
+
+
+def load_catalogs(session: Session) -> None:
+    membership_catalog.load(session)
+    product_catalog.load(session)
+
+
+def compile_hot_statements(session: Session) -> None:
+    """
+    Ejecuta una vez las consultas de los caminos más usados (autenticación,
+    check-in, membresía propia) con IDs inexistentes, para que su SQL quede en
+    la caché de compilación del engine antes del primer request.
+    """
+    session.get(User, 0)
+    session.exec(select(Customer).where(Customer.user_id == 0)).first()
+    session.exec(
+        select(CustomerMembership)
+        .options(joinedload(CustomerMembership.membership))
+        .where(
+            CustomerMembership.customer_id == 0,
+            CustomerMembership.status == MembershipStatusEnum.ACTIVE,
+        )
+    ).first()
+    get_open_attendance_today(session, 0)
+    get_weekly_attendance_count(session, 0)
+
+
+def prime_pool(db_engine: Engine, connections: int = WARMUP_POOL_CONNECTIONS) -> int:
+    """
+    Abre `connections` conexiones a la vez (sin superar el tamaño del pool) y
+    las devuelve, para que los primeros requests no paguen el handshake.
+    """
+    size = getattr(db_engine.pool, "size", None)
+    if size is not None:
+        connections = min(connections, size())
+
+    with ExitStack() as stack:
+        for _ in range(connections):
+            stack.enter_context(db_engine.connect())
+    return connections
+
+
+@contextmanager
+def _timed(steps: dict[str, float], name: str):
+    start = time.perf_counter()
+    yield
+    steps[name] = time.perf_counter() - start
+
+
+def warm_up(app: FastAPI, db_engine: Engine = engine) -> dict[str, float]:
+    """
+    Prepara el worker antes de recibir tráfico y lo marca como listo.
+
+    Devuelve la duración de cada paso en segundos.
+    """
+    readiness.reset()
+    steps: dict[str, float] = {}
+
+    with Session(db_engine) as session:
+        with _timed(steps, "catalogs"):
+            load_catalogs(session)
+        if WARMUP_ENABLED:
+            with _timed(steps, "statements"):
+                compile_hot_statements(session)
+
+    if WARMUP_ENABLED:
+        document = getattr(app.state, "openapi_document", None)
+        if document is not None:
+            with _timed(steps, "openapi"):
+                document.content()
+        with _timed(steps, "pool"):
+            prime_pool(db_engine)
+            if replica_engine is not None:
+                prime_pool(replica_engine)
+
+    readiness.mark_ready(steps)
+    logger.info(
+        "Warm-up completo en %.0f ms (%s)",
+        readiness.warmup_seconds * 1000,
+        ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in steps.items()),
+    )
+    return steps
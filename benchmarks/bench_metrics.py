@@ -0,0 +1,49 @@
+"""
+Mide el costo por request de MetricsMiddleware.
+
+Envuelve una app ASGI mínima (sin routing ni base de datos) para aislar el
+overhead del middleware, y compara contra la misma app sin instrumentar.
+
+    python -m benchmarks.bench_metrics
+"""
+import asyncio
+import time
+from app.core.metrics import MetricsMiddleware
+
+REQUESTS = 100_000
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def run(app) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/shop/", "headers": []}
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    baseline = asyncio.run(run(bare_app))
+    instrumented = asyncio.run(run(MetricsMiddleware(bare_app)))
+
+    overhead_us = (instrumented - baseline) / REQUESTS * 1_000_000
+    print(f"requests:      {REQUESTS}")
+    print(f"sin métricas:  {baseline / REQUESTS * 1_000_000:.2f} µs/request")
+    print(f"con métricas:  {instrumented / REQUESTS * 1_000_000:.2f} µs/request")
+    print(f"overhead:      {overhead_us:.2f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Mide el rollover mensual de membresías sobre una base con muchos clientes:
+cada cliente tiene una membresía activa que vence a fin de mes y una pendiente
+que empieza el día 1 (dos filas a actualizar por cliente).
+
+Compara los updates por conjunto de `rollover_memberships` contra recorrer
+las filas con el ORM y cambiarlas una por una. Cada variante corre sobre una
+base SQLite nueva (con el perfil de conexión de la app).
+
+    python -m benchmarks.bench_rollover [clientes]
+"""
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, select
+from app.core.database import create_db_engine
+from app.core.enums import MembershipStatusEnum, RoleEnum
+from app.customers.services import obtener_ultimo_dia
+from app.customermemberships.services import rollover_memberships
+import app.models  # noqa: F401
+from app.auth.models import User
+from app.customers.models import Customer
+from app.customermemberships.models import CustomerMembership
+from app.memberships.models import Membership
+
+CUSTOMERS = 100_000
+CHUNK_SIZES = (1_000, 10_000)
+
+ultimo_dia, primer_dia_siguiente = obtener_ultimo_dia(date.today())
+
+
+def seed(db_engine, customers: int) -> None:
+    SQLModel.metadata.create_all(db_engine)
+    with db_engine.begin() as connection:
+        connection.execute(insert(Membership), [
+            {"id": 1, "name": "Premium", "max_days_per_week": 5, "points_multiplier": 1.5},
+            {"id": 2, "name": "Medium", "max_days_per_week": 3, "points_multiplier": 1.2},
+        ])
+        connection.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "hashed_password": "x", "role": RoleEnum.CUSTOMER}
+            for i in range(1, customers + 1)
+        ])
+        connection.execute(insert(Customer), [
+            {"id": i, "user_id": i, "first_name": "Pepe", "last_name": "Perez", "birth_date": date(2000, 1, 1)}
+            for i in range(1, customers + 1)
+        ])
+        connection.execute(insert(CustomerMembership), [
+            row
+            for i in range(1, customers + 1)
+            for row in (
+                {
+                    "customer_id": i, "membership_id": 1, "status": MembershipStatusEnum.ACTIVE,
+                    "start_date": date.today(), "end_date": ultimo_dia,
+                },
+                {
+                    "customer_id": i, "membership_id": 2, "status": MembershipStatusEnum.PENDING,
+                    "start_date": primer_dia_siguiente, "end_date": None,
+                },
+            )
+        ])
+
+
+def row_by_row(session: Session) -> int:
+    rows = 0
+    for membership in session.exec(
+        select(CustomerMembership).where(
+            CustomerMembership.status == MembershipStatusEnum.ACTIVE,
+            CustomerMembership.end_date < primer_dia_siguiente,
+        )
+    ).all():
+        membership.status = MembershipStatusEnum.INACTIVE
+        rows += 1
+    session.commit()
+    for membership in session.exec(
+        select(CustomerMembership).where(
+            CustomerMembership.status == MembershipStatusEnum.PENDING,
+            CustomerMembership.start_date <= primer_dia_siguiente,
+        )
+    ).all():
+        membership.status = MembershipStatusEnum.ACTIVE
+        rows += 1
+    session.commit()
+    return rows
+
+
+def measure(directory: str, customers: int, run) -> tuple[int, float]:
+    path = Path(directory) / f"rollover-{time.monotonic_ns()}.sqlite3"
+    db_engine = create_db_engine(f"sqlite:///{path}")
+    seed(db_engine, customers)
+    with Session(db_engine) as session:
+        start = time.perf_counter()
+        rows = run(session)
+        elapsed = time.perf_counter() - start
+    db_engine.dispose()
+    return rows, elapsed
+
+
+def main():
+    customers = int(sys.argv[1]) if len(sys.argv) > 1 else CUSTOMERS
+    print(f"clientes:   {customers} ({customers * 2} filas a actualizar)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows, elapsed = measure(directory, customers, row_by_row)
+        print(f"fila a fila (ORM):        {elapsed * 1000:8.0f} ms  {rows / elapsed:10.0f} filas/s")
+
+        for chunk_size in CHUNK_SIZES:
+            result = None
+
+            def set_based(session):
+                nonlocal result
+                result = rollover_memberships(session, today=primer_dia_siguiente, chunk_size=chunk_size)
+                return result.total_rows
+
+            rows, elapsed = measure(directory, customers, set_based)
+            steps = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in result.seconds.items())
+            print(
+                f"por conjunto (chunk {chunk_size:>6}): {elapsed * 1000:8.0f} ms  "
+                f"{rows / elapsed:10.0f} filas/s  ({steps})"
+            )
+
+
+if __name__ == "__main__":
+    main()
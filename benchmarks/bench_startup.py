@@ -0,0 +1,78 @@
+"""
+Mide el arranque de un worker: import de la app y armado del esquema OpenAPI,
+generado en el proceso contra leído del archivo precalculado.
+
+Cada medición corre en un intérprete nuevo (sin módulos en caché) y se informa
+la mediana. Al final lista los módulos de la app que más tardan en importarse.
+
+    python -m benchmarks.bench_startup
+"""
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RUNS = 5
+
+MEASURE = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+if {prebuilt!r}:
+    from app.openapi import OpenAPIDocument
+    OpenAPIDocument(app.main.app, {prebuilt!r}).content()
+else:
+    app.main.app.openapi()
+done = time.perf_counter()
+print(json.dumps({{"import": imported - start, "openapi": done - imported}}))
+"""
+
+
+def measure(prebuilt: str | None) -> dict[str, float]:
+    runs = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(prebuilt=prebuilt)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def slowest_imports(limit: int = 10) -> list[tuple[str, float]]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        if name.startswith("app.") and cumulative.strip().isdigit():
+            modules.append((name, int(cumulative) / 1000))
+    return sorted(modules, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    generated = measure(None)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "openapi.json"
+        subprocess.run([sys.executable, "-m", "app.openapi", str(path)], check=True, capture_output=True)
+        prebuilt = measure(str(path))
+
+    print(f"ejecuciones:          {RUNS} (mediana)")
+    print(f"import app.main:      {generated['import'] * 1000:.0f} ms")
+    print(f"OpenAPI generado:     {generated['openapi'] * 1000:.1f} ms")
+    print(f"OpenAPI precalculado: {prebuilt['openapi'] * 1000:.1f} ms")
+    print("\nmódulos de la app más lentos (import acumulado):")
+    for name, milliseconds in slowest_imports():
+        print(f"  {name:40} {milliseconds:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()